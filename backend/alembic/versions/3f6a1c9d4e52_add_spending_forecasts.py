@@ -0,0 +1,38 @@
+"""Add precomputed spending forecasts
+
+Revision ID: 3f6a1c9d4e52
+Revises: 8c41e0b7d2a9
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f6a1c9d4e52"
+down_revision = "8c41e0b7d2a9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled by the nightly refresh_spending_forecasts task
+    op.create_table(
+        "spending_forecasts",
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("as_of", sa.Date(), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.PrimaryKeyConstraint("group_id"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("spending_forecasts")
@@ -0,0 +1,64 @@
+"""Add composite and partial indexes for hot filter paths
+
+Revision ID: 5d72f9230ea3
+Revises: b5c7a5cf6c3c
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5d72f9230ea3"
+down_revision = "b5c7a5cf6c3c"
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ("ix_fridge_items_group_id_use_within_date", "fridge_items",
+     ["group_id", "use_within_date", "id"], None),
+    ("ix_shopping_tasks_list_id", "shopping_tasks", ["list_id"], None),
+    ("ix_shopping_lists_group_id_created_at", "shopping_lists",
+     ["group_id", "created_at", "id"], None),
+    ("ix_shopping_lists_group_id_completed", "shopping_lists",
+     ["group_id", "created_at"], "status = 'completed'"),
+    ("ix_meal_plans_group_id_meal_date", "meal_plans",
+     ["group_id", "meal_date", "id"], None),
+    ("ix_recipes_group_id_created_at", "recipes",
+     ["group_id", "created_at", "id"], None),
+    ("ix_foods_group_id_name_active", "foods",
+     ["group_id", "name", "id"], "is_active = true"),
+    ("ix_group_members_user_id_active", "group_members",
+     ["user_id"], "is_active = true"),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; build each
+    # index in its own autocommit block so writes are never locked out.
+    # IF NOT EXISTS lets a run that failed half way be retried (drop any
+    # INVALID index left behind by a failed concurrent build first).
+    for name, table, columns, where in INDEXES:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    for name, table, _columns, _where in reversed(INDEXES):
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
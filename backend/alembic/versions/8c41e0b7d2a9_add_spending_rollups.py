@@ -0,0 +1,79 @@
+"""Add daily spending rollup tables
+
+Revision ID: 8c41e0b7d2a9
+Revises: 5d72f9230ea3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8c41e0b7d2a9"
+down_revision = "5d72f9230ea3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_spending",
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("spend", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("budget", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("list_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("group_id", "day"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "daily_category_spending",
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "category_id", sa.Integer(), sa.ForeignKey("categories.id"), nullable=False
+        ),
+        sa.Column("spend", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("item_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("group_id", "day", "category_id"),
+        if_not_exists=True,
+    )
+
+    # Backfill from history; the nightly reconcile job uses the same queries
+    op.execute(
+        """
+        INSERT INTO daily_spending (group_id, day, spend, budget, list_count)
+        SELECT group_id,
+               (created_at AT TIME ZONE 'UTC')::date,
+               COALESCE(SUM(total_cost), 0),
+               COALESCE(SUM(budget), 0),
+               COUNT(*)
+        FROM shopping_lists
+        WHERE status = 'completed'
+        GROUP BY 1, 2
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO daily_category_spending
+            (group_id, day, category_id, spend, item_count)
+        SELECT l.group_id,
+               (l.created_at AT TIME ZONE 'UTC')::date,
+               f.category_id,
+               COALESCE(SUM(t.actual_cost), 0),
+               COUNT(*)
+        FROM shopping_tasks t
+        JOIN shopping_lists l ON l.id = t.list_id
+        JOIN foods f ON f.id = t.food_id
+        WHERE f.category_id IS NOT NULL
+        GROUP BY 1, 2, 3
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_category_spending")
+    op.drop_table("daily_spending")
@@ -0,0 +1,42 @@
+"""Add fridge expiry summaries
+
+Revision ID: 9b2e7d41c6f8
+Revises: 3f6a1c9d4e52
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9b2e7d41c6f8"
+down_revision = "3f6a1c9d4e52"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Filled by the scheduled scan_fridge_expiry task
+    op.create_table(
+        "fridge_expiry_summaries",
+        sa.Column("group_id", sa.Integer(), sa.ForeignKey("groups.id"), nullable=False),
+        sa.Column("as_of", sa.Date(), nullable=False),
+        sa.Column("expired_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("expiring_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("expired_value", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("expiring_value", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("items", sa.JSON(), nullable=False),
+        sa.Column(
+            "computed_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.PrimaryKeyConstraint("group_id"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("fridge_expiry_summaries")
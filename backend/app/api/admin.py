@@ -3,6 +3,7 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 
+from ..core import cache
 from ..core.database import get_db
 from ..core.config import settings
 from ..core.security import create_access_token
@@ -214,6 +215,8 @@ def update_user(
         user.is_verified = request.is_verified
     
     db.commit()
+    cache.invalidate_user(user_id)
+    cache.invalidate_group_context(user_id)
     db.refresh(user)
     
     return AdminUserUpdateResponse(
@@ -241,6 +244,8 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    cache.invalidate_user(user_id)
+    cache.invalidate_group_context(user_id)
     
     return AdminUserDeleteResponse(
         resultMessage=ResultMessage(
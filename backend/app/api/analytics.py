@@ -1,26 +1,117 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Literal, TypeVar
+
 from fastapi import APIRouter, Depends
-from sqlalchemy import func, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, date
 
-from ..core.database import get_db
-from ..core.deps import get_current_user
-from ..models import User, ShoppingList, ShoppingTask, Food, Category, FridgeItem
+from ..core import cache
+from ..core.config import settings
+from ..core.database import get_async_read_db
+from ..core.deps import get_current_user_async
+from ..models import (
+    User,
+    ShoppingList,
+    Category,
+    FridgeItem,
+    DailySpending,
+    DailyCategorySpending,
+    SpendingForecast,
+)
 from ..schemas.analytics import (
     MonthlySpendingResponse,
+    SpendingResponse,
     CategoryBreakdownResponse,
     CategoryData,
     AnalyticsSummaryResponse,
+    SpendingForecastResponse,
 )
-from ..schemas.base import ResultMessage
+from ..schemas.base import BaseResponse, ResultMessage
+from ..services.analytics import bucket_daily_spending
+from ..services.forecast import build_forecasts, category_statement, daily_statement
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+# How far back each granularity looks when no start date is given
+DEFAULT_LOOKBACK_DAYS = {"day": 31, "week": 7 * 12, "month": 365, "year": None}
+
+# Poll interval while another request recomputes a cached response
+CACHE_WAIT_INTERVAL_SECONDS = 0.05
+
+ResponseT = TypeVar("ResponseT", bound=BaseResponse)
+
+
+async def _cached(
+    group_id: int,
+    name: str,
+    params: dict,
+    response_model: type[ResponseT],
+    compute: Callable[[], Awaitable[ResponseT]],
+) -> ResponseT:
+    """Serve an analytics response from Redis, computing it at most once.
+
+    Entries are keyed by the group's data version, which shopping and fridge
+    writes bump, so they never need to be deleted. On a miss one request
+    takes a short lock and computes; concurrent requests for the same key
+    wait for its result instead of all hitting the database.
+    """
+    # Relative windows ("expiring within 3 days") move with the date
+    params = {**params, "today": date.today()}
+    key = await cache.analytics_cache_key_async(group_id, name, params)
+    if key is None:
+        return await compute()
+
+    body = await cache.get_cached_analytics_async(key)
+    if body is not None:
+        return response_model.model_validate(body)
+
+    lock = await cache.acquire_analytics_lock_async(key)
+    if lock is None:
+        deadline = time.monotonic() + settings.analytics_cache_wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(CACHE_WAIT_INTERVAL_SECONDS)
+            body = await cache.get_cached_analytics_async(key)
+            if body is not None:
+                return response_model.model_validate(body)
+        return await compute()
+
+    try:
+        response = await compute()
+        await cache.cache_analytics_async(
+            key, response.model_dump(mode="json", by_alias=True)
+        )
+    finally:
+        await cache.release_analytics_lock_async(lock)
+    return response
+
+
+async def _spending_series(
+    db: AsyncSession,
+    group_id: int,
+    granularity: str,
+    start: date | None,
+    end: date | None,
+):
+    """Spending buckets of a group read from the daily rollup."""
+    query = select(DailySpending.day, DailySpending.spend, DailySpending.budget).where(
+        DailySpending.group_id == group_id,
+        DailySpending.list_count > 0,
+    )
+    if start is not None:
+        query = query.where(DailySpending.day >= start)
+    if end is not None:
+        query = query.where(DailySpending.day <= end)
+
+    rows = (await db.execute(query.order_by(DailySpending.day))).all()
+    return bucket_daily_spending(rows, granularity)
+
 
 @router.get("/spending/monthly", response_model=MonthlySpendingResponse)
-def get_monthly_spending(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_monthly_spending(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """Returns monthly spending aggregated by month for current group"""
     # Get user's current group
@@ -38,28 +129,24 @@ def get_monthly_spending(
             ),
         )
 
+    return await _cached(
+        group_id,
+        "spending_monthly",
+        {},
+        MonthlySpendingResponse,
+        lambda: _monthly_spending(db, group_id),
+    )
+
+
+async def _monthly_spending(db: AsyncSession, group_id: int) -> MonthlySpendingResponse:
     # Query last 12 months
-    twelve_months_ago = datetime.now() - timedelta(days=365)
+    twelve_months_ago = date.today() - timedelta(days=365)
 
-    results = (
-        db.query(
-            func.date_trunc("month", ShoppingList.created_at).label("month"),
-            func.sum(ShoppingList.total_cost).label("amount"),
-            func.sum(ShoppingList.budget).label("budget"),
-        )
-        .filter(
-            ShoppingList.group_id == group_id,
-            ShoppingList.status == "completed",
-            ShoppingList.created_at >= twelve_months_ago,
-        )
-        .group_by("month")
-        .order_by("month")
-        .all()
-    )
+    results = await _spending_series(db, group_id, "month", twelve_months_ago, None)
 
-    months = [r.month.strftime("%Y-%m") for r in results]
-    amounts = [float(r.amount) if r.amount else 0.0 for r in results]
-    budgets = [float(r.budget) if r.budget else 0.0 for r in results]
+    months = [month for month, _, _ in results]
+    amounts = [float(amount) for _, amount, _ in results]
+    budgets = [float(budget) for _, _, budget in results]
 
     return MonthlySpendingResponse(
         months=months,
@@ -73,11 +160,138 @@ def get_monthly_spending(
     )
 
 
+@router.get("/spending", response_model=SpendingResponse)
+async def get_spending(
+    granularity: Literal["day", "week", "month", "year"] = "month",
+    start: date | None = None,
+    end: date | None = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Returns spending of the current group bucketed by day, week, month or year"""
+    group_id = current_user.belongs_to_group_admin_id
+
+    if group_id is None:
+        return SpendingResponse(
+            granularity=granularity,
+            periods=[],
+            amounts=[],
+            budgets=[],
+            resultCode="00201",
+            resultMessage=ResultMessage(
+                en="No group assigned",
+                vn="Chưa có nhóm"
+            ),
+        )
+
+    lookback = DEFAULT_LOOKBACK_DAYS[granularity]
+    if start is None and lookback is not None:
+        start = date.today() - timedelta(days=lookback)
+
+    return await _cached(
+        group_id,
+        "spending",
+        {"granularity": granularity, "start": start, "end": end},
+        SpendingResponse,
+        lambda: _spending(db, group_id, granularity, start, end),
+    )
+
+
+async def _spending(
+    db: AsyncSession,
+    group_id: int,
+    granularity: str,
+    start: date | None,
+    end: date | None,
+) -> SpendingResponse:
+    results = await _spending_series(db, group_id, granularity, start, end)
+
+    return SpendingResponse(
+        granularity=granularity,
+        periods=[period for period, _, _ in results],
+        amounts=[float(amount) for _, amount, _ in results],
+        budgets=[float(budget) for _, _, budget in results],
+        resultCode="00201",
+        resultMessage=ResultMessage(
+            en="Spending retrieved successfully",
+            vn="Lấy chi tiêu thành công"
+        ),
+    )
+
+
+@router.get("/spending/forecast", response_model=SpendingForecastResponse)
+async def get_spending_forecast(
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Returns moving averages, month-end projection and category anomalies
+
+    Forecasts are precomputed nightly for every group; a group without
+    today's forecast (new group, job not run yet) gets one computed on the
+    spot from its daily rollups.
+    """
+    group_id = current_user.belongs_to_group_admin_id
+
+    if group_id is None:
+        return SpendingForecastResponse(
+            movingAverage7d=0.0,
+            movingAverage30d=0.0,
+            lastMonthSpend=0.0,
+            previousMonthSpend=0.0,
+            monthToDateSpend=0.0,
+            projectedMonthSpend=0.0,
+            monthBudget=0.0,
+            projectedOverBudget=False,
+            categories=[],
+            resultCode="00204",
+            resultMessage=ResultMessage(
+                en="No group assigned",
+                vn="Chưa có nhóm"
+            ),
+        )
+
+    return await _cached(
+        group_id,
+        "spending_forecast",
+        {},
+        SpendingForecastResponse,
+        lambda: _spending_forecast(db, group_id),
+    )
+
+
+async def _spending_forecast(db: AsyncSession, group_id: int) -> SpendingForecastResponse:
+    today = date.today()
+    data = (
+        await db.execute(
+            select(SpendingForecast.data).where(
+                SpendingForecast.group_id == group_id,
+                SpendingForecast.as_of == today,
+            )
+        )
+    ).scalar_one_or_none()
+
+    if data is None:
+        daily_rows = (await db.execute(daily_statement([group_id], today))).all()
+        category_rows = (await db.execute(category_statement([group_id], today))).all()
+        data = build_forecasts([group_id], daily_rows, category_rows, today)[group_id]
+
+    return SpendingForecastResponse(
+        **data,
+        resultCode="00204",
+        resultMessage=ResultMessage(
+            en="Spending forecast retrieved successfully",
+            vn="Lấy dự báo chi tiêu thành công"
+        ),
+    )
+
+
 @router.get("/categories/breakdown", response_model=CategoryBreakdownResponse)
-def get_category_breakdown(
+async def get_category_breakdown(
     month: str | None = None,  # Format: "2025-01"
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    start: date | None = None,
+    end: date | None = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """Returns spending breakdown by food category"""
     group_id = current_user.belongs_to_group_admin_id
@@ -93,18 +307,37 @@ def get_category_breakdown(
             ),
         )
 
+    return await _cached(
+        group_id,
+        "category_breakdown",
+        {"month": month, "start": start, "end": end},
+        CategoryBreakdownResponse,
+        lambda: _category_breakdown(db, group_id, month, start, end),
+    )
+
+
+async def _category_breakdown(
+    db: AsyncSession,
+    group_id: int,
+    month: str | None,
+    start: date | None,
+    end: date | None,
+) -> CategoryBreakdownResponse:
     query = (
-        db.query(
+        select(
             Category.name,
-            func.sum(ShoppingTask.actual_cost).label("amount"),
-            func.count(ShoppingTask.id).label("count"),
+            func.sum(DailyCategorySpending.spend).label("amount"),
+            func.sum(DailyCategorySpending.item_count).label("count"),
         )
-        .join(Food, ShoppingTask.food_id == Food.id)
-        .join(Category, Food.category_id == Category.id)
-        .join(ShoppingList, ShoppingTask.list_id == ShoppingList.id)
-        .filter(ShoppingList.group_id == group_id)
+        .join(Category, DailyCategorySpending.category_id == Category.id)
+        .where(DailyCategorySpending.group_id == group_id)
     )
 
+    if start is not None:
+        query = query.where(DailyCategorySpending.day >= start)
+    if end is not None:
+        query = query.where(DailyCategorySpending.day <= end)
+
     if month:
         # Filter by month
         try:
@@ -115,14 +348,20 @@ def get_category_breakdown(
             else:
                 end_date = start_date.replace(month=start_date.month + 1, day=1)
 
-            query = query.filter(
-                ShoppingList.created_at >= start_date,
-                ShoppingList.created_at < end_date,
+            query = query.where(
+                DailyCategorySpending.day >= start_date.date(),
+                DailyCategorySpending.day < end_date.date(),
             )
         except ValueError:
             pass  # Invalid date format, ignore filter
 
-    results = query.group_by(Category.name).all()
+    results = (
+        await db.execute(
+            query.group_by(Category.name).having(
+                func.sum(DailyCategorySpending.item_count) > 0
+            )
+        )
+    ).all()
     total = sum(float(r.amount) if r.amount else 0.0 for r in results)
 
     categories = [
@@ -149,11 +388,18 @@ def get_category_breakdown(
 
 
 @router.get("/summary", response_model=AnalyticsSummaryResponse)
-def get_analytics_summary(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_analytics_summary(
+    start: date | None = None,
+    end: date | None = None,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    """Returns overall analytics summary"""
+    """Returns overall analytics summary
+
+    ``start``/``end`` limit the shopping figures to lists created in that
+    window; fridge value and the expiring count always describe the fridge
+    as it is now.
+    """
     group_id = current_user.belongs_to_group_admin_id
 
     if group_id is None:
@@ -170,63 +416,65 @@ def get_analytics_summary(
             ),
         )
 
-    # Total spent (completed lists)
-    total_spent = (
-        db.query(func.sum(ShoppingList.total_cost))
-        .filter(
-            ShoppingList.group_id == group_id,
-            ShoppingList.status == "completed",
-        )
-        .scalar()
-        or 0
+    return await _cached(
+        group_id,
+        "summary",
+        {"start": start, "end": end},
+        AnalyticsSummaryResponse,
+        lambda: _summary(db, group_id, start, end),
     )
 
-    # Total budget
-    total_budget = (
-        db.query(func.sum(ShoppingList.budget))
-        .filter(ShoppingList.group_id == group_id)
-        .scalar()
-        or 0
-    )
 
-    # Average shopping trip
-    avg_trip = (
-        db.query(func.avg(ShoppingList.total_cost))
-        .filter(
-            ShoppingList.group_id == group_id,
-            ShoppingList.status == "completed",
-        )
-        .scalar()
-        or 0
-    )
+async def _summary(
+    db: AsyncSession, group_id: int, start: date | None, end: date | None
+) -> AnalyticsSummaryResponse:
+    completed = ShoppingList.status == "completed"
+    list_filters = [ShoppingList.group_id == group_id]
+    if start is not None:
+        list_filters.append(ShoppingList.created_at >= start)
+    if end is not None:
+        list_filters.append(ShoppingList.created_at < end + timedelta(days=1))
 
-    # Fridge value (sum of costs)
-    fridge_value = (
-        db.query(func.sum(FridgeItem.cost))
-        .filter(FridgeItem.group_id == group_id)
-        .scalar()
-        or 0
+    # Both aggregates are one-row CTEs, so the whole summary is a single
+    # statement (one round trip) instead of five scalar queries
+    lists = (
+        select(
+            func.sum(ShoppingList.total_cost).filter(completed).label("total_spent"),
+            func.sum(ShoppingList.budget).label("total_budget"),
+            func.avg(ShoppingList.total_cost).filter(completed).label("avg_trip"),
+        )
+        .where(*list_filters)
+        .cte("list_totals")
     )
 
-    # Expiring soon count (within 3 days)
-    three_days_later = date.today() + timedelta(days=3)
-    expiring_soon = (
-        db.query(func.count(FridgeItem.id))
-        .filter(
-            FridgeItem.group_id == group_id,
-            FridgeItem.use_within_date <= three_days_later,
-            FridgeItem.use_within_date >= date.today(),
+    # Expiring soon count, counted live: the nightly expiry scan's count
+    # would miss every fridge change made since it ran
+    today = date.today()
+    fridge = (
+        select(
+            func.sum(FridgeItem.cost).label("fridge_value"),
+            func.count(FridgeItem.id)
+            .filter(
+                FridgeItem.use_within_date
+                <= today + timedelta(days=settings.fridge_expiring_window_days),
+                FridgeItem.use_within_date >= today,
+            )
+            .label("expiring_soon"),
         )
-        .scalar()
-        or 0
+        .where(FridgeItem.group_id == group_id)
+        .cte("fridge_totals")
     )
 
+    summary = (
+        await db.execute(select(lists, fridge).select_from(lists.join(fridge, true())))
+    ).one()
+
     return AnalyticsSummaryResponse(
-        totalSpent=float(total_spent),
-        totalBudget=float(total_budget),
-        averageShoppingTrip=float(avg_trip),
-        fridgeValue=float(fridge_value),
-        expiringSoonCount=expiring_soon,
+        totalSpent=float(summary.total_spent or 0),
+        totalBudget=float(summary.total_budget or 0),
+        averageShoppingTrip=float(summary.avg_trip or 0),
+        fridgeValue=float(summary.fridge_value or 0),
+        expiringSoonCount=summary.expiring_soon or 0,
         resultCode="00203",
         resultMessage=ResultMessage(
             en="Analytics summary retrieved successfully",
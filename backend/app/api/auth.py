@@ -1,9 +1,16 @@
 """Authentication API routes."""
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
-from ..core.security import verify_token, create_access_token
+from ..core import cache, otp, revocation
+from ..core.database import get_async_db, get_db
+from ..core.deps import get_current_user, security
+from ..core.security import verify_token, create_access_token, hash_password_async
 from ..core.config import settings
 from ..schemas.auth import (
     RegisterRequest, RegisterResponse,
@@ -11,24 +18,21 @@ from ..schemas.auth import (
     RefreshToken, TokenResponse,
     VerifyEmailRequest, VerifyEmailResponse,
     SendVerificationCodeRequest, SendVerificationCodeResponse,
-    LogoutResponse
+    LogoutRequest, LogoutResponse
 )
 from ..schemas.base import UserData, ResultMessage
 from ..services.auth import AuthService
 from ..models import User
 
-import redis
-
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# get the redis client
-redis_client = redis.from_url(settings.redis_url, decode_responses=True)
-
 
 @router.post("/register", response_model=RegisterResponse)
-def register(user_data: RegisterRequest, db: Session = Depends(get_db)):
+async def register(user_data: RegisterRequest, db: Session = Depends(get_db)):
     """Register a new user."""
-    user = AuthService.register_user(db, user_data)
+    await run_in_threadpool(AuthService.validate_registration, db, user_data)
+    password_hash = await hash_password_async(user_data.password)
+    user = await run_in_threadpool(AuthService.register_user, db, user_data, password_hash)
 
     confirm_token = create_access_token({
         "sub": str(user.id),
@@ -61,54 +65,83 @@ def verify_email(request: VerifyEmailRequest, db: Session = Depends(get_db)):
             detail="Invalid or expired token"
         )
 
-    user_id = payload.get("sub")
-
-    user = db.query(User).filter(User.id == int(user_id)).first()
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+    user_id = int(payload.get("sub"))
 
-    stored_code = redis_client.get(f"otp:{user.id}")
+    # Checked before touching the database, so guessing costs one Redis call
+    result = otp.verify_otp("verify_email", user_id, request.code)
 
-    if not stored_code:
+    if result == otp.OTPResult.MISSING:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="OTP code expired or not found"
         )
-
-    if stored_code == request.code:
-        user.is_verified = True
-        db.commit()
-        db.refresh(user)
-
-        tokens = AuthService.create_tokens(user)
-
-        redis_client.delete(f"otp:{user.id}")
-
-        return VerifyEmailResponse(
-            resultMessage=ResultMessage(
-                en="Your email has been verified successfully",
-                vn="Địa chỉ email của bạn đã được xác minh thành công"
-            ),
-            resultCode="00058",
-            accessToken=tokens["access_token"],
-            refreshToken=tokens["refresh_token"],
-            groupId=user.belongs_to_group_admin_id
+    if result == otp.OTPResult.EXHAUSTED:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Too many incorrect attempts, request a new code"
         )
-    else:
+    if result == otp.OTPResult.INCORRECT:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect OTP code"
         )
 
+    user = db.query(User).filter(User.id == user_id).first()
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    user.is_verified = True
+    db.commit()
+    cache.invalidate_user(user.id)
+    db.refresh(user)
+
+    tokens = AuthService.create_tokens(user)
+
+    return VerifyEmailResponse(
+        resultMessage=ResultMessage(
+            en="Your email has been verified successfully",
+            vn="Địa chỉ email của bạn đã được xác minh thành công"
+        ),
+        resultCode="00058",
+        accessToken=tokens["access_token"],
+        refreshToken=tokens["refresh_token"],
+        groupId=user.belongs_to_group_admin_id
+    )
+
 
 @router.post("/send-verification-code", response_model=SendVerificationCodeResponse)
-def send_verification_code(request: SendVerificationCodeRequest, db: Session = Depends(get_db)):
+def send_verification_code(
+    request: SendVerificationCodeRequest,
+    http_request: Request,
+    db: Session = Depends(get_db),
+):
     """Send or resend verification code"""
 
+    # Rejected requests stop here, before any database or queue work
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    retry_after = otp.hit_rate_limits([
+        (
+            f"otp_send:email:{request.email.lower()}",
+            settings.otp_send_limit_per_email,
+            settings.otp_send_window_seconds,
+        ),
+        (
+            f"otp_send:ip:{client_ip}",
+            settings.otp_send_limit_per_ip,
+            settings.otp_send_window_seconds,
+        ),
+    ])
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many verification code requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
     user = db.query(User).filter(User.email == request.email).first()
 
     if not user:
@@ -136,9 +169,9 @@ def send_verification_code(request: SendVerificationCodeRequest, db: Session = D
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """Authenticate user and return tokens."""
-    user = AuthService.authenticate_user(db, login_data)
+    user = await AuthService.authenticate_user(db, login_data)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -164,7 +197,7 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
 def refresh_token(token_data: RefreshToken, db: Session = Depends(get_db)):
     """Refresh access token using refresh token."""
     payload = verify_token(token_data.refresh_token, "refresh")
-    if payload is None:
+    if payload is None or revocation.is_revoked(payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token"
@@ -199,8 +232,21 @@ def refresh_token(token_data: RefreshToken, db: Session = Depends(get_db)):
 
 
 @router.post("/logout", response_model=LogoutResponse)
-def logout():
-    """Logout user (client should discard tokens)."""
+def logout(
+    request: LogoutRequest | None = None,
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+):
+    """Logout user: revoke the bearer access token and, when sent, the
+    refresh token."""
+    if credentials is not None:
+        payload = verify_token(credentials.credentials, "access")
+        if payload is not None:
+            revocation.revoke_token(payload)
+    if request is not None and request.refresh_token:
+        payload = verify_token(request.refresh_token, "refresh")
+        if payload is not None:
+            revocation.revoke_token(payload)
+
     return LogoutResponse(
         resultMessage=ResultMessage(
             en="Logout successful",
@@ -208,3 +254,17 @@ def logout():
         ),
         resultCode="00050"
     )
+
+
+@router.post("/logout-all", response_model=LogoutResponse)
+def logout_all(current_user: User = Depends(get_current_user)):
+    """Revoke every token issued to the current user so far, on all devices."""
+    revocation.revoke_all_for_user(current_user.id)
+
+    return LogoutResponse(
+        resultMessage=ResultMessage(
+            en="Logged out on all devices",
+            vn="Đã đăng xuất trên tất cả thiết bị"
+        ),
+        resultCode="00051"
+    )
@@ -3,7 +3,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
+from ..core.database import get_db, get_read_db
 from ..core.deps import get_current_user
 from ..models import Category, User
 from ..schemas.base import ResultMessage
@@ -57,7 +57,7 @@ def create_category(
 
 @router.get("/", response_model=GetAllCategoriesResponse)
 def get_all_categories(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     categories = db.query(Category).all()
     return GetAllCategoriesResponse(
@@ -1,9 +1,18 @@
 """Food - related API routes."""
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    UploadFile,
+    status,
+)
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
+from ..core.database import get_db, get_read_db
 from ..core.deps import get_current_user
 from ..core import storage
 from ..models import Category, Food, Unit, User
@@ -20,6 +29,7 @@ from ..schemas.food import (
     GetFoodsByNamesRequest,
     GetFoodsByNamesResponse,
 )
+from ..utils.pagination import KeysetPage
 from ..utils.resultCode import ResultCode
 
 router = APIRouter(prefix="/food", tags=["Foods"])
@@ -68,6 +78,8 @@ def create_food(
             response = storage.upload_file(client, image, "food", None)
             if response:
                 image_url = response["public_url"]
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error uploading image: {e}")
 
@@ -101,15 +113,23 @@ def create_food(
 
 @router.get("/", response_model=GetAllFoodsResponse)
 def get_all_foods(
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1),
+    db: Session = Depends(get_read_db),
     user: User = Depends(get_current_user),
 ):
-    foods = db.query(Food).filter(
-        Food.group_id == user.belongs_to_group_admin_id,
-        Food.is_active == True
-    ).all()
+    page = KeysetPage((Food.name, Food.id), cursor=cursor, limit=limit)
+    foods, next_cursor = page.page(
+        page.apply(
+            db.query(Food).filter(
+                Food.group_id == user.belongs_to_group_admin_id,
+                Food.is_active == True
+            )
+        ).all()
+    )
     return GetAllFoodsResponse(
         foods=[FoodData.model_validate(food) for food in foods],
+        nextCursor=next_cursor,
         resultCode=ResultCode.SUCCESS_FOOD_LIST_FETCHED.value[0],
         resultMessage=ResultMessage(
             en="Foods fetched successfully",
@@ -181,6 +201,8 @@ def edit_food_by_name(
             response = storage.upload_file(client, image, "food", food.image_url)
             if response:
                 food.image_url = response["public_url"]
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"Error uploading image: {e}")
 
@@ -1,11 +1,14 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
-from ..core.deps import get_current_user
-from ..models import Food, FridgeItem, Group, GroupMember, Unit, User
+from ..core import cache
+from ..core.database import get_async_read_db, get_db
+from ..core.deps import GroupContext, get_group_context, get_group_context_async
+from ..models import Food, FridgeItem
 from ..schemas.base import ResultMessage
 from ..schemas.fridge import (
     CreateFridgeItemRequest,
@@ -19,6 +22,8 @@ from ..schemas.fridge import (
     UpdateFridgeItemRequest,
     UpdateFridgeItemResponse,
 )
+from ..services.references import ReferenceResolver
+from ..utils.pagination import KeysetPage
 from ..utils.resultCode import ResultCode
 
 router = APIRouter(prefix="/fridge", tags=["Fridge"])
@@ -29,25 +34,14 @@ router = APIRouter(prefix="/fridge", tags=["Fridge"])
 )
 def create_fridge_item(
     request: CreateFridgeItemRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     food = (
         db.query(Food)
         .filter(
             Food.id == request.food_id,
-            Food.group_id == group_member.group_id,
+            Food.group_id == context.group_id,
         )
         .first()
     )
@@ -59,7 +53,7 @@ def create_fridge_item(
 
     new_fridge_item = FridgeItem(
         food_id=request.food_id,
-        group_id=group_member.group_id,
+        group_id=context.group_id,
         quantity=request.quantity,
         unit_id=request.unit_id,
         note=request.note,
@@ -69,14 +63,17 @@ def create_fridge_item(
         is_opened=request.is_opened,
         opened_at=request.opened_at,
         cost=request.cost,
-        created_by=current_user.id,
+        created_by=context.user_id,
     )
 
     db.add(new_fridge_item)
     db.commit()
+    cache.bump_group_data_version(context.group_id)
     db.refresh(new_fridge_item)
 
-    fridge_item_data = _build_fridge_item_data(db, new_fridge_item)
+    fridge_item_data = _build_fridge_item_data(
+        new_fridge_item, ReferenceResolver.load(db, [new_fridge_item])
+    )
 
     return CreateFridgeItemResponse(
         fridge_item=fridge_item_data,
@@ -89,29 +86,26 @@ def create_fridge_item(
 
 
 @router.get("/", response_model=GetFridgeItemsResponse)
-def get_fridge_items(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_fridge_items(
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1),
+    context: GroupContext = Depends(get_group_context_async),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
+    page = KeysetPage(
+        (FridgeItem.use_within_date, FridgeItem.id), cursor=cursor, limit=limit
     )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
-    fridge_items = (
-        db.query(FridgeItem).filter(FridgeItem.group_id == group_member.group_id).all()
+    result = await db.execute(
+        page.apply(select(FridgeItem).where(FridgeItem.group_id == context.group_id))
     )
+    fridge_items, next_cursor = page.page(result.scalars().all())
 
-    fridge_items_data = [_build_fridge_item_data(db, item) for item in fridge_items]
+    refs = await ReferenceResolver.load_async(db, fridge_items)
+    fridge_items_data = [_build_fridge_item_data(item, refs) for item in fridge_items]
 
     return GetFridgeItemsResponse(
         fridge_items=fridge_items_data,
+        nextCursor=next_cursor,
         resultCode=ResultCode.SUCCESS_FRIDGE_LIST_FETCHED.value[0],
         resultMessage=ResultMessage(
             en="Fridge items fetched successfully",
@@ -123,20 +117,9 @@ def get_fridge_items(
 @router.post("/id/", response_model=GetFridgeItemByIdResponse)
 def get_fridge_item_by_id(
     request: GetFridgeItemByIdRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     fridge_item = db.query(FridgeItem).filter(FridgeItem.id == request.id).first()
     if not fridge_item:
         raise HTTPException(
@@ -144,13 +127,15 @@ def get_fridge_item_by_id(
             detail="Fridge item not found",
         )
 
-    if fridge_item.group_id != group_member.group_id:
+    if fridge_item.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this fridge item",
         )
 
-    fridge_item_data = _build_fridge_item_data(db, fridge_item)
+    fridge_item_data = _build_fridge_item_data(
+        fridge_item, ReferenceResolver.load(db, [fridge_item])
+    )
 
     return GetFridgeItemByIdResponse(
         fridge_item=fridge_item_data,
@@ -165,20 +150,9 @@ def get_fridge_item_by_id(
 @router.put("/", response_model=UpdateFridgeItemResponse)
 def update_fridge_item(
     request: UpdateFridgeItemRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     fridge_item = db.query(FridgeItem).filter(FridgeItem.id == request.id).first()
     if not fridge_item:
         raise HTTPException(
@@ -186,7 +160,7 @@ def update_fridge_item(
             detail="Fridge item not found",
         )
 
-    if fridge_item.group_id != group_member.group_id:
+    if fridge_item.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this fridge item",
@@ -220,9 +194,12 @@ def update_fridge_item(
         fridge_item.cost = request.cost
 
     db.commit()
+    cache.bump_group_data_version(context.group_id)
     db.refresh(fridge_item)
 
-    fridge_item_data = _build_fridge_item_data(db, fridge_item)
+    fridge_item_data = _build_fridge_item_data(
+        fridge_item, ReferenceResolver.load(db, [fridge_item])
+    )
 
     return UpdateFridgeItemResponse(
         fridge_item=fridge_item_data,
@@ -237,20 +214,9 @@ def update_fridge_item(
 @router.delete("/", response_model=DeleteFridgeItemResponse)
 def delete_fridge_item(
     request: DeleteFridgeItemRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     fridge_item = db.query(FridgeItem).filter(FridgeItem.id == request.id).first()
     if not fridge_item:
         raise HTTPException(
@@ -258,7 +224,7 @@ def delete_fridge_item(
             detail="Fridge item not found",
         )
 
-    if fridge_item.group_id != group_member.group_id:
+    if fridge_item.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this fridge item",
@@ -266,6 +232,7 @@ def delete_fridge_item(
 
     db.delete(fridge_item)
     db.commit()
+    cache.bump_group_data_version(context.group_id)
 
     return DeleteFridgeItemResponse(
         resultCode=ResultCode.SUCCESS_FRIDGE_ITEM_DELETED.value[0],
@@ -276,30 +243,17 @@ def delete_fridge_item(
     )
 
 
-def _build_fridge_item_data(db: Session, fridge_item: FridgeItem) -> FridgeItemData:
-    food = db.query(Food).filter(Food.id == fridge_item.food_id).first()
-    food_name = food.name if food else "Unknown"
-
-    unit_name = None
-    if fridge_item.unit_id:
-        unit = db.query(Unit).filter(Unit.id == fridge_item.unit_id).first()
-        unit_name = unit.name if unit else None
-
-    # Resolve creator username
-    created_by_username = None
-    if fridge_item.created_by:
-        creator = db.query(User).filter(User.id == fridge_item.created_by).first()
-        if creator:
-            created_by_username = creator.username
-
+def _build_fridge_item_data(
+    fridge_item: FridgeItem, refs: ReferenceResolver
+) -> FridgeItemData:
     return FridgeItemData(
         id=fridge_item.id,
         food_id=fridge_item.food_id,
-        food_name=food_name,
+        food_name=refs.food_name(fridge_item.food_id) or "Unknown",
         group_id=fridge_item.group_id,
         quantity=fridge_item.quantity,
         unit_id=fridge_item.unit_id,
-        unit_name=unit_name,
+        unit_name=refs.unit_name(fridge_item.unit_id),
         note=fridge_item.note,
         purchase_date=fridge_item.purchase_date,
         use_within_date=fridge_item.use_within_date,
@@ -308,7 +262,7 @@ def _build_fridge_item_data(db: Session, fridge_item: FridgeItem) -> FridgeItemD
         opened_at=fridge_item.opened_at,
         cost=fridge_item.cost,
         created_by=fridge_item.created_by,
-        created_by_username=created_by_username,
+        created_by_username=refs.username(fridge_item.created_by),
         created_at=fridge_item.created_at,
         updated_at=fridge_item.updated_at,
     )
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
+from ..core import cache
+from ..core.database import get_db, get_read_db
 from ..core.deps import get_current_user
 from ..models import Group, GroupMember, User
 from ..schemas.base import ResultMessage
@@ -126,6 +127,7 @@ def remove_member(
 
     db.delete(target_member)
     db.commit()
+    cache.invalidate_group_context(user_id)
 
     return RemoveMemberResponse(
         resultMessage=ResultMessage(
@@ -139,7 +141,7 @@ def remove_member(
 def get_group_members(
     group_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
 
     # Check if group exists
@@ -1,11 +1,13 @@
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
-from ..core.deps import get_current_user
-from ..models import Food, GroupMember, MealPlan, Unit, User
+from ..core.database import get_async_read_db, get_db
+from ..core.deps import GroupContext, get_group_context, get_group_context_async
+from ..models import Food, MealPlan, Unit
 from ..schemas.base import ResultMessage
 from ..schemas.meal_plan import (
     CreateMealPlanRequest,
@@ -20,6 +22,8 @@ from ..schemas.meal_plan import (
     UpdateMealPlanRequest,
     UpdateMealPlanResponse,
 )
+from ..services.references import ReferenceResolver
+from ..utils.pagination import KeysetPage
 from ..utils.resultCode import ResultCode
 
 router = APIRouter(prefix="/meal-plans", tags=["Meal Plans"])
@@ -30,22 +34,9 @@ router = APIRouter(prefix="/meal-plans", tags=["Meal Plans"])
 )
 def create_meal_plan(
     request: CreateMealPlanRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(
-            GroupMember.user_id == current_user.id, GroupMember.is_active == True
-        )
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     meal_type_lower = request.meal_type.lower()
     if meal_type_lower not in ["breakfast", "lunch", "dinner", "snack"]:
         raise HTTPException(
@@ -58,7 +49,7 @@ def create_meal_plan(
         db.query(Food)
         .filter(
             Food.id == request.food_id,
-            Food.group_id == group_member.group_id,
+            Food.group_id == context.group_id,
         )
         .first()
     )
@@ -91,21 +82,23 @@ def create_meal_plan(
 
     new_meal_plan = MealPlan(
         food_id=request.food_id,
-        group_id=group_member.group_id,
+        group_id=context.group_id,
         meal_type=meal_type_lower,
         meal_date=request.meal_date,
         serving_size=serving_size_decimal,
         unit_id=request.unit_id,
         note=request.note,
         is_prepared=request.is_prepared,
-        created_by=current_user.id,
+        created_by=context.user_id,
     )
 
     db.add(new_meal_plan)
     db.commit()
     db.refresh(new_meal_plan)
 
-    meal_plan_data = _build_meal_plan_data(db, new_meal_plan)
+    meal_plan_data = _build_meal_plan_data(
+        new_meal_plan, ReferenceResolver.load(db, [new_meal_plan])
+    )
 
     return CreateMealPlanResponse(
         meal_plan=meal_plan_data,
@@ -118,49 +111,42 @@ def create_meal_plan(
 
 
 @router.get("/", response_model=GetMealPlansResponse)
-def get_meal_plans(
+async def get_meal_plans(
     start_date: str | None = None,
     end_date: str | None = None,
     meal_type: str | None = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1),
+    context: GroupContext = Depends(get_group_context_async),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(
-            GroupMember.user_id == current_user.id, GroupMember.is_active == True
-        )
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
-    query = db.query(MealPlan).filter(MealPlan.group_id == group_member.group_id)
+    page = KeysetPage((MealPlan.meal_date, MealPlan.id), cursor=cursor, limit=limit)
+    query = select(MealPlan).where(MealPlan.group_id == context.group_id)
 
     if start_date:
         from datetime import date as date_type
         start = date_type.fromisoformat(start_date)
-        query = query.filter(MealPlan.meal_date >= start)
+        query = query.where(MealPlan.meal_date >= start)
 
     if end_date:
         from datetime import date as date_type
         end = date_type.fromisoformat(end_date)
-        query = query.filter(MealPlan.meal_date <= end)
+        query = query.where(MealPlan.meal_date <= end)
 
     if meal_type:
         meal_type_lower = meal_type.lower()
         if meal_type_lower in ["breakfast", "lunch", "dinner", "snack"]:
-            query = query.filter(MealPlan.meal_type == meal_type_lower)
+            query = query.where(MealPlan.meal_type == meal_type_lower)
 
-    meal_plans = query.all()
+    result = await db.execute(page.apply(query))
+    meal_plans, next_cursor = page.page(result.scalars().all())
 
-    meal_plans_data = [_build_meal_plan_data(db, mp) for mp in meal_plans]
+    refs = await ReferenceResolver.load_async(db, meal_plans)
+    meal_plans_data = [_build_meal_plan_data(mp, refs) for mp in meal_plans]
 
     return GetMealPlansResponse(
         meal_plans=meal_plans_data,
+        nextCursor=next_cursor,
         resultCode=ResultCode.SUCCESS_MEAL_PLAN_LIST_FETCHED.value[0],
         resultMessage=ResultMessage(
             en="Meal plans fetched successfully",
@@ -172,22 +158,9 @@ def get_meal_plans(
 @router.post("/id/", response_model=GetMealPlanByIdResponse)
 def get_meal_plan_by_id(
     request: GetMealPlanByIdRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(
-            GroupMember.user_id == current_user.id, GroupMember.is_active == True
-        )
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     meal_plan = db.query(MealPlan).filter(MealPlan.id == request.meal_plan_id).first()
     if not meal_plan:
         raise HTTPException(
@@ -195,13 +168,15 @@ def get_meal_plan_by_id(
             detail="Meal plan not found",
         )
 
-    if meal_plan.group_id != group_member.group_id:
+    if meal_plan.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this meal plan",
         )
 
-    meal_plan_data = _build_meal_plan_data(db, meal_plan)
+    meal_plan_data = _build_meal_plan_data(
+        meal_plan, ReferenceResolver.load(db, [meal_plan])
+    )
 
     return GetMealPlanByIdResponse(
         meal_plan=meal_plan_data,
@@ -216,22 +191,9 @@ def get_meal_plan_by_id(
 @router.put("/", response_model=UpdateMealPlanResponse)
 def update_meal_plan(
     request: UpdateMealPlanRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(
-            GroupMember.user_id == current_user.id, GroupMember.is_active == True
-        )
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     meal_plan = db.query(MealPlan).filter(MealPlan.id == request.meal_plan_id).first()
     if not meal_plan:
         raise HTTPException(
@@ -239,7 +201,7 @@ def update_meal_plan(
             detail="Meal plan not found",
         )
 
-    if meal_plan.group_id != group_member.group_id:
+    if meal_plan.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this meal plan",
@@ -251,7 +213,7 @@ def update_meal_plan(
             db.query(Food)
             .filter(
                 Food.id == request.food_id,
-                Food.group_id == group_member.group_id
+                Food.group_id == context.group_id
             )
             .first()
         )
@@ -307,7 +269,9 @@ def update_meal_plan(
     db.commit()
     db.refresh(meal_plan)
 
-    meal_plan_data = _build_meal_plan_data(db, meal_plan)
+    meal_plan_data = _build_meal_plan_data(
+        meal_plan, ReferenceResolver.load(db, [meal_plan])
+    )
 
     return UpdateMealPlanResponse(
         meal_plan=meal_plan_data,
@@ -322,22 +286,9 @@ def update_meal_plan(
 @router.delete("/", response_model=DeleteMealPlanResponse)
 def delete_meal_plan(
     request: DeleteMealPlanRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(
-            GroupMember.user_id == current_user.id, GroupMember.is_active == True
-        )
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     meal_plan = db.query(MealPlan).filter(MealPlan.id == request.meal_plan_id).first()
     if not meal_plan:
         raise HTTPException(
@@ -345,7 +296,7 @@ def delete_meal_plan(
             detail="Meal plan not found",
         )
 
-    if meal_plan.group_id != group_member.group_id:
+    if meal_plan.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this meal plan",
@@ -363,37 +314,24 @@ def delete_meal_plan(
     )
 
 
-def _build_meal_plan_data(db: Session, meal_plan: MealPlan) -> MealPlanData:
-    food = db.query(Food).filter(Food.id == meal_plan.food_id).first()
-    food_name = food.name if food else "Unknown"
-
-    unit_name = None
-    if meal_plan.unit_id:
-        unit = db.query(Unit).filter(Unit.id == meal_plan.unit_id).first()
-        unit_name = unit.name if unit else None
-
-    # Resolve creator username
-    created_by_username = None
-    if meal_plan.created_by:
-        creator = db.query(User).filter(User.id == meal_plan.created_by).first()
-        if creator:
-            created_by_username = creator.username
-
+def _build_meal_plan_data(
+    meal_plan: MealPlan, refs: ReferenceResolver
+) -> MealPlanData:
     return MealPlanData(
         id=meal_plan.id,
         food_id=meal_plan.food_id,
-        food_name=food_name,
+        food_name=refs.food_name(meal_plan.food_id) or "Unknown",
         group_id=meal_plan.group_id,
         meal_type=meal_plan.meal_type,
         meal_date=meal_plan.meal_date,
         serving_size=meal_plan.serving_size,
         unit_id=meal_plan.unit_id,
-        unit_name=unit_name,
+        unit_name=refs.unit_name(meal_plan.unit_id),
         note=meal_plan.note,
         is_prepared=meal_plan.is_prepared,
         prepared_at=meal_plan.prepared_at,
         created_by=meal_plan.created_by,
-        created_by_username=created_by_username,
+        created_by_username=refs.username(meal_plan.created_by),
         created_at=meal_plan.created_at,
         updated_at=meal_plan.updated_at,
     )
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    UploadFile,
+    status,
+)
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..core import storage
-from ..core.database import get_db
-from ..core.deps import get_current_user
-from ..models import Food, GroupMember, Recipe, User
+from ..core.database import get_async_read_db, get_db
+from ..core.deps import GroupContext, get_group_context, get_group_context_async
+from ..models import Food, Recipe
 from ..schemas.base import ResultMessage
 from ..schemas.recipe import (
     CreateRecipeResponse,
@@ -16,6 +27,8 @@ from ..schemas.recipe import (
     RecipeData,
     UpdateRecipeResponse,
 )
+from ..services.references import ReferenceResolver
+from ..utils.pagination import KeysetPage
 from ..utils.resultCode import ResultCode
 
 router = APIRouter(prefix="/recipes", tags=["Recipes"])
@@ -35,68 +48,58 @@ def create_recipe(
     difficulty: str | None = Form(None),
     is_public: bool = Form(False, alias="isPublic"),
     file: UploadFile = File(None),
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     if difficulty and difficulty not in ["easy", "medium", "hard"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Difficulty must be easy, medium, or hard",
         )
 
-    food_id = None
-    if food_name:
-        food = (
-            db.query(Food)
-            .filter(
-                Food.name == food_name,
-                Food.group_id == group_member.group_id,
+    # Stored under a fresh name before the recipe row exists, so no
+    # transaction is held open while the image streams in
+    image_url = _upload_image(db, file) if file else None
+
+    try:
+        food_id = None
+        if food_name:
+            food = (
+                db.query(Food)
+                .filter(
+                    Food.name == food_name,
+                    Food.group_id == context.group_id,
+                )
+                .first()
             )
-            .first()
+            if food:
+                food_id = food.id
+
+        new_recipe = Recipe(
+            name=name,
+            description=description,
+            html_content=html_content,
+            food_id=food_id,
+            group_id=context.group_id,
+            prep_time_minutes=prep_time_minutes,
+            cook_time_minutes=cook_time_minutes,
+            servings=servings,
+            difficulty=difficulty,
+            is_public=is_public,
+            image_url=image_url,
+            created_by=context.user_id,
         )
-        if food:
-            food_id = food.id
-
-    new_recipe = Recipe(
-        name=name,
-        description=description,
-        html_content=html_content,
-        food_id=food_id,
-        group_id=group_member.group_id,
-        prep_time_minutes=prep_time_minutes,
-        cook_time_minutes=cook_time_minutes,
-        servings=servings,
-        difficulty=difficulty,
-        is_public=is_public,
-        created_by=current_user.id,
-    )
 
-    db.add(new_recipe)
-    db.commit()
+        db.add(new_recipe)
+        db.commit()
+    except Exception:
+        _discard_image(image_url)
+        raise
     db.refresh(new_recipe)
 
-    if file:
-        client = storage.get_minio_client()
-        upload_response = storage.upload_file(
-            client, file, f"recipes/{new_recipe.id}", None
-        )
-        if upload_response:
-            new_recipe.image_url = upload_response["public_url"]
-            db.commit()
-            db.refresh(new_recipe)
-
-    recipe_data = _build_recipe_data(db, new_recipe)
+    recipe_data = _build_recipe_data(
+        new_recipe, ReferenceResolver.load(db, [new_recipe], resolve_users=False)
+    )
 
     return CreateRecipeResponse(
         recipe=recipe_data,
@@ -109,27 +112,26 @@ def create_recipe(
 
 
 @router.get("/", response_model=GetRecipesResponse)
-def get_recipes(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_recipes(
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1),
+    context: GroupContext = Depends(get_group_context_async),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
+    page = KeysetPage(
+        (Recipe.created_at, Recipe.id), cursor=cursor, limit=limit, descending=True
     )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
-    recipes = db.query(Recipe).filter(Recipe.group_id == group_member.group_id).all()
+    result = await db.execute(
+        page.apply(select(Recipe).where(Recipe.group_id == context.group_id))
+    )
+    recipes, next_cursor = page.page(result.scalars().all())
 
-    recipes_data = [_build_recipe_data(db, recipe) for recipe in recipes]
+    refs = await ReferenceResolver.load_async(db, recipes, resolve_users=False)
+    recipes_data = [_build_recipe_data(recipe, refs) for recipe in recipes]
 
     return GetRecipesResponse(
         recipes=recipes_data,
+        nextCursor=next_cursor,
         resultCode=ResultCode.SUCCESS_RECIPE_LIST_FETCHED.value[0],
         resultMessage=ResultMessage(
             en="Recipes fetched successfully",
@@ -141,20 +143,9 @@ def get_recipes(
 @router.post("/id/", response_model=GetRecipeByIdResponse)
 def get_recipe_by_id(
     request: GetRecipeByIdRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     recipe = db.query(Recipe).filter(Recipe.id == request.id).first()
     if not recipe:
         raise HTTPException(
@@ -162,13 +153,15 @@ def get_recipe_by_id(
             detail="Recipe not found",
         )
 
-    if recipe.group_id != group_member.group_id:
+    if recipe.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this recipe",
         )
 
-    recipe_data = _build_recipe_data(db, recipe)
+    recipe_data = _build_recipe_data(
+        recipe, ReferenceResolver.load(db, [recipe], resolve_users=False)
+    )
 
     return GetRecipeByIdResponse(
         recipe=recipe_data,
@@ -192,18 +185,13 @@ def update_recipe(
     new_servings: int | None = Form(None, alias="newServings"),
     new_difficulty: str | None = Form(None, alias="newDifficulty"),
     file: UploadFile = File(None),
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
+    if new_difficulty is not None and new_difficulty not in ["easy", "medium", "hard"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
+            detail="Difficulty must be easy, medium, or hard",
         )
 
     recipe = db.query(Recipe).filter(Recipe.id == id).first()
@@ -213,62 +201,65 @@ def update_recipe(
             detail="Recipe not found",
         )
 
-    if recipe.group_id != group_member.group_id:
+    if recipe.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this recipe",
         )
 
-    if new_name is not None:
-        recipe.name = new_name
+    old_image_url = recipe.image_url
+    image_url = _upload_image(db, file) if file else None
+
+    try:
+        if new_name is not None:
+            recipe.name = new_name
 
-    if new_description is not None:
-        recipe.description = new_description
+        if new_description is not None:
+            recipe.description = new_description
 
-    if new_html_content is not None:
-        recipe.html_content = new_html_content
+        if new_html_content is not None:
+            recipe.html_content = new_html_content
 
-    if new_food_name is not None:
-        food = (
-            db.query(Food)
-            .filter(
-                Food.name == new_food_name,
-                Food.group_id == group_member.group_id,
+        if new_food_name is not None:
+            food = (
+                db.query(Food)
+                .filter(
+                    Food.name == new_food_name,
+                    Food.group_id == context.group_id,
+                )
+                .first()
             )
-            .first()
-        )
-        if food:
-            recipe.food_id = food.id
+            if food:
+                recipe.food_id = food.id
 
-    if new_prep_time_minutes is not None:
-        recipe.prep_time_minutes = new_prep_time_minutes
+        if new_prep_time_minutes is not None:
+            recipe.prep_time_minutes = new_prep_time_minutes
 
-    if new_cook_time_minutes is not None:
-        recipe.cook_time_minutes = new_cook_time_minutes
+        if new_cook_time_minutes is not None:
+            recipe.cook_time_minutes = new_cook_time_minutes
 
-    if new_servings is not None:
-        recipe.servings = new_servings
+        if new_servings is not None:
+            recipe.servings = new_servings
 
-    if new_difficulty is not None:
-        if new_difficulty not in ["easy", "medium", "hard"]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Difficulty must be easy, medium, or hard",
-            )
-        recipe.difficulty = new_difficulty
+        if new_difficulty is not None:
+            recipe.difficulty = new_difficulty
 
-    if file:
-        client = storage.get_minio_client()
-        upload_response = storage.upload_file(
-            client, file, f"recipes/{recipe.id}", recipe.image_url
-        )
-        if upload_response:
-            recipe.image_url = upload_response["public_url"]
+        if image_url:
+            recipe.image_url = image_url
 
-    db.commit()
+        db.commit()
+    except Exception:
+        _discard_image(image_url)
+        raise
+
+    # The replaced image goes only once the row no longer points at it
+    if image_url and old_image_url:
+        storage.delete_url(storage.get_minio_client(), old_image_url)
     db.refresh(recipe)
 
-    recipe_data = _build_recipe_data(db, recipe)
+    recipe_data = _build_recipe_data(
+        recipe, ReferenceResolver.load(db, [recipe], resolve_users=False)
+    )
 
     return UpdateRecipeResponse(
         recipe=recipe_data,
@@ -283,20 +274,9 @@ def update_recipe(
 @router.delete("/", response_model=DeleteRecipeResponse)
 def delete_recipe(
     request: DeleteRecipeRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     recipe = db.query(Recipe).filter(Recipe.id == request.id).first()
     if not recipe:
         raise HTTPException(
@@ -304,7 +284,7 @@ def delete_recipe(
             detail="Recipe not found",
         )
 
-    if recipe.group_id != group_member.group_id:
+    if recipe.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this recipe",
@@ -322,19 +302,33 @@ def delete_recipe(
     )
 
 
-def _build_recipe_data(db: Session, recipe: Recipe) -> RecipeData:
-    food_name = None
-    if recipe.food_id:
-        food = db.query(Food).filter(Food.id == recipe.food_id).first()
-        food_name = food.name if food else None
+def _upload_image(db: Session, file: UploadFile) -> str | None:
+    """Store a recipe image and return its public URL, or None on failure.
+
+    Ends the session's transaction first (only reads have run so far), so
+    its pooled connection is not held while the image streams to MinIO.
+    """
+    db.rollback()
+    upload_response = storage.upload_file(
+        storage.get_minio_client(), file, "recipes", None
+    )
+    return upload_response["public_url"] if upload_response else None
+
+
+def _discard_image(image_url: str | None) -> None:
+    """Delete an uploaded image whose recipe row was never saved."""
+    if image_url:
+        storage.delete_url(storage.get_minio_client(), image_url)
+
 
+def _build_recipe_data(recipe: Recipe, refs: ReferenceResolver) -> RecipeData:
     return RecipeData(
         id=recipe.id,
         name=recipe.name,
         description=recipe.description,
         html_content=recipe.html_content,
         food_id=recipe.food_id,
-        food_name=food_name,
+        food_name=refs.food_name(recipe.food_id),
         group_id=recipe.group_id,
         prep_time_minutes=recipe.prep_time_minutes,
         cook_time_minutes=recipe.cook_time_minutes,
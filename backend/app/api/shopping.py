@@ -1,14 +1,21 @@
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
-from ..core.deps import get_current_user
-from ..models import Food, GroupMember, ShoppingList, ShoppingTask, Unit, User
+from ..core import cache
+from ..core.database import get_async_read_db, get_db
+from ..core.deps import GroupContext, get_group_context, get_group_context_async
+from ..models import Food, GroupMember, ShoppingList, ShoppingTask, User
 from ..schemas.base import ResultMessage
 from ..schemas.shopping import (
+    BulkUpdateShoppingTasksRequest,
+    BulkUpdateShoppingTasksResponse,
+    CompleteShoppingListRequest,
+    CompleteShoppingListResponse,
     CreateShoppingListRequest,
     CreateShoppingListResponse,
     CreateShoppingTasksRequest,
@@ -27,8 +34,27 @@ from ..schemas.shopping import (
     UpdateShoppingTaskRequest,
     UpdateShoppingTaskResponse,
 )
+from ..services.analytics import (
+    list_spending,
+    remove_list_spending,
+    rollup_day,
+    shift_category_spending,
+    shift_daily_spending,
+)
+from ..services.references import ReferenceResolver
+from ..services.shopping import (
+    apply_total_cost_delta,
+    bulk_update_tasks,
+    effective_cost,
+    lock_task_costs,
+    stock_fridge_from_list,
+)
+from ..utils.pagination import KeysetPage
 from ..utils.resultCode import ResultCode
 
+# Rows per multi-row INSERT when adding tasks in bulk
+TASK_INSERT_BATCH_SIZE = 500
+
 router = APIRouter(prefix="/shopping", tags=["Shopping"])
 
 
@@ -39,20 +65,9 @@ router = APIRouter(prefix="/shopping", tags=["Shopping"])
 )
 def create_shopping_list(
     request: CreateShoppingListRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     if request.priority not in ["low", "medium", "high"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -73,7 +88,7 @@ def create_shopping_list(
             db.query(GroupMember)
             .filter(
                 GroupMember.user_id == assign_to_user.id,
-                GroupMember.group_id == group_member.group_id,
+                GroupMember.group_id == context.group_id,
                 GroupMember.is_active == True,
             )
             .first()
@@ -88,7 +103,7 @@ def create_shopping_list(
     new_list = ShoppingList(
         name=request.name,
         description=request.description,
-        group_id=group_member.group_id,
+        group_id=context.group_id,
         assign_to_user_id=assign_to_user_id,
         due_date=request.due_date,
         priority=request.priority,
@@ -96,14 +111,17 @@ def create_shopping_list(
         budget=request.budget,
         total_cost=Decimal("0"),
         is_archived=False,
-        created_by=current_user.id,
+        created_by=context.user_id,
     )
 
     db.add(new_list)
     db.commit()
+    cache.bump_group_data_version(context.group_id)
     db.refresh(new_list)
 
-    list_data = _build_shopping_list_data(db, new_list)
+    list_data = _build_shopping_list_data(
+        new_list, ReferenceResolver.load(db, [new_list])
+    )
 
     return CreateShoppingListResponse(
         shopping_list=list_data,
@@ -116,31 +134,31 @@ def create_shopping_list(
 
 
 @router.get("/list/", response_model=GetShoppingListsResponse)
-def get_shopping_lists(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+async def get_shopping_lists(
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1),
+    context: GroupContext = Depends(get_group_context_async),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
+    page = KeysetPage(
+        (ShoppingList.created_at, ShoppingList.id),
+        cursor=cursor,
+        limit=limit,
+        descending=True,
     )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
+    result = await db.execute(
+        page.apply(
+            select(ShoppingList).where(ShoppingList.group_id == context.group_id)
         )
-
-    shopping_lists = (
-        db.query(ShoppingList)
-        .filter(ShoppingList.group_id == group_member.group_id)
-        .all()
     )
+    shopping_lists, next_cursor = page.page(result.scalars().all())
 
-    lists_data = [_build_shopping_list_data(db, lst) for lst in shopping_lists]
+    refs = await ReferenceResolver.load_async(db, shopping_lists)
+    lists_data = [_build_shopping_list_data(lst, refs) for lst in shopping_lists]
 
     return GetShoppingListsResponse(
         shopping_lists=lists_data,
+        nextCursor=next_cursor,
         resultCode=ResultCode.SUCCESS_TASK_LIST_FETCHED.value[0],
         resultMessage=ResultMessage(
             en="Shopping lists fetched successfully",
@@ -152,20 +170,9 @@ def get_shopping_lists(
 @router.post("/list/id/", response_model=GetShoppingListByIdResponse)
 def get_shopping_list_by_id(
     request: GetShoppingListByIdRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     shopping_list = db.query(ShoppingList).filter(ShoppingList.id == request.id).first()
     if not shopping_list:
         raise HTTPException(
@@ -173,18 +180,18 @@ def get_shopping_list_by_id(
             detail="Shopping list not found",
         )
 
-    if shopping_list.group_id != group_member.group_id:
+    if shopping_list.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this shopping list",
         )
 
-    list_data = _build_shopping_list_data(db, shopping_list)
-
     tasks = (
         db.query(ShoppingTask).filter(ShoppingTask.list_id == shopping_list.id).all()
     )
-    tasks_data = [_build_shopping_task_data(db, task) for task in tasks]
+    refs = ReferenceResolver.load(db, [shopping_list, *tasks])
+    list_data = _build_shopping_list_data(shopping_list, refs)
+    tasks_data = [_build_shopping_task_data(task, refs) for task in tasks]
 
     return GetShoppingListByIdResponse(
         shopping_list=list_data,
@@ -200,33 +207,30 @@ def get_shopping_list_by_id(
 @router.put("/list/", response_model=UpdateShoppingListResponse)
 def update_shopping_list(
     request: UpdateShoppingListRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
+    # Row lock so the spending rollups see the total_cost this change commits
+    shopping_list = (
+        db.query(ShoppingList)
+        .filter(ShoppingList.id == request.id)
+        .with_for_update()
         .first()
     )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
-    shopping_list = db.query(ShoppingList).filter(ShoppingList.id == request.id).first()
     if not shopping_list:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Shopping list not found",
         )
 
-    if shopping_list.group_id != group_member.group_id:
+    if shopping_list.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this shopping list",
         )
 
+    old_spend, old_budget, old_lists = list_spending(shopping_list)
+
     if request.new_name is not None:
         shopping_list.name = request.new_name
 
@@ -265,10 +269,22 @@ def update_shopping_list(
     if request.new_budget is not None:
         shopping_list.budget = request.new_budget
 
+    new_spend, new_budget, new_lists = list_spending(shopping_list)
+    shift_daily_spending(
+        db,
+        shopping_list.group_id,
+        rollup_day(shopping_list.created_at),
+        new_spend - old_spend,
+        new_budget - old_budget,
+        new_lists - old_lists,
+    )
     db.commit()
+    cache.bump_group_data_version(context.group_id)
     db.refresh(shopping_list)
 
-    list_data = _build_shopping_list_data(db, shopping_list)
+    list_data = _build_shopping_list_data(
+        shopping_list, ReferenceResolver.load(db, [shopping_list])
+    )
 
     return UpdateShoppingListResponse(
         shopping_list=list_data,
@@ -280,38 +296,101 @@ def update_shopping_list(
     )
 
 
-@router.delete("/list/", response_model=DeleteShoppingListResponse)
-def delete_shopping_list(
-    request: DeleteShoppingListRequest,
-    current_user: User = Depends(get_current_user),
+@router.post("/list/complete/", response_model=CompleteShoppingListResponse)
+def complete_shopping_list(
+    request: CompleteShoppingListRequest,
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
+    # Row lock so two concurrent completions cannot stock the fridge twice
+    shopping_list = (
+        db.query(ShoppingList)
+        .filter(ShoppingList.id == request.id)
+        .with_for_update()
         .first()
     )
-    if not group_member:
+    if not shopping_list:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shopping list not found",
+        )
+
+    if shopping_list.group_id != context.group_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this shopping list",
+        )
+
+    if shopping_list.status == "completed":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
+            detail="Shopping list is already completed",
         )
 
-    shopping_list = db.query(ShoppingList).filter(ShoppingList.id == request.id).first()
+    fridge_items_added = stock_fridge_from_list(
+        db,
+        shopping_list,
+        context.user_id,
+        request.purchase_date or date.today(),
+        request.location,
+    )
+    shopping_list.status = "completed"
+    spend, budget, lists = list_spending(shopping_list)
+    shift_daily_spending(
+        db,
+        shopping_list.group_id,
+        rollup_day(shopping_list.created_at),
+        spend,
+        budget,
+        lists,
+    )
+    db.commit()
+    cache.bump_group_data_version(context.group_id)
+    db.refresh(shopping_list)
+
+    list_data = _build_shopping_list_data(
+        shopping_list, ReferenceResolver.load(db, [shopping_list])
+    )
+
+    return CompleteShoppingListResponse(
+        shopping_list=list_data,
+        fridgeItemsAdded=fridge_items_added,
+        resultCode=ResultCode.SUCCESS_SHOPPING_LIST_UPDATED.value[0],
+        resultMessage=ResultMessage(
+            en="Shopping list completed and fridge stocked successfully",
+            vn=ResultCode.SUCCESS_SHOPPING_LIST_UPDATED.value[1],
+        ),
+    )
+
+
+@router.delete("/list/", response_model=DeleteShoppingListResponse)
+def delete_shopping_list(
+    request: DeleteShoppingListRequest,
+    context: GroupContext = Depends(get_group_context),
+    db: Session = Depends(get_db),
+):
+    shopping_list = (
+        db.query(ShoppingList)
+        .filter(ShoppingList.id == request.id)
+        .with_for_update()
+        .first()
+    )
     if not shopping_list:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Shopping list not found",
         )
 
-    if shopping_list.group_id != group_member.group_id:
+    if shopping_list.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this shopping list",
         )
 
+    remove_list_spending(db, shopping_list)
     db.delete(shopping_list)
     db.commit()
+    cache.bump_group_data_version(context.group_id)
 
     return DeleteShoppingListResponse(
         resultCode=ResultCode.SUCCESS_SHOPPING_LIST_DELETED.value[0],
@@ -329,20 +408,9 @@ def delete_shopping_list(
 )
 def add_tasks_to_list(
     request: CreateShoppingTasksRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
-    )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
     shopping_list = (
         db.query(ShoppingList).filter(ShoppingList.id == request.list_id).first()
     )
@@ -352,13 +420,12 @@ def add_tasks_to_list(
             detail="Shopping list not found",
         )
 
-    if shopping_list.group_id != group_member.group_id:
+    if shopping_list.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this shopping list",
         )
 
-    created_tasks = []
     for task_input in request.tasks:
         if task_input.priority not in ["low", "medium", "high"]:
             raise HTTPException(
@@ -366,39 +433,65 @@ def add_tasks_to_list(
                 detail="Priority must be low, medium, or high",
             )
 
-        food = (
-            db.query(Food)
-            .filter(
-                Food.id == task_input.food_id,
-                Food.group_id == group_member.group_id,
+    food_ids = {task_input.food_id for task_input in request.tasks}
+    found_food_ids = set(
+        db.scalars(
+            select(Food.id).where(
+                Food.id.in_(food_ids),
+                Food.group_id == context.group_id,
             )
-            .first()
         )
-        if not food:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Food not found in group",
-            )
-
-        new_task = ShoppingTask(
-            list_id=shopping_list.id,
-            food_id=task_input.food_id,
-            quantity=task_input.quantity,
-            unit_id=task_input.unit_id,
-            note=task_input.note,
-            estimated_cost=task_input.estimated_cost,
-            priority=task_input.priority,
-            is_done=False,
+    )
+    if found_food_ids != food_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Food not found in group",
         )
 
-        db.add(new_task)
-        created_tasks.append(new_task)
+    # Multi-row INSERT ... RETURNING in batches instead of an INSERT and a
+    # refresh per task. RETURNING order is not guaranteed, so rows are put
+    # back in insertion order by id.
+    created_tasks = []
+    if request.tasks:
+        created_tasks = db.scalars(
+            insert(ShoppingTask)
+            .returning(ShoppingTask)
+            .execution_options(insertmanyvalues_page_size=TASK_INSERT_BATCH_SIZE),
+            [
+                {
+                    "list_id": shopping_list.id,
+                    "food_id": task_input.food_id,
+                    "quantity": task_input.quantity,
+                    "unit_id": task_input.unit_id,
+                    "note": task_input.note,
+                    "estimated_cost": task_input.estimated_cost,
+                    "priority": task_input.priority,
+                    "is_done": False,
+                }
+                for task_input in request.tasks
+            ],
+        ).all()
+        created_tasks.sort(key=lambda task: task.id)
+
+    apply_total_cost_delta(
+        db,
+        shopping_list.id,
+        sum(
+            effective_cost(task.actual_cost, task.estimated_cost)
+            for task in created_tasks
+        ),
+    )
+    shift_category_spending(
+        db,
+        shopping_list,
+        [(task.food_id, task.actual_cost or Decimal("0"), 1) for task in created_tasks],
+    )
 
+    # Serialize from the returned rows before commit expires them
+    refs = ReferenceResolver.load(db, created_tasks, resolve_users=False)
+    tasks_data = [_build_shopping_task_data(task, refs) for task in created_tasks]
     db.commit()
-    for task in created_tasks:
-        db.refresh(task)
-
-    tasks_data = [_build_shopping_task_data(db, task) for task in created_tasks]
+    cache.bump_group_data_version(context.group_id)
 
     return CreateShoppingTasksResponse(
         tasks=tasks_data,
@@ -413,21 +506,17 @@ def add_tasks_to_list(
 @router.put("/task/", response_model=UpdateShoppingTaskResponse)
 def update_shopping_task(
     request: UpdateShoppingTaskRequest,
-    current_user: User = Depends(get_current_user),
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
+    # Row lock so concurrent edits of this task compute their cost deltas
+    # from the value the other one committed
+    task = (
+        db.query(ShoppingTask)
+        .filter(ShoppingTask.id == request.task_id)
+        .with_for_update()
         .first()
     )
-    if not group_member:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
-        )
-
-    task = db.query(ShoppingTask).filter(ShoppingTask.id == request.task_id).first()
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -437,12 +526,15 @@ def update_shopping_task(
     shopping_list = (
         db.query(ShoppingList).filter(ShoppingList.id == task.list_id).first()
     )
-    if shopping_list.group_id != group_member.group_id:
+    if shopping_list.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this shopping task",
         )
 
+    old_cost = effective_cost(task.actual_cost, task.estimated_cost)
+    old_actual_cost = task.actual_cost or Decimal("0")
+
     if request.new_quantity is not None:
         task.quantity = request.new_quantity
 
@@ -459,17 +551,26 @@ def update_shopping_task(
         task.is_done = request.is_done
         if request.is_done:
             task.done_at = datetime.now()
-            task.done_by = current_user.id
+            task.done_by = context.user_id
         else:
             task.done_at = None
             task.done_by = None
 
+    apply_total_cost_delta(
+        db,
+        task.list_id,
+        effective_cost(task.actual_cost, task.estimated_cost) - old_cost,
+    )
+    shift_category_spending(
+        db,
+        shopping_list,
+        [(task.food_id, (task.actual_cost or Decimal("0")) - old_actual_cost, 0)],
+    )
     db.commit()
+    cache.bump_group_data_version(context.group_id)
     db.refresh(task)
 
-    _recalculate_total_cost(db, shopping_list)
-
-    task_data = _build_shopping_task_data(db, task)
+    task_data = _build_shopping_task_data(task, ReferenceResolver.load(db, [task]))
 
     return UpdateShoppingTaskResponse(
         task=task_data,
@@ -481,24 +582,105 @@ def update_shopping_task(
     )
 
 
-@router.delete("/task/", response_model=DeleteShoppingTaskResponse)
-def delete_shopping_task(
-    request: DeleteShoppingTaskRequest,
-    current_user: User = Depends(get_current_user),
+@router.put("/task/bulk/", response_model=BulkUpdateShoppingTasksResponse)
+def bulk_update_shopping_tasks(
+    request: BulkUpdateShoppingTasksRequest,
+    context: GroupContext = Depends(get_group_context),
     db: Session = Depends(get_db),
 ):
-    group_member = (
-        db.query(GroupMember)
-        .filter(GroupMember.user_id == current_user.id, GroupMember.is_active == True)
-        .first()
+    shopping_list = (
+        db.query(ShoppingList).filter(ShoppingList.id == request.list_id).first()
     )
-    if not group_member:
+    if not shopping_list:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shopping list not found",
+        )
+
+    if shopping_list.group_id != context.group_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied to this shopping list",
+        )
+
+    task_ids = [task_input.task_id for task_input in request.tasks]
+    if len(set(task_ids)) != len(task_ids):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User is not in any group",
+            detail="Each task may only appear once",
         )
 
-    task = db.query(ShoppingTask).filter(ShoppingTask.id == request.task_id).first()
+    # Row locks so concurrent edits compute their cost deltas from the
+    # values the other one committed
+    old_costs = lock_task_costs(db, shopping_list.id, task_ids)
+    if len(old_costs) != len(task_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shopping task not found in this list",
+        )
+
+    changed_tasks = bulk_update_tasks(
+        db,
+        shopping_list.id,
+        [
+            (task_input.task_id, task_input.is_done, task_input.actual_cost)
+            for task_input in request.tasks
+        ],
+        context.user_id,
+        datetime.now(),
+    )
+
+    apply_total_cost_delta(
+        db,
+        shopping_list.id,
+        sum(
+            effective_cost(task.actual_cost, task.estimated_cost)
+            - old_costs[task.id][0]
+            for task in changed_tasks
+        ),
+    )
+    shift_category_spending(
+        db,
+        shopping_list,
+        [
+            (
+                task.food_id,
+                (task.actual_cost or Decimal("0"))
+                - (old_costs[task.id][1] or Decimal("0")),
+                0,
+            )
+            for task in changed_tasks
+        ],
+    )
+
+    # Serialize from the returned rows before commit expires them
+    refs = ReferenceResolver.load(db, changed_tasks)
+    tasks_data = [_build_shopping_task_data(task, refs) for task in changed_tasks]
+    db.commit()
+    cache.bump_group_data_version(context.group_id)
+
+    return BulkUpdateShoppingTasksResponse(
+        tasks=tasks_data,
+        resultCode=ResultCode.SUCCESS_TASK_UPDATED.value[0],
+        resultMessage=ResultMessage(
+            en="Tasks updated successfully",
+            vn=ResultCode.SUCCESS_TASK_UPDATED.value[1],
+        ),
+    )
+
+
+@router.delete("/task/", response_model=DeleteShoppingTaskResponse)
+def delete_shopping_task(
+    request: DeleteShoppingTaskRequest,
+    context: GroupContext = Depends(get_group_context),
+    db: Session = Depends(get_db),
+):
+    task = (
+        db.query(ShoppingTask)
+        .filter(ShoppingTask.id == request.task_id)
+        .with_for_update()
+        .first()
+    )
     if not task:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -508,16 +690,21 @@ def delete_shopping_task(
     shopping_list = (
         db.query(ShoppingList).filter(ShoppingList.id == task.list_id).first()
     )
-    if shopping_list.group_id != group_member.group_id:
+    if shopping_list.group_id != context.group_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied to this shopping task",
         )
 
+    apply_total_cost_delta(
+        db, task.list_id, -effective_cost(task.actual_cost, task.estimated_cost)
+    )
+    shift_category_spending(
+        db, shopping_list, [(task.food_id, -(task.actual_cost or Decimal("0")), -1)]
+    )
     db.delete(task)
     db.commit()
-
-    _recalculate_total_cost(db, shopping_list)
+    cache.bump_group_data_version(context.group_id)
 
     return DeleteShoppingTaskResponse(
         resultCode=ResultCode.SUCCESS_TASK_DELETED.value[0],
@@ -529,30 +716,15 @@ def delete_shopping_task(
 
 
 def _build_shopping_list_data(
-    db: Session, shopping_list: ShoppingList
+    shopping_list: ShoppingList, refs: ReferenceResolver
 ) -> ShoppingListData:
-    assign_to_username = None
-    if shopping_list.assign_to_user_id:
-        assign_to_user = (
-            db.query(User).filter(User.id == shopping_list.assign_to_user_id).first()
-        )
-        if assign_to_user:
-            assign_to_username = assign_to_user.username
-
-    # Resolve creator username
-    created_by_username = None
-    if shopping_list.created_by:
-        creator = db.query(User).filter(User.id == shopping_list.created_by).first()
-        if creator:
-            created_by_username = creator.username
-
     return ShoppingListData(
         id=shopping_list.id,
         name=shopping_list.name,
         description=shopping_list.description,
         group_id=shopping_list.group_id,
         assign_to_user_id=shopping_list.assign_to_user_id,
-        assign_to_username=assign_to_username,
+        assign_to_username=refs.username(shopping_list.assign_to_user_id),
         due_date=shopping_list.due_date,
         priority=shopping_list.priority,
         status=shopping_list.status,
@@ -560,36 +732,23 @@ def _build_shopping_list_data(
         total_cost=shopping_list.total_cost,
         is_archived=shopping_list.is_archived,
         created_by=shopping_list.created_by,
-        created_by_username=created_by_username,
+        created_by_username=refs.username(shopping_list.created_by),
         created_at=shopping_list.created_at,
         updated_at=shopping_list.updated_at,
     )
 
 
-def _build_shopping_task_data(db: Session, task: ShoppingTask) -> ShoppingTaskData:
-    food = db.query(Food).filter(Food.id == task.food_id).first()
-    food_name = food.name if food else "Unknown"
-
-    unit_name = None
-    if task.unit_id:
-        unit = db.query(Unit).filter(Unit.id == task.unit_id).first()
-        unit_name = unit.name if unit else None
-
-    # Resolve done_by username
-    done_by_username = None
-    if task.done_by:
-        done_by_user = db.query(User).filter(User.id == task.done_by).first()
-        if done_by_user:
-            done_by_username = done_by_user.username
-
+def _build_shopping_task_data(
+    task: ShoppingTask, refs: ReferenceResolver
+) -> ShoppingTaskData:
     return ShoppingTaskData(
         id=task.id,
         list_id=task.list_id,
         food_id=task.food_id,
-        food_name=food_name,
+        food_name=refs.food_name(task.food_id) or "Unknown",
         quantity=task.quantity,
         unit_id=task.unit_id,
-        unit_name=unit_name,
+        unit_name=refs.unit_name(task.unit_id),
         note=task.note,
         estimated_cost=task.estimated_cost,
         actual_cost=task.actual_cost,
@@ -597,26 +756,10 @@ def _build_shopping_task_data(db: Session, task: ShoppingTask) -> ShoppingTaskDa
         is_done=task.is_done,
         done_at=task.done_at,
         done_by=task.done_by,
-        done_by_username=done_by_username,
+        done_by_username=refs.username(task.done_by),
         created_at=task.created_at,
         updated_at=task.updated_at,
     )
 
 
-def _recalculate_total_cost(db: Session, shopping_list: ShoppingList):
-    tasks = (
-        db.query(ShoppingTask).filter(ShoppingTask.list_id == shopping_list.id).all()
-    )
-
-    total = Decimal("0")
-    for task in tasks:
-        if task.actual_cost is not None:
-            total += task.actual_cost
-        elif task.estimated_cost is not None:
-            total += task.estimated_cost
-
-    shopping_list.total_cost = total
-    db.commit()
-
-
 __all__ = ["router"]
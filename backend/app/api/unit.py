@@ -5,7 +5,7 @@ from decimal import Decimal
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ..core.database import get_db
+from ..core.database import get_db, get_read_db
 from ..core.deps import get_current_user
 from ..models import Unit, User
 from ..schemas.base import ResultMessage
@@ -82,7 +82,7 @@ def create_unit(
 @router.get("/", response_model=GetAllUnitsResponse)
 def get_all_units(
     _: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     units = db.query(Unit).all()
     unit_data_list = [UnitData.model_validate(unit) for unit in units]
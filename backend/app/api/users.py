@@ -2,6 +2,7 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Form
 from sqlalchemy.orm import Session
 
+from ..core import cache
 from ..core.database import get_db
 from ..core.deps import get_current_user
 from ..schemas.user import GetUserResponse, EditUserResponse, ChangePasswordRequest, ChangePasswordResponse
@@ -64,6 +65,7 @@ def edit_current_user_profile(
         photo_url = response["public_url"]
 
     db.commit()
+    cache.invalidate_user(current_user.id)
     db.refresh(current_user)
 
     from ..schemas.base import UserData
@@ -88,6 +90,7 @@ def change_password(request: ChangePasswordRequest,
     current_user.password_hash = hashed_password
 
     db.commit()
+    cache.invalidate_user(current_user.id)
 
     return ChangePasswordResponse(
         resultMessage=ResultMessage(
@@ -101,8 +104,11 @@ def change_password(request: ChangePasswordRequest,
 def remove_current_user_profile(current_user: User = Depends(get_current_user),
                                 db: Session = Depends(get_db)):
 
+    user_id = current_user.id
     db.delete(current_user)
 
     db.commit()
+    cache.invalidate_user(user_id)
+    cache.invalidate_group_context(user_id)
 
     return {"message": "User deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,345 @@
+"""Redis-backed caches shared by request dependencies.
+
+Functions used on async request paths have ``_async`` counterparts that go
+through the event loop's Redis pool instead of a worker thread.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any
+
+import redis
+from sqlalchemy import Date, DateTime, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from .config import settings
+from .redis import get_async_redis, redis_client
+from ..models import User
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# First level of the authenticated-user cache. Other workers may keep a stale
+# entry for at most ``user_cache_local_ttl_seconds`` after an invalidation.
+local_user_cache = TTLCache(
+    maxsize=settings.user_cache_local_maxsize,
+    ttl=settings.user_cache_local_ttl_seconds,
+)
+
+# Never copy credentials into the cache; they are lazy-loaded when needed.
+_USER_SNAPSHOT_EXCLUDE = {"password_hash"}
+
+
+def cache_key(*parts: Any) -> str:
+    """Build a namespaced cache key."""
+    return ":".join([settings.cache_namespace, *(str(part) for part in parts)])
+
+
+def get_cached_group_context(user_id: int) -> dict[str, Any] | None:
+    """Return the cached active-membership context of a user, if any."""
+    try:
+        raw = redis_client.get(cache_key("group_ctx", user_id))
+    except redis.RedisError as exc:
+        logger.warning("Group context cache read failed: %s", exc)
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def get_cached_group_context_async(user_id: int) -> dict[str, Any] | None:
+    """Async counterpart of :func:`get_cached_group_context`."""
+    try:
+        raw = await get_async_redis().get(cache_key("group_ctx", user_id))
+    except redis.RedisError as exc:
+        logger.warning("Group context cache read failed: %s", exc)
+        return None
+    return json.loads(raw) if raw else None
+
+
+def cache_group_context(user_id: int, context: dict[str, Any]) -> None:
+    """Store the active-membership context of a user."""
+    try:
+        redis_client.setex(
+            cache_key("group_ctx", user_id),
+            settings.group_context_cache_ttl_seconds,
+            json.dumps(context),
+        )
+    except redis.RedisError as exc:
+        logger.warning("Group context cache write failed: %s", exc)
+
+
+async def cache_group_context_async(user_id: int, context: dict[str, Any]) -> None:
+    """Async counterpart of :func:`cache_group_context`."""
+    try:
+        await get_async_redis().setex(
+            cache_key("group_ctx", user_id),
+            settings.group_context_cache_ttl_seconds,
+            json.dumps(context),
+        )
+    except redis.RedisError as exc:
+        logger.warning("Group context cache write failed: %s", exc)
+
+
+def invalidate_group_context(*user_ids: int) -> None:
+    """Drop cached membership contexts after a membership change."""
+    if not user_ids:
+        return
+    try:
+        redis_client.delete(*(cache_key("group_ctx", user_id) for user_id in user_ids))
+    except redis.RedisError as exc:
+        logger.warning("Group context cache invalidation failed: %s", exc)
+
+
+def _user_columns():
+    return [
+        attr
+        for attr in inspect(User).column_attrs
+        if attr.key not in _USER_SNAPSHOT_EXCLUDE
+    ]
+
+
+def _user_snapshot(user: User) -> dict[str, Any]:
+    snapshot = {}
+    for attr in _user_columns():
+        value = getattr(user, attr.key)
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        snapshot[attr.key] = value
+    return snapshot
+
+
+def _user_from_snapshot(snapshot: dict[str, Any]) -> User:
+    values = {}
+    for attr in _user_columns():
+        value = snapshot.get(attr.key)
+        if isinstance(value, str):
+            column_type = attr.columns[0].type
+            if isinstance(column_type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(column_type, Date):
+                value = date.fromisoformat(value)
+        values[attr.key] = value
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def get_cached_user(user_id: int) -> User | None:
+    """Return a detached User rebuilt from the local or Redis snapshot.
+
+    The caller should attach it with ``Session.merge(user, load=False)``,
+    which does not emit any SQL.
+    """
+    key = cache_key("user", user_id)
+    snapshot = local_user_cache.get(key)
+    if snapshot is None:
+        try:
+            raw = redis_client.get(key)
+        except redis.RedisError as exc:
+            logger.warning("User cache read failed: %s", exc)
+            return None
+        if not raw:
+            return None
+        snapshot = json.loads(raw)
+        local_user_cache.set(key, snapshot)
+    return _user_from_snapshot(snapshot)
+
+
+async def get_cached_user_async(user_id: int) -> User | None:
+    """Async counterpart of :func:`get_cached_user`."""
+    key = cache_key("user", user_id)
+    snapshot = local_user_cache.get(key)
+    if snapshot is None:
+        try:
+            raw = await get_async_redis().get(key)
+        except redis.RedisError as exc:
+            logger.warning("User cache read failed: %s", exc)
+            return None
+        if not raw:
+            return None
+        snapshot = json.loads(raw)
+        local_user_cache.set(key, snapshot)
+    return _user_from_snapshot(snapshot)
+
+
+def cache_user(user: User) -> None:
+    """Store a snapshot of an authenticated user in both cache levels."""
+    key = cache_key("user", user.id)
+    snapshot = _user_snapshot(user)
+    local_user_cache.set(key, snapshot)
+    try:
+        redis_client.setex(key, settings.user_cache_ttl_seconds, json.dumps(snapshot))
+    except redis.RedisError as exc:
+        logger.warning("User cache write failed: %s", exc)
+
+
+async def cache_user_async(user: User) -> None:
+    """Async counterpart of :func:`cache_user`."""
+    key = cache_key("user", user.id)
+    snapshot = _user_snapshot(user)
+    local_user_cache.set(key, snapshot)
+    try:
+        await get_async_redis().setex(
+            key, settings.user_cache_ttl_seconds, json.dumps(snapshot)
+        )
+    except redis.RedisError as exc:
+        logger.warning("User cache write failed: %s", exc)
+
+
+def invalidate_user(*user_ids: int) -> None:
+    """Drop cached user snapshots after the user row changes."""
+    if not user_ids:
+        return
+    keys = [cache_key("user", user_id) for user_id in user_ids]
+    for key in keys:
+        local_user_cache.delete(key)
+    try:
+        redis_client.delete(*keys)
+    except redis.RedisError as exc:
+        logger.warning("User cache invalidation failed: %s", exc)
+
+
+def _group_version_key(group_id: int) -> str:
+    return cache_key("group_version", group_id)
+
+
+def bump_group_data_version(*group_ids: int) -> None:
+    """Invalidate every cached analytics response of the given groups.
+
+    Call after the write has been committed, so a concurrent reader cannot
+    cache pre-commit data under the new version.
+    """
+    if not group_ids:
+        return
+    try:
+        pipeline = redis_client.pipeline(transaction=False)
+        for group_id in group_ids:
+            pipeline.incr(_group_version_key(group_id))
+        pipeline.execute()
+    except redis.RedisError as exc:
+        logger.warning("Group data version bump failed: %s", exc)
+
+
+def _analytics_key(group_id: int, version: Any, name: str, params: dict[str, Any]) -> str:
+    encoded = json.dumps(params, sort_keys=True, default=str)
+    return cache_key("analytics", group_id, version, name, encoded)
+
+
+async def analytics_cache_key_async(
+    group_id: int, name: str, params: dict[str, Any]
+) -> str | None:
+    """Key of an analytics response at the group's current data version.
+
+    Returns None when Redis is unavailable, in which case callers compute
+    the response without caching it.
+    """
+    try:
+        version = await get_async_redis().get(_group_version_key(group_id)) or 0
+    except redis.RedisError as exc:
+        logger.warning("Group data version read failed: %s", exc)
+        return None
+    return _analytics_key(group_id, version, name, params)
+
+
+async def get_cached_analytics_async(key: str) -> dict[str, Any] | None:
+    """Return a cached analytics response body, if any."""
+    try:
+        raw = await get_async_redis().get(key)
+    except redis.RedisError as exc:
+        logger.warning("Analytics cache read failed: %s", exc)
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def cache_analytics_async(key: str, body: dict[str, Any]) -> None:
+    """Store an analytics response body."""
+    try:
+        await get_async_redis().setex(
+            key, settings.analytics_cache_ttl_seconds, json.dumps(body)
+        )
+    except redis.RedisError as exc:
+        logger.warning("Analytics cache write failed: %s", exc)
+
+
+async def acquire_analytics_lock_async(key: str):
+    """Try to become the one request recomputing ``key``.
+
+    Returns the held lock, or None if another request holds it (or Redis is
+    unavailable). The lock expires on its own if its holder dies.
+    """
+    lock = get_async_redis().lock(
+        f"{key}:lock", timeout=settings.analytics_cache_lock_seconds
+    )
+    try:
+        return lock if await lock.acquire(blocking=False) else None
+    except redis.RedisError as exc:
+        logger.warning("Analytics cache lock failed: %s", exc)
+        return None
+
+
+async def release_analytics_lock_async(lock) -> None:
+    try:
+        await lock.release()
+    except redis.RedisError as exc:
+        # Includes LockNotOwnedError when the computation outlived the lock
+        logger.warning("Analytics cache unlock failed: %s", exc)
+
+
+def claim_expiry_digest(user_id: int, day: date) -> bool:
+    """Record that a user's expiry digest for ``day`` is being sent.
+
+    Returns False if it already was, so a re-run dispatch or a redelivered
+    task does not send it twice. When Redis is unavailable the digest is
+    sent anyway.
+    """
+    try:
+        return bool(
+            redis_client.set(
+                cache_key("expiry_digest", user_id, day.isoformat()),
+                1,
+                nx=True,
+                ex=2 * 24 * 3600,
+            )
+        )
+    except redis.RedisError as exc:
+        logger.warning("Expiry digest claim failed: %s", exc)
+        return True
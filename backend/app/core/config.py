@@ -3,7 +3,9 @@
 from functools import lru_cache
 from typing import Any, Dict, List
 
+from pydantic import Field
 from pydantic_settings import BaseSettings
+from sqlalchemy.engine import make_url
 
 
 class Settings(BaseSettings):
@@ -12,6 +14,21 @@ class Settings(BaseSettings):
     secret_key: str = "change-me"
     access_token_expires_minutes: int = 150
     refresh_token_expires_minutes: int = 60 * 24 * 7
+    # Password hashing: bcrypt cost (hashes at another cost are upgraded on
+    # the next successful login), worker processes per API process, and
+    # hashes queued or running before new ones are refused with 503
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
+    # Revoked tokens: each process checks a Bloom filter of the Redis
+    # denylist, resynced at this interval (the delay before a revocation
+    # made elsewhere is enforced)
+    revocation_sync_interval_seconds: float = 5.0
+    revocation_bloom_capacity: int = 100_000
+    revocation_bloom_error_rate: float = 0.001
+    # How long a process whose filter never loaded rejects every token while
+    # Redis is unreachable, before accepting them like a loaded one would
+    revocation_unloaded_fail_closed_seconds: float = 30.0
     backend_cors_origins: str = "*"  # Cho phép tất cả origins trong development
 
     @property
@@ -21,12 +38,119 @@ class Settings(BaseSettings):
         return [origin.strip() for origin in self.backend_cors_origins.split(",")]
 
     database_url: str = "postgresql+psycopg2://postgres:postgres@db:5432/di_cho"
+    # Defaults to database_url with the driver swapped for asyncpg
+    # (PostgreSQL) or aiosqlite (SQLite)
+    async_database_url_override: str | None = Field(None, alias="ASYNC_DATABASE_URL")
+
+    @property
+    def async_database_url(self) -> str:
+        if self.async_database_url_override:
+            return self.async_database_url_override
+        return _async_driver_url(self.database_url)
+
+    # Optional read replica for GET endpoints and analytics; reads fall back
+    # to the primary while it is unreachable or lagging too far behind
+    replica_database_url: str | None = None
+    replica_max_lag_seconds: float = 10.0
+    replica_check_interval_seconds: float = 5.0
+    replica_connect_timeout_seconds: int = 3
+
+    @property
+    def async_replica_database_url(self) -> str | None:
+        if not self.replica_database_url:
+            return None
+        return _async_driver_url(self.replica_database_url)
+
+    # Keyset pagination of list endpoints
+    pagination_default_limit: int = 50
+    pagination_max_limit: int = 200
+
+    # Expiry given to fridge items stocked from a shopping list when the
+    # food has no default_shelf_life_days
+    fridge_default_shelf_life_days: int = 7
+    # Items whose use_within_date is at most this many days away count as
+    # expiring soon (analytics summary, expiry scan)
+    fridge_expiring_window_days: int = 3
+    # Local hour (in each user's timezone) expiry digests are delivered at
+    expiry_digest_hour: int = 8
+
+    # Connection pool (per process; size workers so that
+    # processes * (db_pool_size + db_max_overflow) stays below max_connections)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # PgBouncer in transaction pooling mode: disable client-side pooling and
+    # asyncpg prepared statement caches
+    db_pgbouncer: bool = False
+
     redis_url: str = "redis://redis:6379/0"
+    # Redis pools (per process, and per event loop for async callers):
+    # callers wait up to redis_pool_timeout_seconds for a free connection
+    # once redis_max_connections are in use
+    redis_max_connections: int = 50
+    redis_pool_timeout_seconds: float = 5.0
+    redis_socket_timeout_seconds: float = 2.0
+    redis_socket_connect_timeout_seconds: float = 2.0
+    redis_health_check_interval_seconds: int = 30
+    cache_namespace: str = "dctl"
+    group_context_cache_ttl_seconds: int = 300
+    user_cache_ttl_seconds: int = 300
+    user_cache_local_ttl_seconds: int = 30
+    user_cache_local_maxsize: int = 10000
+    # Analytics responses are keyed by a per-group data version, so the TTL
+    # only bounds how long unused entries linger
+    analytics_cache_ttl_seconds: int = 3600
+    # Stampede protection: one request recomputes, others wait up to
+    # analytics_cache_wait_seconds for its result
+    analytics_cache_lock_seconds: int = 10
+    analytics_cache_wait_seconds: float = 2.0
+
+    # Email verification codes: lifetime, wrong guesses before a code is
+    # burnt, and sliding-window limits on sending them
+    otp_ttl_seconds: int = 15 * 60
+    otp_max_attempts: int = 5
+    otp_send_window_seconds: int = 10 * 60
+    otp_send_limit_per_email: int = 3
+    otp_send_limit_per_ip: int = 20
+
+    # Outgoing email. Each worker process keeps one SMTP connection open and
+    # sends the Redis outbox over it in batches of email_batch_size
+    smtp_host: str = "localhost"
+    smtp_port: int = 587
+    smtp_username: str | None = None
+    smtp_password: str | None = None
+    smtp_use_tls: bool = True
+    smtp_timeout_seconds: float = 10.0
+    email_from: str = "Di Cho Tien Loi <no-reply@dicho.vn>"
+    email_batch_size: int = 100
+    # Transient SMTP failures retry the flush after
+    # email_retry_backoff_seconds * 2**attempt, capped at the maximum
+    email_max_retries: int = 8
+    email_retry_backoff_seconds: float = 5.0
+    email_retry_backoff_max_seconds: float = 600.0
+    # How long a flush may run before another one is allowed to start
+    email_flush_lock_seconds: int = 60
+
     minio_endpoint: str = "minio:9000"
     minio_public_url: str = "http://localhost:9000"
     minio_access_key: str = "minioadmin"
     minio_secret_key: str = "minioadmin"
     minio_bucket: str = "di-cho-media"
+    minio_secure: bool = False
+    # Skips the bucket-location lookup when set
+    minio_region: str | None = None
+    # Connections kept per MinIO host, socket timeouts and retries of
+    # failed or 5xx requests, for the one client each process shares
+    minio_pool_maxsize: int = 20
+    minio_connect_timeout_seconds: float = 5.0
+    minio_read_timeout_seconds: float = 60.0
+    minio_max_retries: int = 3
+    # Uploads are streamed in parts of this size (S3 minimum: 5 MiB) and
+    # rejected with 413 once they grow past upload_max_bytes
+    minio_part_size_bytes: int = 5 * 1024 * 1024
+    upload_max_bytes: int = 10 * 1024 * 1024
 
     # Admin credentials
     admin_username: str = "admin"
@@ -40,6 +164,25 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
 
 
+# Async driver of each supported database backend
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_driver_url(database_url: str) -> str:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(
+            f"No async driver known for {backend!r} database URLs; "
+            "set ASYNC_DATABASE_URL"
+        )
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url.render_as_string(hide_password=False)
+
+
 @lru_cache
 def get_settings() -> Settings:
     """Return cached application settings instance."""
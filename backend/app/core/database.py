@@ -1,25 +1,79 @@
 """Database connection and session management."""
+from uuid import uuid4
+
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Any, AsyncGenerator, Dict, Generator
 
 from .config import settings
+from .pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedNullPool,
+    InstrumentedQueuePool,
+    pool_snapshot,
+)
+from .replica import REPLICA_LAG_SQL, ReplicaMonitor
+
+
+def _pool_options(queue_pool_class) -> Dict[str, Any]:
+    """Engine pool arguments from settings.
+
+    Behind PgBouncer (transaction pooling) connections are pooled by the
+    bouncer, so the engine opens a fresh connection per checkout instead.
+    """
+    if settings.db_pgbouncer:
+        return {"poolclass": InstrumentedNullPool}
+    return {
+        "poolclass": queue_pool_class,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _is_postgresql(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "postgresql"
+
+
+def _connect_args(database_url: str, **postgresql_args) -> Dict[str, Any]:
+    """psycopg2 connect arguments; other drivers (SQLite) take none."""
+    if not _is_postgresql(database_url):
+        return {}
+    return {"client_encoding": "utf-8", **postgresql_args}
+
+
+def _async_connect_args(database_url: str) -> Dict[str, Any]:
+    if not (settings.db_pgbouncer and _is_postgresql(database_url)):
+        return {}
+    # Prepared statements do not survive PgBouncer handing the server
+    # connection to another client between transactions.
+    return {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+
+def _set_client_encoding(dbapi_conn, connection_record):
+    """Set client encoding to UTF-8 for each connection."""
+    if hasattr(dbapi_conn, 'set_client_encoding'):
+        dbapi_conn.set_client_encoding('UTF-8')
+
 
 # Tạo engine với UTF-8 encoding cho PostgreSQL
 engine = create_engine(
     settings.database_url,
     echo=False,
-    connect_args={
-        'client_encoding': 'utf-8',
-    }
+    connect_args=_connect_args(settings.database_url),
+    **_pool_options(InstrumentedQueuePool),
 )
 
 # Đảm bảo tất cả kết nối sử dụng UTF-8
-@event.listens_for(engine, 'connect')
-def receive_connect(dbapi_conn, connection_record):
-    """Set client encoding to UTF-8 for each connection."""
-    if hasattr(dbapi_conn, 'set_client_encoding'):
-        dbapi_conn.set_client_encoding('UTF-8')
+event.listen(engine, 'connect', _set_client_encoding)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -30,4 +84,112 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Async engine for the API routers; the sync engine above stays for Celery
+# workers, scripts and write paths that have not been ported yet.
+async_engine = create_async_engine(
+    settings.async_database_url,
+    echo=False,
+    connect_args=_async_connect_args(settings.async_database_url),
+    **_pool_options(InstrumentedAsyncAdaptedQueuePool),
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async database session dependency."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Optional read replica. Without REPLICA_DATABASE_URL the read dependencies
+# below hand out primary sessions.
+read_engine = None
+async_read_engine = None
+ReadSessionLocal = None
+AsyncReadSessionLocal = None
+
+if settings.replica_database_url:
+    read_engine = create_engine(
+        settings.replica_database_url,
+        echo=False,
+        connect_args=_connect_args(
+            settings.replica_database_url,
+            connect_timeout=settings.replica_connect_timeout_seconds,
+        ),
+        **_pool_options(InstrumentedQueuePool),
+    )
+    event.listen(read_engine, 'connect', _set_client_encoding)
+    ReadSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=read_engine
+    )
+
+    async_read_engine = create_async_engine(
+        settings.async_replica_database_url,
+        echo=False,
+        connect_args={
+            **_async_connect_args(settings.async_replica_database_url),
+            'timeout': settings.replica_connect_timeout_seconds,
+        },
+        **_pool_options(InstrumentedAsyncAdaptedQueuePool),
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_read_engine, autoflush=False, expire_on_commit=False
+    )
+
+replica_monitor = ReplicaMonitor(
+    max_lag_seconds=settings.replica_max_lag_seconds,
+    check_interval_seconds=settings.replica_check_interval_seconds,
+)
+
+
+def _replica_lag() -> float | None:
+    with read_engine.connect() as connection:
+        lag = connection.execute(REPLICA_LAG_SQL).scalar()
+    return None if lag is None else float(lag)
+
+
+async def _replica_lag_async() -> float | None:
+    async with async_read_engine.connect() as connection:
+        lag = (await connection.execute(REPLICA_LAG_SQL)).scalar()
+    return None if lag is None else float(lag)
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Read-only session dependency, served by the replica when it is healthy."""
+    session_factory = SessionLocal
+    if ReadSessionLocal is not None and replica_monitor.available(_replica_lag):
+        session_factory = ReadSessionLocal
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Async counterpart of :func:`get_read_db`."""
+    session_factory = AsyncSessionLocal
+    if AsyncReadSessionLocal is not None and await replica_monitor.available_async(
+        _replica_lag_async
+    ):
+        session_factory = AsyncReadSessionLocal
+    async with session_factory() as db:
+        yield db
+
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Checkout wait times and live usage of this process's pools."""
+    metrics = {
+        "sync": pool_snapshot(engine.pool),
+        "async": pool_snapshot(async_engine.sync_engine.pool),
+    }
+    if read_engine is not None:
+        metrics["replica_sync"] = pool_snapshot(read_engine.pool)
+        metrics["replica_async"] = pool_snapshot(async_read_engine.sync_engine.pool)
+    return metrics
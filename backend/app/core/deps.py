@@ -1,12 +1,18 @@
 """Dependencies for FastAPI routes."""
 import logging
+from dataclasses import asdict, dataclass
+from typing import NoReturn
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .database import get_db
+from . import cache, revocation
+from .database import get_async_db, get_db
 from .security import verify_token
-from ..models import User
+from ..models import GroupMember, User
 
 logger = logging.getLogger(__name__)
 
@@ -14,11 +20,25 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials | None = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token."""
+@dataclass
+class GroupContext:
+    """Authenticated user together with their active group membership."""
+
+    user_id: int
+    group_id: int
+    role: str
+
+
+def _reject_token() -> NoReturn:
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _token_payload(credentials: HTTPAuthorizationCredentials | None) -> dict:
+    """Decode the bearer token, which must be a valid access token."""
     if credentials is None:
         logger.warning("No authorization credentials provided")
         raise HTTPException(
@@ -27,29 +47,147 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    token = credentials.credentials
-    logger.info(f"Authenticating with token: {token[:20]}...")
-    payload = verify_token(token, "access")
+    payload = verify_token(credentials.credentials, "access")
 
     if payload is None:
+        _reject_token()
+
+    if payload.get("sub") is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user_id = payload.get("sub")
-    if user_id is None:
+    return payload
+
+
+def _authenticated_user_id(credentials: HTTPAuthorizationCredentials | None) -> int:
+    """Validate the bearer token and return the user id it was issued for."""
+    payload = _token_payload(credentials)
+    if revocation.is_revoked(payload):
+        _reject_token()
+    return int(payload["sub"])
+
+
+async def _authenticated_user_id_async(
+    credentials: HTTPAuthorizationCredentials | None,
+) -> int:
+    """Async counterpart of :func:`_authenticated_user_id`."""
+    payload = _token_payload(credentials)
+    if await revocation.is_revoked_async(payload):
+        _reject_token()
+    return int(payload["sub"])
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user from JWT token.
+
+    The user row is served from a two-level cache (in-process, then Redis);
+    cached snapshots are attached to the session without querying Postgres.
+    """
+    user_id = _authenticated_user_id(credentials)
+
+    cached_user = cache.get_cached_user(user_id)
+    if cached_user is not None:
+        return db.merge(cached_user, load=False)
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
+            detail="User not found or inactive",
         )
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    cache.cache_user(user)
+    return user
+
+
+def get_group_context(
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    db: Session = Depends(get_db)
+) -> GroupContext:
+    """Resolve the current user and their active group membership.
+
+    The user and membership are loaded with a single joined query and the
+    result is cached in Redis until the membership changes.
+    """
+    user_id = _authenticated_user_id(credentials)
+
+    cached = cache.get_cached_group_context(user_id)
+    if cached is not None:
+        return GroupContext(**cached)
+
+    row = db.execute(_group_context_statement(user_id)).first()
+    context = _group_context_from_row(user_id, row)
+    cache.cache_group_context(user_id, asdict(context))
+    return context
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """Async counterpart of :func:`get_current_user` for ``async def`` routes."""
+    user_id = await _authenticated_user_id_async(credentials)
+
+    cached_user = await cache.get_cached_user_async(user_id)
+    if cached_user is not None:
+        return await db.merge(cached_user, load=False)
+
+    user = await db.get(User, user_id)
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive",
         )
 
-    return user
\ No newline at end of file
+    await cache.cache_user_async(user)
+    return user
+
+
+async def get_group_context_async(
+    credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> GroupContext:
+    """Async counterpart of :func:`get_group_context` for ``async def`` routes."""
+    user_id = await _authenticated_user_id_async(credentials)
+
+    cached = await cache.get_cached_group_context_async(user_id)
+    if cached is not None:
+        return GroupContext(**cached)
+
+    row = (await db.execute(_group_context_statement(user_id))).first()
+    context = _group_context_from_row(user_id, row)
+    await cache.cache_group_context_async(user_id, asdict(context))
+    return context
+
+
+def _group_context_statement(user_id: int):
+    return (
+        select(User.is_active, GroupMember.group_id, GroupMember.role)
+        .outerjoin(
+            GroupMember,
+            and_(GroupMember.user_id == User.id, GroupMember.is_active == True),
+        )
+        .where(User.id == user_id)
+        .limit(1)
+    )
+
+
+def _group_context_from_row(user_id: int, row) -> GroupContext:
+    if row is None or not row.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found or inactive",
+        )
+
+    if row.group_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is not in any group",
+        )
+
+    return GroupContext(user_id=user_id, group_id=row.group_id, role=row.role)
@@ -0,0 +1,219 @@
+"""Outgoing email: templates, a per-process SMTP connection and an outbox.
+
+Producers render a message and push it onto a Redis list, the outbox. The
+``flush_email_outbox`` task drains it in batches over the SMTP connection
+its worker process keeps open between batches, so a burst of signups costs
+one connection and a few tasks instead of one of each per email.
+"""
+import json
+import logging
+import os
+import smtplib
+import threading
+from email.message import EmailMessage
+from pathlib import Path
+from string import Template
+from typing import Any
+
+from .cache import cache_key
+from .config import settings
+from .redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+
+def render_email(template: str, to: str, language: str = "en", **context: Any) -> dict[str, str]:
+    """Render ``templates/email/<template>.<language>.txt`` for one recipient.
+
+    The first line of a template is its ``Subject:``. Languages without a
+    template fall back to English.
+    """
+    language = "vn" if language in ("vi", "vn") else language
+    path = TEMPLATE_DIR / f"{template}.{language}.txt"
+    if not path.exists():
+        path = TEMPLATE_DIR / f"{template}.en.txt"
+    text = Template(path.read_text(encoding="utf-8")).substitute(context)
+    subject, _, body = text.partition("\n")
+    return {
+        "to": to,
+        "subject": subject.removeprefix("Subject:").strip(),
+        "body": body.lstrip("\n"),
+    }
+
+
+def _mime(message: dict[str, str]) -> EmailMessage:
+    mime = EmailMessage()
+    mime["From"] = settings.email_from
+    mime["To"] = message["to"]
+    mime["Subject"] = message["subject"]
+    mime.set_content(message["body"])
+    return mime
+
+
+def _is_permanent(exc: smtplib.SMTPException) -> bool:
+    """Whether retrying a message cannot succeed (5xx replies).
+
+    Refused recipients only count when every refusal is a 5xx; a 4xx such
+    as greylisting (450/451) is worth retrying.
+    """
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return bool(exc.recipients) and all(
+            code >= 500 for code, _ in exc.recipients.values()
+        )
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+
+class SMTPConnection:
+    """SMTP session opened on first use and kept for the life of the process.
+
+    A forked child never reuses its parent's socket, and a session the
+    server dropped while idle is replaced before the next batch.
+    """
+
+    def __init__(self) -> None:
+        self._smtp: smtplib.SMTP | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(
+            settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds
+        )
+        try:
+            if settings.smtp_use_tls:
+                smtp.starttls()
+            if settings.smtp_username:
+                smtp.login(settings.smtp_username, settings.smtp_password or "")
+        except BaseException:
+            smtp.close()
+            raise
+        return smtp
+
+    def _session(self) -> smtplib.SMTP:
+        if self._smtp is not None and self._pid != os.getpid():
+            self._smtp = None
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self.close()
+        self._smtp = self._open()
+        self._pid = os.getpid()
+        return self._smtp
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    def send(self, messages: list[dict[str, str]]) -> list[dict[str, str]]:
+        """Send messages in order and return the ones to retry.
+
+        Stops at the first transient failure (connection lost, 4xx), leaving
+        that message and all after it for a retry. Messages the server
+        rejects permanently are logged and dropped.
+        """
+        with self._lock:
+            try:
+                smtp = self._session()
+            except (smtplib.SMTPException, OSError) as exc:
+                logger.warning("SMTP connection failed: %s", exc)
+                return messages
+            for index, message in enumerate(messages):
+                try:
+                    smtp.send_message(_mime(message))
+                except smtplib.SMTPException as exc:
+                    if _is_permanent(exc):
+                        logger.error("Email to %s rejected: %s", message["to"], exc)
+                        continue
+                    logger.warning("Email to %s deferred: %s", message["to"], exc)
+                    self.close()
+                    return messages[index:]
+                except OSError as exc:
+                    logger.warning("SMTP connection lost: %s", exc)
+                    smtp.close()
+                    self._smtp = None
+                    return messages[index:]
+        return []
+
+
+# One per worker process
+smtp_connection = SMTPConnection()
+
+
+def _outbox_key() -> str:
+    return cache_key("email_outbox")
+
+
+def _flush_key() -> str:
+    return cache_key("email_outbox", "flush")
+
+
+def claim_outbox_flush(seconds: float | None = None) -> bool:
+    """Become the one flush of the outbox. The claim lapses after
+    ``seconds`` (default ``email_flush_lock_seconds``) unless held longer."""
+    seconds = seconds or settings.email_flush_lock_seconds
+    return bool(redis_client.set(_flush_key(), 1, nx=True, ex=int(seconds)))
+
+
+def hold_outbox_flush(seconds: float) -> None:
+    """Extend the current flush's claim, e.g. over a retry countdown."""
+    redis_client.expire(_flush_key(), int(seconds))
+
+
+def queue_email(message: dict[str, str]) -> bool:
+    """Append a rendered message to the outbox.
+
+    Returns True when no flush is scheduled or running, in which case the
+    caller must schedule one.
+    """
+    redis_client.rpush(_outbox_key(), json.dumps(message))
+    return claim_outbox_flush()
+
+
+def peek_outbox(count: int) -> list[dict[str, str]]:
+    """The first ``count`` queued messages, left queued until trimmed, and
+    the flush claim renewed. Only the claim holder reads the head, so a
+    crash mid-batch resends the batch rather than losing it."""
+    pipeline = redis_client.pipeline()
+    pipeline.lrange(_outbox_key(), 0, count - 1)
+    pipeline.expire(_flush_key(), settings.email_flush_lock_seconds)
+    raw, _ = pipeline.execute()
+    return [json.loads(item) for item in raw]
+
+
+def trim_outbox(count: int) -> None:
+    """Drop the first ``count`` messages once they have been handled."""
+    if count:
+        redis_client.ltrim(_outbox_key(), count, -1)
+
+
+def release_outbox_flush() -> bool:
+    """Give up the flush claim once the outbox looks empty.
+
+    Returns False when a message arrived in between and this flush claimed
+    the outbox again, i.e. it should keep going.
+    """
+    redis_client.delete(_flush_key())
+    return redis_client.llen(_outbox_key()) == 0 or not claim_outbox_flush()
+
+
+__all__ = [
+    "SMTPConnection",
+    "claim_outbox_flush",
+    "hold_outbox_flush",
+    "peek_outbox",
+    "queue_email",
+    "release_outbox_flush",
+    "render_email",
+    "smtp_connection",
+    "trim_outbox",
+]
@@ -0,0 +1,147 @@
+"""One-time codes and sliding-window rate limits, kept in Redis.
+
+Every operation is a single Lua script, so it costs one round trip and no
+other client can interleave between its reads and writes: a code cannot be
+verified twice, and concurrent requests cannot both slip under a limit.
+"""
+import hashlib
+import hmac
+import logging
+import time
+import uuid
+from enum import Enum
+
+import redis
+
+from .cache import cache_key
+from .config import settings
+from .redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] code hash; ARGV: hashed code, ttl ms
+_ISSUE = redis_client.register_script(
+    """
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0)
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+)
+
+# KEYS[1] code hash; ARGV: hashed guess, max attempts
+# Returns 1 verified (code consumed), 0 no code, -1 wrong, -2 wrong and the
+# code is now burnt
+_VERIFY = redis_client.register_script(
+    """
+    local stored = redis.call('HGET', KEYS[1], 'code')
+    if not stored then
+        return 0
+    end
+    if stored == ARGV[1] then
+        redis.call('DEL', KEYS[1])
+        return 1
+    end
+    local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+    if attempts >= tonumber(ARGV[2]) then
+        redis.call('DEL', KEYS[1])
+        return -2
+    end
+    return -1
+    """
+)
+
+# KEYS: one sorted set per limited subject; ARGV: now ms, unique member,
+# then a (limit, window ms) pair per key. Records the hit in every window
+# only if none is full; otherwise returns the ms until the fullest frees up.
+_HIT = redis_client.register_script(
+    """
+    local now = tonumber(ARGV[1])
+    local wait = 0
+    for i, key in ipairs(KEYS) do
+        local limit = tonumber(ARGV[2 * i + 1])
+        local window = tonumber(ARGV[2 * i + 2])
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+        if redis.call('ZCARD', key) >= limit then
+            local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+            wait = math.max(wait, tonumber(oldest[2]) + window - now)
+        end
+    end
+    if wait > 0 then
+        return wait
+    end
+    for i, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, ARGV[2])
+        redis.call('PEXPIRE', key, ARGV[2 * i + 2])
+    end
+    return 0
+    """
+)
+
+
+class OTPResult(str, Enum):
+    VERIFIED = "verified"
+    MISSING = "missing"
+    INCORRECT = "incorrect"
+    EXHAUSTED = "exhausted"
+
+
+_VERIFY_RESULTS = {
+    1: OTPResult.VERIFIED,
+    0: OTPResult.MISSING,
+    -1: OTPResult.INCORRECT,
+    -2: OTPResult.EXHAUSTED,
+}
+
+
+def _otp_key(purpose: str, subject: int | str) -> str:
+    return cache_key("otp", purpose, subject)
+
+
+def _digest(code: str) -> str:
+    # Codes are never stored in clear
+    return hmac.new(settings.secret_key.encode(), code.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_otp(purpose: str, subject: int | str, code: str) -> None:
+    """Store ``code`` for ``subject``, replacing any earlier one and
+    resetting its attempt count."""
+    _ISSUE(
+        keys=[_otp_key(purpose, subject)],
+        args=[_digest(code), settings.otp_ttl_seconds * 1000],
+    )
+
+
+def verify_otp(purpose: str, subject: int | str, code: str) -> OTPResult:
+    """Check ``code`` and consume it on success.
+
+    After ``otp_max_attempts`` wrong guesses the code is deleted, so a new
+    one has to be requested.
+    """
+    result = _VERIFY(
+        keys=[_otp_key(purpose, subject)],
+        args=[_digest(code), settings.otp_max_attempts],
+    )
+    return _VERIFY_RESULTS[int(result)]
+
+
+def hit_rate_limits(limits: list[tuple[str, int, int]]) -> float:
+    """Count one hit against every ``(name, limit, window seconds)`` limit.
+
+    Returns 0 when the hit is allowed (and recorded in all windows), else
+    the seconds until it would be. Limits are not enforced while Redis is
+    unavailable.
+    """
+    keys = [cache_key("rate", name) for name, _, _ in limits]
+    args: list[int | str] = [int(time.time() * 1000), uuid.uuid4().hex]
+    for _, limit, window in limits:
+        args += [limit, window * 1000]
+    try:
+        wait_ms = _HIT(keys=keys, args=args)
+    except redis.RedisError as exc:
+        logger.warning("Rate limit check failed: %s", exc)
+        return 0
+    return int(wait_ms) / 1000
+
+
+__all__ = ["OTPResult", "hit_rate_limits", "issue_otp", "verify_otp"]
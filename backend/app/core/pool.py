@@ -0,0 +1,96 @@
+"""Connection pool classes that record checkout metrics."""
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+
+class PoolStats:
+    """Thread-safe counters for time spent waiting on pool checkouts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / attempts, 6)
+                if attempts
+                else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Time every ``_do_get`` call, i.e. the wait for a pooled connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    """Used behind PgBouncer, where the wait is the time to open a connection."""
+
+
+def pool_snapshot(pool: Pool) -> Dict[str, Any]:
+    """Return live pool usage together with the recorded checkout stats."""
+    snapshot: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        snapshot.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            # overflow() is negative until the base pool is fully populated
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        snapshot.update(stats.snapshot())
+    return snapshot
+
+
+__all__ = [
+    "InstrumentedAsyncAdaptedQueuePool",
+    "InstrumentedNullPool",
+    "InstrumentedQueuePool",
+    "PoolStats",
+    "pool_snapshot",
+]
@@ -0,0 +1,144 @@
+"""Redis connection pools shared by every Redis consumer in the process.
+
+Sync callers (request dependencies, Celery tasks) share ``redis_client``.
+Async routes use :func:`get_async_redis`, whose pool is bound to the running
+event loop. Both pools are bounded: once ``redis_max_connections`` are in
+use, callers wait up to ``redis_pool_timeout_seconds`` for one to be
+returned instead of opening more, and every socket read, write and connect
+is capped by its own timeout so a stalled server cannot hang a request.
+"""
+import asyncio
+import time
+import weakref
+from typing import Any, Dict
+
+import redis
+import redis.asyncio as aioredis
+
+from .config import settings
+from .pool import PoolStats
+
+
+def _pool_kwargs() -> Dict[str, Any]:
+    return {
+        "max_connections": settings.redis_max_connections,
+        "timeout": settings.redis_pool_timeout_seconds,
+        "socket_timeout": settings.redis_socket_timeout_seconds,
+        "socket_connect_timeout": settings.redis_socket_connect_timeout_seconds,
+        "socket_keepalive": True,
+        "health_check_interval": settings.redis_health_check_interval_seconds,
+        "decode_responses": True,
+    }
+
+
+class InstrumentedBlockingConnectionPool(redis.BlockingConnectionPool):
+    """Time every checkout, i.e. the wait for a pooled connection.
+
+    Checkouts that fail, because the pool stayed exhausted or Redis could
+    not be reached, are counted as timeouts.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            connection = super().get_connection(*args, **kwargs)
+        except redis.ConnectionError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedAsyncBlockingConnectionPool(aioredis.BlockingConnectionPool):
+    """Async counterpart of :class:`InstrumentedBlockingConnectionPool`.
+
+    ``stats`` is passed in so that the pools of all event loops report as one.
+    """
+
+    def __init__(self, *args, stats: PoolStats, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+
+    async def get_connection(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            connection = await super().get_connection(*args, **kwargs)
+        except redis.ConnectionError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+
+sync_pool = InstrumentedBlockingConnectionPool.from_url(settings.redis_url, **_pool_kwargs())
+redis_client = redis.Redis(connection_pool=sync_pool)
+
+# redis.asyncio pools cannot be shared between event loops; the API runs one
+# loop per worker, tests and scripts may run several over time
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = (
+    weakref.WeakKeyDictionary()
+)
+_async_stats = PoolStats()
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Client backed by the running event loop's connection pool."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        pool = InstrumentedAsyncBlockingConnectionPool.from_url(
+            settings.redis_url, stats=_async_stats, **_pool_kwargs()
+        )
+        client = aioredis.Redis(connection_pool=pool)
+        _async_clients[loop] = client
+    return client
+
+
+def _sync_usage(pool: redis.BlockingConnectionPool) -> Dict[str, int]:
+    # The queue holds idle connections and None for slots never opened
+    idle = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+    return {"created": len(pool._connections), "idle": idle}
+
+
+def _async_usage(pool: aioredis.BlockingConnectionPool) -> Dict[str, int]:
+    in_use = len(pool._in_use_connections)
+    idle = len(pool._available_connections)
+    return {"created": in_use + idle, "idle": idle}
+
+
+def redis_pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Checkout wait times and live usage of this process's Redis pools.
+
+    The async entry sums the pools of all live event loops.
+    """
+    metrics = {}
+    usages = {
+        "sync": [_sync_usage(sync_pool)],
+        "async": [
+            _async_usage(client.connection_pool) for client in list(_async_clients.values())
+        ],
+    }
+    for name, stats in (("sync", sync_pool.stats), ("async", _async_stats)):
+        created = sum(usage["created"] for usage in usages[name])
+        idle = sum(usage["idle"] for usage in usages[name])
+        metrics[name] = {
+            "max_connections": settings.redis_max_connections,
+            "created": created,
+            "in_use": created - idle,
+            "idle": idle,
+            **stats.snapshot(),
+        }
+    return metrics
+
+
+__all__ = [
+    "InstrumentedAsyncBlockingConnectionPool",
+    "InstrumentedBlockingConnectionPool",
+    "get_async_redis",
+    "redis_client",
+    "redis_pool_metrics",
+]
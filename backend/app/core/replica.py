@@ -0,0 +1,100 @@
+"""Health tracking for the optional read replica."""
+import logging
+import threading
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Replication lag in seconds; 0 when the replica has replayed everything it
+# received (an idle primary otherwise looks like ever-growing lag) or when
+# the URL points at a primary.
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class ReplicaMonitor:
+    """Decide whether reads may go to the replica.
+
+    The replica is probed at most once per ``check_interval_seconds``; in
+    between, the last verdict is reused. A probe that fails or reports lag
+    above ``max_lag_seconds`` routes reads to the primary until the next
+    successful probe.
+    """
+
+    def __init__(
+        self,
+        max_lag_seconds: float,
+        check_interval_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._checked_at: float | None = None
+        self._healthy = False
+        self.last_lag_seconds: float | None = None
+
+    def _claim_check(self) -> bool:
+        """Return True if the caller should run the probe now."""
+        now = self._clock()
+        with self._lock:
+            if (
+                self._checked_at is not None
+                and now - self._checked_at < self.check_interval_seconds
+            ):
+                return False
+            # Claim the slot so concurrent requests reuse the old verdict
+            self._checked_at = now
+            return True
+
+    def _record(self, lag_seconds: float | None, error: Exception | None) -> bool:
+        if error is not None:
+            logger.warning("Read replica unavailable, using primary: %s", error)
+            healthy = False
+        elif lag_seconds is None or lag_seconds > self.max_lag_seconds:
+            logger.warning(
+                "Read replica lag %s s exceeds %s s, using primary",
+                lag_seconds,
+                self.max_lag_seconds,
+            )
+            healthy = False
+        else:
+            healthy = True
+        with self._lock:
+            self._healthy = healthy
+            self.last_lag_seconds = lag_seconds
+        return healthy
+
+    def available(self, probe: Callable[[], float | None]) -> bool:
+        if not self._claim_check():
+            return self._healthy
+        try:
+            lag = probe()
+        except Exception as error:  # noqa: BLE001 - any failure means fallback
+            return self._record(None, error)
+        return self._record(lag, None)
+
+    async def available_async(
+        self, probe: Callable[[], Awaitable[float | None]]
+    ) -> bool:
+        if not self._claim_check():
+            return self._healthy
+        try:
+            lag = await probe()
+        except Exception as error:  # noqa: BLE001 - any failure means fallback
+            return self._record(None, error)
+        return self._record(lag, None)
+
+
+__all__ = ["REPLICA_LAG_SQL", "ReplicaMonitor"]
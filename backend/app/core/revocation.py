@@ -0,0 +1,275 @@
+"""Revoked tokens: a Redis denylist fronted by a per-process Bloom filter.
+
+Revoking a token stores its ``jti`` in Redis until the token would have
+expired anyway; revoking all of a user's tokens stores the time before which
+their tokens were issued. Every entry is also indexed in a sorted set by
+expiry, from which each process rebuilds a Bloom filter at most once per
+``revocation_sync_interval_seconds``. Checking a token that is not revoked,
+the common case, is then a few in-memory bit tests; only filter hits are
+confirmed against Redis. A revocation made by another process takes effect
+here at the next sync.
+
+While Redis is unreachable: filter hits count as revoked, and everything
+else is accepted, so revocations made since the last successful sync are
+not enforced. A process whose filter has never loaded cannot tell hits
+from misses; for its first ``revocation_unloaded_fail_closed_seconds`` it
+rejects every token, after that it accepts every token, until Redis
+answers again. Its first sync keeps being retried in the background every
+sync interval. Revoking a token needs Redis and fails with 503 without it.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict
+
+import redis
+from fastapi import HTTPException, status
+
+from .cache import cache_key
+from .config import settings
+from .redis import get_async_redis, redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter of strings; no false negatives."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationFilter:
+    """Bloom filter of revoked entries, rebuilt from Redis periodically.
+
+    Every rebuild, including the first one of a process, runs on a
+    background thread claimed by the first check after
+    ``sync_interval_seconds``, so requests never wait for it. Until the first
+    rebuild has succeeded the filter cannot rule anything out, and
+    :meth:`might_contain` answers True for everything. Entries revoked
+    locally are added at once and survive a rebuild that raced with them.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        sync_interval_seconds: float,
+        unloaded_fail_closed_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval_seconds = sync_interval_seconds
+        self.unloaded_fail_closed_seconds = unloaded_fail_closed_seconds
+        self._clock = clock
+        self._created_at = clock()
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, error_rate)
+        self._synced_at: float | None = None
+        self._claimed_at: float | None = None
+        self._recent: list[tuple[float, str]] = []
+
+    def _claim_sync(self) -> bool:
+        now = self._clock()
+        with self._lock:
+            if (
+                self._claimed_at is not None
+                and now - self._claimed_at < self.sync_interval_seconds
+            ):
+                return False
+            self._claimed_at = now
+            return True
+
+    def sync(self) -> None:
+        """Rebuild the filter from the revocations that are still live."""
+        started = self._clock()
+        now = time.time()
+        index = _index_key()
+        try:
+            pipeline = redis_client.pipeline()
+            pipeline.zremrangebyscore(index, "-inf", now)
+            pipeline.zrangebyscore(index, now, "+inf")
+            _, members = pipeline.execute()
+        except redis.RedisError as exc:
+            logger.warning("Token revocation sync failed: %s", exc)
+            return
+        rebuilt = BloomFilter(self.capacity, self.error_rate)
+        for member in members:
+            rebuilt.add(member)
+        with self._lock:
+            # Local revocations made while Redis was being read
+            self._recent = [(at, item) for at, item in self._recent if at >= started]
+            for _, item in self._recent:
+                rebuilt.add(item)
+            self._filter = rebuilt
+            self._synced_at = started
+
+    @property
+    def loaded(self) -> bool:
+        return self._synced_at is not None
+
+    def fails_closed(self) -> bool:
+        """Whether a filter hit Redis cannot confirm counts as revoked.
+
+        Always once loaded; an unloaded filter hits on everything, so it
+        only does for its first ``unloaded_fail_closed_seconds``.
+        """
+        return (
+            self.loaded
+            or self._clock() - self._created_at < self.unloaded_fail_closed_seconds
+        )
+
+    def maybe_sync(self) -> None:
+        if self._claim_sync():
+            threading.Thread(target=self.sync, name="revocation-sync", daemon=True).start()
+
+    def add(self, item: str) -> None:
+        with self._lock:
+            self._filter.add(item)
+            self._recent.append((self._clock(), item))
+
+    def might_contain(self, item: str) -> bool:
+        self.maybe_sync()
+        return not self.loaded or item in self._filter
+
+
+revocations = RevocationFilter(
+    capacity=settings.revocation_bloom_capacity,
+    error_rate=settings.revocation_bloom_error_rate,
+    sync_interval_seconds=settings.revocation_sync_interval_seconds,
+    unloaded_fail_closed_seconds=settings.revocation_unloaded_fail_closed_seconds,
+)
+
+
+def _index_key() -> str:
+    return cache_key("revoked")
+
+
+def _token_member(jti: str) -> str:
+    return f"jti:{jti}"
+
+
+def _user_member(user_id: int | str) -> str:
+    return f"user:{user_id}"
+
+
+def _record(member: str, value: Any, ttl_seconds: int) -> None:
+    try:
+        pipeline = redis_client.pipeline()
+        pipeline.set(cache_key("revoked", member), value, ex=ttl_seconds)
+        pipeline.zadd(_index_key(), {member: time.time() + ttl_seconds})
+        pipeline.execute()
+    except redis.RedisError as exc:
+        logger.warning("Token revocation failed: %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token revocation is unavailable, try again later",
+        )
+    revocations.add(member)
+
+
+def revoke_token(payload: Dict[str, Any]) -> None:
+    """Revoke one decoded token until it expires."""
+    jti, expires_at = payload.get("jti"), payload.get("exp")
+    if jti is None or expires_at is None:
+        return
+    ttl_seconds = math.ceil(expires_at - time.time())
+    if ttl_seconds > 0:
+        _record(_token_member(jti), 1, ttl_seconds)
+
+
+def revoke_all_for_user(user_id: int) -> None:
+    """Revoke every token issued to a user up to now."""
+    # Long enough to outlive any token issued before now
+    ttl_seconds = settings.refresh_token_expires_minutes * 60
+    _record(_user_member(user_id), time.time(), ttl_seconds)
+
+
+def _candidates(payload: Dict[str, Any]) -> list[str]:
+    """Revocation entries that may apply to a token, per the filter."""
+    members = []
+    jti = payload.get("jti")
+    if jti is not None and revocations.might_contain(_token_member(jti)):
+        members.append(_token_member(jti))
+    user_id = payload.get("sub")
+    if user_id is not None and revocations.might_contain(_user_member(user_id)):
+        members.append(_user_member(user_id))
+    return members
+
+
+def _confirmed(payload: Dict[str, Any], members: list[str], values: list[Any]) -> bool:
+    for member, value in zip(members, values):
+        if value is None:
+            continue
+        if member.startswith("jti:"):
+            return True
+        # Tokens minted before the iat claim existed count as issued at 0
+        if float(payload.get("iat", 0)) < float(value):
+            return True
+    return False
+
+
+def is_revoked(payload: Dict[str, Any]) -> bool:
+    """Whether a decoded, otherwise valid token has been revoked.
+
+    Filter hits are confirmed in Redis; if Redis is unavailable they are
+    treated as revoked, except by a filter that has been unloaded for
+    longer than its fail-closed window (see the module docstring).
+    """
+    members = _candidates(payload)
+    if not members:
+        return False
+    try:
+        values = redis_client.mget([cache_key("revoked", member) for member in members])
+    except redis.RedisError as exc:
+        logger.warning("Token revocation check failed: %s", exc)
+        return revocations.fails_closed()
+    return _confirmed(payload, members, values)
+
+
+async def is_revoked_async(payload: Dict[str, Any]) -> bool:
+    """Async counterpart of :func:`is_revoked` for ``async def`` routes."""
+    members = _candidates(payload)
+    if not members:
+        return False
+    try:
+        values = await get_async_redis().mget(
+            [cache_key("revoked", member) for member in members]
+        )
+    except redis.RedisError as exc:
+        logger.warning("Token revocation check failed: %s", exc)
+        return revocations.fails_closed()
+    return _confirmed(payload, members, values)
+
+
+__all__ = [
+    "BloomFilter",
+    "RevocationFilter",
+    "is_revoked",
+    "is_revoked_async",
+    "revoke_all_for_user",
+    "revoke_token",
+    "revocations",
+]
@@ -1,23 +1,40 @@
 """Security utilities for authentication and authorization."""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Callable, Dict
 import bcrypt
 import jwt
 import secrets
+from fastapi import HTTPException, status
 from .config import settings
+from .pool import PoolStats
+
+
+def _with_token_id(data: Dict[str, Any]) -> Dict[str, Any]:
+    # jti lets a single token be revoked; the sub-second iat orders tokens
+    # against a user's "revoke all" time
+    return {**data, "jti": uuid.uuid4().hex, "iat": time.time()}
 
 
 def create_access_token(data: Dict[str, Any]) -> str:
     """Create JWT access token."""
-    to_encode = data.copy()
+    to_encode = _with_token_id(data)
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.access_token_expires_minutes)
-    to_encode.update({"exp": expire, "type": "access"})
+    # Callers may mint other short-lived types (e.g. "confirm") with it
+    to_encode.setdefault("type", "access")
+    to_encode["exp"] = expire
     return jwt.encode(to_encode, settings.secret_key, algorithm="HS256")
 
 
 def create_refresh_token(data: Dict[str, Any]) -> str:
     """Create JWT refresh token."""
-    to_encode = data.copy()
+    to_encode = _with_token_id(data)
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.refresh_token_expires_minutes)
     to_encode.update({"exp": expire, "type": "refresh"})
     return jwt.encode(to_encode, settings.secret_key, algorithm="HS256")
@@ -34,14 +51,130 @@ def verify_token(token: str, token_type: str = "access") -> Dict[str, Any] | Non
         return None
 
 
+# bcrypt is CPU-bound for ~0.25s at cost 12. It runs in a small process
+# pool so that a burst of logins cannot tie up the request threadpool (async
+# callers just await the result) or the GIL. At most
+# password_hash_max_pending jobs may be queued or running; more are refused
+# with 503 rather than piling up.
+_hash_executor: ProcessPoolExecutor | None = None
+_hash_executor_pid: int | None = None
+_hash_lock = threading.Lock()
+_hash_pending = 0
+hash_stats = PoolStats()
+
+
+def _hashpw(password: bytes, rounds: int) -> tuple[str, float]:
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode("utf-8")
+    return hashed, time.perf_counter() - started
+
+
+def _checkpw(password: bytes, hashed: bytes) -> tuple[bool, float]:
+    started = time.perf_counter()
+    try:
+        matches = bcrypt.checkpw(password, hashed)
+    except ValueError:
+        # Not a bcrypt hash
+        matches = False
+    return matches, time.perf_counter() - started
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _hash_executor, _hash_executor_pid
+    # Called with _hash_lock held. A forked child (Celery, gunicorn) starts
+    # its own pool; a pool whose worker died is replaced.
+    if (
+        _hash_executor is None
+        or _hash_executor_pid != os.getpid()
+        or getattr(_hash_executor, "_broken", False)
+    ):
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=settings.password_hash_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        _hash_executor_pid = os.getpid()
+    return _hash_executor
+
+
+def _submit(fn: Callable[..., tuple[Any, float]], *args: Any) -> Future:
+    """Queue a bcrypt job; its wait for a free worker is recorded in
+    ``hash_stats`` and rejected submissions count as timeouts."""
+    global _hash_pending
+    with _hash_lock:
+        if _hash_pending >= settings.password_hash_max_pending:
+            hash_stats.record(0.0, timed_out=True)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in attempts in progress, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _hash_pending += 1
+        executor = _executor()
+    submitted = time.perf_counter()
+
+    def done(future: Future) -> None:
+        global _hash_pending
+        with _hash_lock:
+            _hash_pending -= 1
+        if not future.cancelled() and future.exception() is None:
+            _, work_seconds = future.result()
+            hash_stats.record(max(time.perf_counter() - submitted - work_seconds, 0.0))
+
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        with _hash_lock:
+            _hash_pending -= 1
+        raise
+    future.add_done_callback(done)
+    return future
+
+
 def hash_password(password: str) -> str:
-    """Hash password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Hash password using bcrypt at the configured cost."""
+    future = _submit(_hashpw, password.encode("utf-8"), settings.bcrypt_rounds)
+    return future.result()[0]
 
 
 def verify_password(password: str, hashed_password: str) -> bool:
     """Verify password against hash."""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    future = _submit(_checkpw, password.encode("utf-8"), hashed_password.encode("utf-8"))
+    return future.result()[0]
+
+
+async def hash_password_async(password: str) -> str:
+    """Async counterpart of :func:`hash_password` for ``async def`` routes."""
+    future = _submit(_hashpw, password.encode("utf-8"), settings.bcrypt_rounds)
+    return (await asyncio.wrap_future(future))[0]
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """Async counterpart of :func:`verify_password` for ``async def`` routes."""
+    future = _submit(_checkpw, password.encode("utf-8"), hashed_password.encode("utf-8"))
+    return (await asyncio.wrap_future(future))[0]
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash was made at a cost other than ``bcrypt_rounds``."""
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.bcrypt_rounds
+
+
+def password_hash_metrics() -> Dict[str, Any]:
+    """Queue wait times and current load of the password hashing pool."""
+    with _hash_lock:
+        pending = _hash_pending
+    return {
+        "workers": settings.password_hash_workers,
+        "max_pending": settings.password_hash_max_pending,
+        "pending": pending,
+        "bcrypt_rounds": settings.bcrypt_rounds,
+        **hash_stats.snapshot(),
+    }
+
 
 def generate_otp_code() -> str:
     """Generate 6 digits code to verify email"""
@@ -1,73 +1,148 @@
+"""MinIO / S3 object storage for uploaded images.
+
+One client per process holds a urllib3 connection pool to MinIO, so
+uploads reuse connections and the cached bucket region. The bucket and its
+public-read policy are set up once, on first use; after that an upload is a
+single PUT.
+
+Uploads are streamed from the spooled request file without learning their
+length first: files up to ``minio_part_size_bytes`` go up in one PUT,
+larger ones as a multipart upload holding one part in memory at a time.
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+
+import certifi
 import minio
+import urllib3
+from fastapi import HTTPException, UploadFile, status
 from minio.error import S3Error
+
 from .config import get_settings
-import uuid
-from fastapi import UploadFile
-from pathlib import Path
-import json
+
+logger = logging.getLogger(__name__)
 
 # load setting from pre-defined configs
 settings = get_settings()
 
-# create Minio client
-def get_minio_client():
-    client = minio.Minio(
-        endpoint=settings.minio_endpoint,
-        access_key=settings.minio_access_key,
-        secret_key=settings.minio_secret_key,
-        secure=False # add this cause we are using http
-    )
+_client: minio.Minio | None = None
+_client_pid: int | None = None
+_bucket_ready = False
+_lock = threading.Lock()
 
-    return client
 
-def _ensure_bucket(client: minio.Minio, bucket_name: str):
-    # ensure the bucket exist. If not then create a new one.
-    if not client.bucket_exists(bucket_name):
-        client.make_bucket(bucket_name)
-        print(f"Created bucket name: {bucket_name}")
-        
-        # Set bucket policy to public read
-        policy = {
+def _public_read_policy(bucket_name: str) -> str:
+    return json.dumps(
+        {
             "Version": "2012-10-17",
             "Statement": [
                 {
                     "Effect": "Allow",
                     "Principal": {"AWS": "*"},
                     "Action": ["s3:GetObject"],
-                    "Resource": [f"arn:aws:s3:::{bucket_name}/*"]
+                    "Resource": [f"arn:aws:s3:::{bucket_name}/*"],
                 }
-            ]
+            ],
         }
+    )
+
+
+def _http_client() -> urllib3.PoolManager:
+    return urllib3.PoolManager(
+        maxsize=settings.minio_pool_maxsize,
+        timeout=urllib3.Timeout(
+            connect=settings.minio_connect_timeout_seconds,
+            read=settings.minio_read_timeout_seconds,
+        ),
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(
+            total=settings.minio_max_retries,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+    )
+
+
+def get_minio_client() -> minio.Minio:
+    """The process-wide MinIO client (a forked child builds its own)."""
+    global _client, _client_pid
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = minio.Minio(
+                endpoint=settings.minio_endpoint,
+                access_key=settings.minio_access_key,
+                secret_key=settings.minio_secret_key,
+                secure=settings.minio_secure,
+                region=settings.minio_region or None,
+                http_client=_http_client(),
+            )
+            _client_pid = os.getpid()
+        return _client
+
+
+def _ensure_bucket(client: minio.Minio, bucket_name: str):
+    """Create the bucket if needed and make it public-read, once per process.
+
+    Failures are not remembered, so the next upload tries again.
+    """
+    global _bucket_ready
+    if _bucket_ready:
+        return
+    with _lock:
+        if _bucket_ready:
+            return
+        if not client.bucket_exists(bucket_name):
+            client.make_bucket(bucket_name)
+            logger.info("Created bucket %s", bucket_name)
         try:
-            client.set_bucket_policy(bucket_name, json.dumps(policy))
-            print(f"Bucket {bucket_name} set to public read")
-        except S3Error as e:
-            print(f"Error setting bucket policy: {e}")
-    else:
-        print(f"Bucket {bucket_name} existed!")
-        # Đảm bảo policy được set ngay cả khi bucket đã tồn tại
-        try:
-            policy = {
-                "Version": "2012-10-17",
-                "Statement": [
-                    {
-                        "Effect": "Allow",
-                        "Principal": {"AWS": "*"},
-                        "Action": ["s3:GetObject"],
-                        "Resource": [f"arn:aws:s3:::{bucket_name}/*"]
-                    }
-                ]
-            }
-            client.set_bucket_policy(bucket_name, json.dumps(policy))
+            client.set_bucket_policy(bucket_name, _public_read_policy(bucket_name))
         except S3Error as e:
-            print(f"Warning: Could not set bucket policy: {e}")
+            logger.warning("Could not set policy of bucket %s: %s", bucket_name, e)
+        _bucket_ready = True
+
+
+class UploadTooLarge(Exception):
+    """The upload grew past ``upload_max_bytes`` while being streamed."""
+
+
+class _LimitedReader:
+    """File wrapper that fails once more than ``limit`` bytes are read."""
+
+    def __init__(self, file, limit: int):
+        self._file = file
+        self._limit = limit
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._file.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self._limit:
+            raise UploadTooLarge(f"upload exceeds {self._limit} bytes")
+        return chunk
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the maximum upload size of {settings.upload_max_bytes} bytes",
+    )
+
 
 def upload_file(client: minio.Minio, file: UploadFile, folder, old_url: str):
-    _ensure_bucket(client, settings.minio_bucket)
+    """Stream an upload into the bucket and return its public URL, or None
+    if storing it failed. Raises 413 once it exceeds ``upload_max_bytes``;
+    the replaced object ``old_url`` is only deleted after a successful
+    upload."""
+    # Declared sizes are checked up front, actual bytes while streaming
+    if file.size is not None and file.size > settings.upload_max_bytes:
+        raise _too_large()
 
-    if old_url:
-        object_name = old_url.split(f"{settings.minio_bucket}/")[-1]
-        delete_file(client, object_name)
+    _ensure_bucket(client, settings.minio_bucket)
 
     file_extension = Path(file.filename).suffix
 
@@ -75,27 +150,29 @@ def upload_file(client: minio.Minio, file: UploadFile, folder, old_url: str):
     object_name = f"{folder}/{uuid.uuid4()}{file_extension}"
 
     try:
-        # Read file content to get size
-        file_content = file.file.read()
-        file_size = len(file_content)
-
-        # Reset file pointer to beginning
-        file.file.seek(0)
-
         client.put_object(
             bucket_name=settings.minio_bucket,
             object_name=object_name,
-            data=file.file,
-            length=file_size,
+            data=_LimitedReader(file.file, settings.upload_max_bytes),
+            length=-1,
+            part_size=settings.minio_part_size_bytes,
+            # One part in memory at a time
+            num_parallel_uploads=1,
             content_type=file.content_type
         )
-        print("Uploading file successfully!")
-
-        return {"public_url": f"{settings.minio_public_url}/{settings.minio_bucket}/{object_name}"}
+    except UploadTooLarge:
+        # An unfinished multipart upload has been aborted by put_object
+        raise _too_large()
     except Exception as e:
-        print(f"Error while uploading file: {e}")
+        logger.error("Error while uploading file: %s", e)
         return None
 
+    if old_url:
+        delete_url(client, old_url)
+
+    return {"public_url": f"{settings.minio_public_url}/{settings.minio_bucket}/{object_name}"}
+
+
 def delete_file(client: minio.Minio, object_name):
     try:
         client.remove_object(
@@ -104,4 +181,9 @@ def delete_file(client: minio.Minio, object_name):
         )
 
     except Exception as e:
-        print(f"Error while deleting file: {e}")
\ No newline at end of file
+        logger.error("Error while deleting file: %s", e)
+
+
+def delete_url(client: minio.Minio, public_url: str):
+    """Delete the object behind a URL returned by :func:`upload_file`."""
+    delete_file(client, public_url.split(f"{settings.minio_bucket}/")[-1])
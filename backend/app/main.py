@@ -7,7 +7,9 @@ from starlette.requests import Request
 from starlette.responses import Response
 
 from app.core.config import settings, settings_summary
-from app.core.database import engine
+from app.core.database import engine, pool_metrics
+from app.core.redis import redis_pool_metrics
+from app.core.security import password_hash_metrics
 from app.api import api_router
 
 from app.models import *
@@ -70,6 +72,21 @@ def create_app() -> FastAPI:
         """Expose non-sensitive settings for debugging."""
         return {key: str(value) for key, value in settings_summary().items()}
 
+    @app.get("/metrics/db-pool", tags=["info"], summary="Database pool metrics")
+    def get_db_pool_metrics() -> dict[str, dict]:
+        """Expose checkout wait time, checked-out and overflow connections."""
+        return pool_metrics()
+
+    @app.get("/metrics/redis-pool", tags=["info"], summary="Redis pool metrics")
+    def get_redis_pool_metrics() -> dict[str, dict]:
+        """Expose checkout wait time, in-use and idle Redis connections."""
+        return redis_pool_metrics()
+
+    @app.get("/metrics/password-hashing", tags=["info"], summary="Password hashing pool metrics")
+    def get_password_hash_metrics() -> dict:
+        """Expose queue wait time and load of the bcrypt worker pool."""
+        return password_hash_metrics()
+
     return app
 
 
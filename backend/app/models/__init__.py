@@ -2,10 +2,11 @@
 from .base import Base
 from .user import User
 from .group import Group, GroupMember
-from .food import Category, Unit, Food, FridgeItem
+from .food import Category, Unit, Food, FridgeItem, FridgeExpirySummary
 from .shopping import ShoppingList, ShoppingTask
 from .meal_plan import MealPlan
 from .recipe import Recipe
+from .analytics import DailySpending, DailyCategorySpending, SpendingForecast
 
 __all__ = [
     "Base",
@@ -16,8 +17,12 @@ __all__ = [
     "Unit",
     "Food",
     "FridgeItem",
+    "FridgeExpirySummary",
     "ShoppingList",
     "ShoppingTask",
     "MealPlan",
     "Recipe",
+    "DailySpending",
+    "DailyCategorySpending",
+    "SpendingForecast",
 ]
\ No newline at end of file
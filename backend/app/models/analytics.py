@@ -0,0 +1,54 @@
+"""Pre-aggregated analytics rollups.
+
+Rows are keyed by the UTC day a shopping list was created on. The shopping
+write paths shift them in the same transaction as the change they summarise
+(see ``app.services.analytics``), and a nightly job rebuilds them from the
+raw tables to correct any drift.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+from sqlalchemy import JSON, Date, DateTime, ForeignKey, Integer, Numeric, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class DailySpending(Base):
+    """Completed shopping lists of a group per day."""
+
+    __tablename__ = "daily_spending"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    spend: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
+    budget: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
+    list_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class DailyCategorySpending(Base):
+    """Shopping tasks of a group per day and food category."""
+
+    __tablename__ = "daily_category_spending"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    category_id: Mapped[int] = mapped_column(
+        ForeignKey("categories.id"), primary_key=True
+    )
+    spend: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
+    item_count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class SpendingForecast(Base):
+    """Nightly precomputed spending forecast of a group (see
+    ``app.services.forecast``)."""
+
+    __tablename__ = "spending_forecasts"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"), primary_key=True)
+    as_of: Mapped[date] = mapped_column(Date)
+    data: Mapped[dict[str, Any]] = mapped_column(JSON)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -2,17 +2,21 @@
 
 from datetime import date, datetime
 from decimal import Decimal
+from typing import Any
 
 from sqlalchemy import (
+    JSON,
     Boolean,
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
     func,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -45,6 +49,17 @@ class Unit(Base):
 
 class Food(Base):
     __tablename__ = "foods"
+    __table_args__ = (
+        # GET /food/: active foods of a group, keyset-ordered by name
+        Index(
+            "ix_foods_group_id_name_active",
+            "group_id",
+            "name",
+            "id",
+            postgresql_where=text("is_active = true"),
+            sqlite_where=text("is_active = 1"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100))
@@ -70,6 +85,15 @@ class Food(Base):
 
 class FridgeItem(Base):
     __tablename__ = "fridge_items"
+    __table_args__ = (
+        # GET /fridge/ keyset order and the expiring-soon range count
+        Index(
+            "ix_fridge_items_group_id_use_within_date",
+            "group_id",
+            "use_within_date",
+            "id",
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     food_id: Mapped[int] = mapped_column(ForeignKey("foods.id"))
@@ -90,3 +114,22 @@ class FridgeItem(Base):
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
     )
+
+
+class FridgeExpirySummary(Base):
+    """Expired and soon-expiring fridge items of a group, written by the
+    scheduled expiry scan so readers do not have to scan ``fridge_items``."""
+
+    __tablename__ = "fridge_expiry_summaries"
+
+    group_id: Mapped[int] = mapped_column(ForeignKey("groups.id"), primary_key=True)
+    as_of: Mapped[date] = mapped_column(Date)
+    expired_count: Mapped[int] = mapped_column(Integer, default=0)
+    expiring_count: Mapped[int] = mapped_column(Integer, default=0)
+    expired_value: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
+    expiring_value: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0)
+    # The earliest items, expired first: id, foodId, foodName, useWithinDate
+    items: Mapped[list[dict[str, Any]]] = mapped_column(JSON, default=list)
+    computed_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
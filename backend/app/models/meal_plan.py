@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Numeric, String, Text, func
+from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Index, Numeric, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -9,6 +9,10 @@ from .base import Base
 
 class MealPlan(Base):
     __tablename__ = "meal_plans"
+    __table_args__ = (
+        # GET /meal-plans/ date range filter and keyset order
+        Index("ix_meal_plans_group_id_meal_date", "group_id", "meal_date", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     food_id: Mapped[int] = mapped_column(ForeignKey("foods.id"))
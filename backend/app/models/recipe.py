@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -8,6 +8,10 @@ from .base import Base
 
 class Recipe(Base):
     __tablename__ = "recipes"
+    __table_args__ = (
+        # GET /recipes/ keyset order (newest first)
+        Index("ix_recipes_group_id_created_at", "group_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(200))
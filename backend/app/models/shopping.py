@@ -1,7 +1,18 @@
 """Shopping-related database models."""
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import Boolean, Date, DateTime, ForeignKey, Numeric, String, Text, func
+from sqlalchemy import (
+    Boolean,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+    Text,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -9,6 +20,18 @@ from .base import Base
 
 class ShoppingList(Base):
     __tablename__ = "shopping_lists"
+    __table_args__ = (
+        # GET /shopping/list/ keyset order (newest first)
+        Index("ix_shopping_lists_group_id_created_at", "group_id", "created_at", "id"),
+        # Analytics aggregates over a group's completed lists
+        Index(
+            "ix_shopping_lists_group_id_completed",
+            "group_id",
+            "created_at",
+            postgresql_where=text("status = 'completed'"),
+            sqlite_where=text("status = 'completed'"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(100))
@@ -28,6 +51,7 @@ class ShoppingList(Base):
 
 class ShoppingTask(Base):
     __tablename__ = "shopping_tasks"
+    __table_args__ = (Index("ix_shopping_tasks_list_id", "list_id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     list_id: Mapped[int] = mapped_column(ForeignKey("shopping_lists.id", ondelete="CASCADE"))
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from datetime import date
 from decimal import Decimal
 
 from .base import BaseResponse
@@ -10,6 +11,13 @@ class MonthlySpendingResponse(BaseResponse):
     budgets: list[float]
 
 
+class SpendingResponse(BaseResponse):
+    granularity: str
+    periods: list[str]
+    amounts: list[float]
+    budgets: list[float]
+
+
 class CategoryData(BaseModel):
     name: str
     amount: float
@@ -32,3 +40,29 @@ class AnalyticsSummaryResponse(BaseResponse):
     expiring_soon_count: int = Field(..., alias="expiringSoonCount")
 
     model_config = {"populate_by_name": True, "by_alias": True}
+
+
+class CategoryForecastData(BaseModel):
+    name: str
+    last_week_spend: float = Field(..., alias="lastWeekSpend")
+    weekly_average: float = Field(..., alias="weeklyAverage")
+    is_anomaly: bool = Field(..., alias="isAnomaly")
+
+    model_config = {"populate_by_name": True}
+
+
+class SpendingForecastResponse(BaseResponse):
+    as_of: date | None = Field(None, alias="asOf")
+    moving_average_7d: float = Field(..., alias="movingAverage7d")
+    moving_average_30d: float = Field(..., alias="movingAverage30d")
+    last_month_spend: float = Field(..., alias="lastMonthSpend")
+    previous_month_spend: float = Field(..., alias="previousMonthSpend")
+    # Percent change of last month over the one before; None without a baseline
+    month_over_month_change: float | None = Field(None, alias="monthOverMonthChange")
+    month_to_date_spend: float = Field(..., alias="monthToDateSpend")
+    projected_month_spend: float = Field(..., alias="projectedMonthSpend")
+    month_budget: float = Field(..., alias="monthBudget")
+    projected_over_budget: bool = Field(..., alias="projectedOverBudget")
+    categories: list[CategoryForecastData]
+
+    model_config = {"populate_by_name": True, "by_alias": True}
@@ -1,4 +1,6 @@
 """Authentication-related schemas for login, register, token refresh, and email verification."""
+from typing import Optional
+
 from pydantic import BaseModel, EmailStr, Field
 
 from .base import BaseResponse, UserData
@@ -64,8 +66,9 @@ class SendVerificationCodeResponse(BaseResponse):
 
 # Logout endpoint schemas
 class LogoutRequest(BaseModel):
-    """Request body for logout (empty, uses Authorization header)."""
-    pass
+    """Optional request body for logout; the access token comes from the
+    Authorization header."""
+    refresh_token: Optional[str] = Field(None, alias="refreshToken")
 
 
 class LogoutResponse(BaseResponse):
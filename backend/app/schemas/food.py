@@ -61,6 +61,7 @@ class GetAllFoodsResponse(BaseResponse):
     """Response for getting all foods."""
 
     foods: list[FoodData]
+    next_cursor: str | None = Field(None, alias="nextCursor")
 
 
 # Edit food endpoint schemas
@@ -68,6 +68,7 @@ class GetFridgeItemsRequest(BaseModel):
 
 class GetFridgeItemsResponse(BaseResponse):
     fridge_items: list[FridgeItemData] = Field(..., alias="fridgeItems")
+    next_cursor: str | None = Field(None, alias="nextCursor")
 
     model_config = {"by_alias": True, "populate_by_name": True}
 
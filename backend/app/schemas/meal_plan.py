@@ -51,6 +51,7 @@ class GetMealPlansRequest(BaseModel):
 
 class GetMealPlansResponse(BaseResponse):
     meal_plans: list[MealPlanData] = Field(..., alias="mealPlans")
+    next_cursor: str | None = Field(None, alias="nextCursor")
 
     model_config = {"by_alias": True, "populate_by_name": True}
 
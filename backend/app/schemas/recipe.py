@@ -38,6 +38,7 @@ class GetRecipesRequest(BaseModel):
 
 class GetRecipesResponse(BaseResponse):
     recipes: list[RecipeData]
+    next_cursor: str | None = Field(None, alias="nextCursor")
 
     model_config = {"by_alias": True, "populate_by_name": True}
 
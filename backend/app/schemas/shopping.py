@@ -70,6 +70,7 @@ class GetShoppingListsRequest(BaseModel):
 
 class GetShoppingListsResponse(BaseResponse):
     shopping_lists: list[ShoppingListData] = Field(..., alias="shoppingLists")
+    next_cursor: str | None = Field(None, alias="nextCursor")
 
     model_config = {"by_alias": True, "populate_by_name": True}
 
@@ -101,6 +102,19 @@ class UpdateShoppingListResponse(BaseResponse):
     model_config = {"by_alias": True, "populate_by_name": True}
 
 
+class CompleteShoppingListRequest(BaseModel):
+    id: int = Field(..., gt=0)
+    location: str | None = Field(None, max_length=50)
+    purchase_date: date | None = Field(None, alias="purchaseDate")
+
+
+class CompleteShoppingListResponse(BaseResponse):
+    shopping_list: ShoppingListData = Field(..., alias="shoppingList")
+    fridge_items_added: int = Field(..., alias="fridgeItemsAdded")
+
+    model_config = {"by_alias": True, "populate_by_name": True}
+
+
 class DeleteShoppingListRequest(BaseModel):
     id: int = Field(..., gt=0)
 
@@ -122,7 +136,8 @@ class TaskInput(BaseModel):
 
 class CreateShoppingTasksRequest(BaseModel):
     list_id: int = Field(..., gt=0, alias="listId")
-    tasks: list[TaskInput]
+    # Large enough for importing a whole list in one request
+    tasks: list[TaskInput] = Field(..., max_length=1000)
 
 
 class CreateShoppingTasksResponse(BaseResponse):
@@ -142,6 +157,23 @@ class UpdateShoppingTaskResponse(BaseResponse):
     task: ShoppingTaskData
 
 
+class TaskCheckInput(BaseModel):
+    task_id: int = Field(..., gt=0, alias="taskId")
+    is_done: bool | None = Field(None, alias="isDone")
+    actual_cost: Decimal | None = Field(None, ge=0, alias="actualCost")
+
+    model_config = {"populate_by_name": True}
+
+
+class BulkUpdateShoppingTasksRequest(BaseModel):
+    list_id: int = Field(..., gt=0, alias="listId")
+    tasks: list[TaskCheckInput] = Field(..., min_length=1, max_length=500)
+
+
+class BulkUpdateShoppingTasksResponse(BaseResponse):
+    tasks: list[ShoppingTaskData]
+
+
 class DeleteShoppingTaskRequest(BaseModel):
     task_id: int = Field(..., gt=0, alias="taskId")
 
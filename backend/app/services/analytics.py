@@ -0,0 +1,289 @@
+"""Maintenance and bucketing of the spending rollup tables."""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Sequence
+
+from sqlalchemy import Date, cast, delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models import (
+    DailyCategorySpending,
+    DailySpending,
+    Food,
+    ShoppingList,
+    ShoppingTask,
+)
+
+GRANULARITIES = ("day", "week", "month", "year")
+
+
+def rollup_day(created_at: datetime) -> date:
+    """UTC day a shopping list with this ``created_at`` is rolled up under."""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def _rollup_day_expression(db: Session, created_at):
+    """SQL counterpart of :func:`rollup_day`."""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.timezone("UTC", created_at), Date)
+    return func.date(created_at)
+
+
+def dialect_insert(db: Session, model):
+    """INSERT with ``ON CONFLICT`` support for the session's dialect."""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+# First key of the per-group advisory locks taken on rollup writes
+_ROLLUP_LOCK = 0x726F6C6C
+
+
+def lock_group_rollups(db: Session, group_ids: Iterable[int]) -> None:
+    """Serialise rollup writes of some groups until the transaction ends.
+
+    Incremental shifts take it per write and a rebuild for its whole batch,
+    so a delta can never land between a rebuild's delete and re-insert.
+    Other dialects serialise writers anyway and take no lock.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for group_id in sorted(set(group_ids)):
+        db.execute(select(func.pg_advisory_xact_lock(_ROLLUP_LOCK, group_id)))
+
+
+def list_spending(shopping_list: ShoppingList) -> tuple[Decimal, Decimal, int]:
+    """``(spend, budget, lists)`` a list contributes to ``daily_spending``."""
+    if shopping_list.status != "completed":
+        return Decimal("0"), Decimal("0"), 0
+    return shopping_list.total_cost or Decimal("0"), shopping_list.budget or Decimal("0"), 1
+
+
+def shift_daily_spending(
+    db: Session,
+    group_id: int,
+    day: date,
+    spend: Decimal = Decimal("0"),
+    budget: Decimal = Decimal("0"),
+    lists: int = 0,
+) -> None:
+    """Add deltas to one ``daily_spending`` row, creating it if needed.
+
+    The addition is an atomic upsert so concurrent writers cannot lose each
+    other's updates. The caller commits.
+    """
+    if not (spend or budget or lists):
+        return
+    lock_group_rollups(db, [group_id])
+    statement = dialect_insert(db, DailySpending).values(
+        group_id=group_id, day=day, spend=spend, budget=budget, list_count=lists
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[DailySpending.group_id, DailySpending.day],
+            set_={
+                "spend": DailySpending.spend + statement.excluded.spend,
+                "budget": DailySpending.budget + statement.excluded.budget,
+                "list_count": DailySpending.list_count + statement.excluded.list_count,
+            },
+        )
+    )
+
+
+def shift_category_spending(
+    db: Session,
+    shopping_list: ShoppingList,
+    changes: Iterable[tuple[int, Decimal, int]],
+) -> None:
+    """Apply ``(food_id, spend delta, item count delta)`` changes of a list.
+
+    Foods are mapped to their category with one query and the changes are
+    written with a single multi-row upsert. Foods without a category are not
+    rolled up. The caller commits.
+    """
+    changes = [change for change in changes if change[1] or change[2]]
+    if not changes:
+        return
+
+    categories = dict(
+        db.execute(
+            select(Food.id, Food.category_id).where(
+                Food.id.in_({food_id for food_id, _, _ in changes})
+            )
+        ).all()
+    )
+    totals = defaultdict(lambda: [Decimal("0"), 0])
+    for food_id, spend, items in changes:
+        category_id = categories.get(food_id)
+        if category_id is not None:
+            totals[category_id][0] += spend
+            totals[category_id][1] += items
+    if not totals:
+        return
+
+    lock_group_rollups(db, [shopping_list.group_id])
+    day = rollup_day(shopping_list.created_at)
+    statement = dialect_insert(db, DailyCategorySpending).values(
+        [
+            {
+                "group_id": shopping_list.group_id,
+                "day": day,
+                "category_id": category_id,
+                "spend": spend,
+                "item_count": items,
+            }
+            for category_id, (spend, items) in sorted(totals.items())
+        ]
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[
+                DailyCategorySpending.group_id,
+                DailyCategorySpending.day,
+                DailyCategorySpending.category_id,
+            ],
+            set_={
+                "spend": DailyCategorySpending.spend + statement.excluded.spend,
+                "item_count": DailyCategorySpending.item_count
+                + statement.excluded.item_count,
+            },
+        )
+    )
+
+
+def remove_list_spending(db: Session, shopping_list: ShoppingList) -> None:
+    """Take a list and all of its tasks out of the rollups before deleting it."""
+    spend, budget, lists = list_spending(shopping_list)
+    shift_daily_spending(
+        db,
+        shopping_list.group_id,
+        rollup_day(shopping_list.created_at),
+        -spend,
+        -budget,
+        -lists,
+    )
+    tasks = db.execute(
+        select(ShoppingTask.food_id, ShoppingTask.actual_cost).where(
+            ShoppingTask.list_id == shopping_list.id
+        )
+    )
+    shift_category_spending(
+        db,
+        shopping_list,
+        [(food_id, -(actual_cost or Decimal("0")), -1) for food_id, actual_cost in tasks],
+    )
+
+
+def rebuild_spending_rollups(db: Session, group_ids: Sequence[int]) -> None:
+    """Recompute the rollups of some groups from the raw shopping tables.
+
+    The caller commits; doing so per batch of groups keeps each rebuild
+    short. Until then the groups' rollup lock holds off concurrent shifts,
+    which apply their delta to the rebuilt rows afterwards.
+    """
+    group_ids = list(group_ids)
+    lock_group_rollups(db, group_ids)
+    db.execute(delete(DailySpending).where(DailySpending.group_id.in_(group_ids)))
+    db.execute(
+        delete(DailyCategorySpending).where(
+            DailyCategorySpending.group_id.in_(group_ids)
+        )
+    )
+
+    list_day = _rollup_day_expression(db, ShoppingList.created_at)
+    db.execute(
+        dialect_insert(db, DailySpending)
+        .from_select(
+            ["group_id", "day", "spend", "budget", "list_count"],
+            select(
+                ShoppingList.group_id,
+                list_day,
+                func.coalesce(func.sum(ShoppingList.total_cost), 0),
+                func.coalesce(func.sum(ShoppingList.budget), 0),
+                func.count(),
+            )
+            .where(
+                ShoppingList.group_id.in_(group_ids),
+                ShoppingList.status == "completed",
+            )
+            .group_by(ShoppingList.group_id, list_day),
+        )
+    )
+    db.execute(
+        dialect_insert(db, DailyCategorySpending)
+        .from_select(
+            ["group_id", "day", "category_id", "spend", "item_count"],
+            select(
+                ShoppingList.group_id,
+                list_day,
+                Food.category_id,
+                func.coalesce(func.sum(ShoppingTask.actual_cost), 0),
+                func.count(),
+            )
+            .join(ShoppingList, ShoppingList.id == ShoppingTask.list_id)
+            .join(Food, Food.id == ShoppingTask.food_id)
+            .where(
+                ShoppingList.group_id.in_(group_ids),
+                Food.category_id.is_not(None),
+            )
+            .group_by(ShoppingList.group_id, list_day, Food.category_id),
+        )
+    )
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the day/week/month/year bucket ``day`` falls in."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    if granularity == "year":
+        return day.replace(month=1, day=1)
+    return day
+
+
+def period_label(start: date, granularity: str) -> str:
+    """Label of a bucket: ``2025-01-13`` (day, week), ``2025-01`` or ``2025``."""
+    if granularity == "month":
+        return start.strftime("%Y-%m")
+    if granularity == "year":
+        return start.strftime("%Y")
+    return start.isoformat()
+
+
+def bucket_daily_spending(
+    rows: Iterable[tuple[date, Decimal, Decimal]], granularity: str
+) -> list[tuple[str, Decimal, Decimal]]:
+    """Fold ``(day, spend, budget)`` rows into labelled, ordered buckets."""
+    buckets: dict[date, list[Decimal]] = {}
+    for day, spend, budget in rows:
+        bucket = buckets.setdefault(
+            period_start(day, granularity), [Decimal("0"), Decimal("0")]
+        )
+        bucket[0] += spend
+        bucket[1] += budget
+    return [
+        (period_label(start, granularity), spend, budget)
+        for start, (spend, budget) in sorted(buckets.items())
+    ]
+
+
+__all__ = [
+    "GRANULARITIES",
+    "bucket_daily_spending",
+    "dialect_insert",
+    "list_spending",
+    "lock_group_rollups",
+    "period_label",
+    "period_start",
+    "rebuild_spending_rollups",
+    "remove_list_spending",
+    "rollup_day",
+    "shift_category_spending",
+    "shift_daily_spending",
+]
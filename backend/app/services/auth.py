@@ -1,25 +1,34 @@
 """Authentication service layer."""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
 from ..models import User
 from ..models.group import Group, GroupMember
 from ..schemas.auth import RegisterRequest, LoginRequest
-from ..core.security import hash_password, verify_password, create_access_token, create_refresh_token, generate_otp_code
-from ..core.config import settings
+from ..core.security import (
+    create_access_token,
+    create_refresh_token,
+    generate_otp_code,
+    hash_password_async,
+    password_needs_rehash,
+    verify_password_async,
+)
+from ..core import otp
 from ..workers.celery_app import celery_app
 
-import redis
 import secrets
-from datetime import timedelta
-
-redis_client = redis.from_url(settings.redis_url, decode_responses=True)
 
 
 class AuthService:
     @staticmethod
-    def register_user(db: Session, user_data: RegisterRequest) -> User:
-        """Register a new user."""
+    def validate_registration(db: Session, user_data: RegisterRequest) -> None:
+        """Reject a registration whose email or username is taken.
+
+        Runs before the password is hashed, so rejected sign-ups never
+        occupy the hashing pool.
+        """
         # Check if user already exists
         if db.query(User).filter(User.email == user_data.email).first():
             raise HTTPException(
@@ -33,10 +42,14 @@ class AuthService:
                 detail="Username already taken"
             )
 
+    @staticmethod
+    def register_user(db: Session, user_data: RegisterRequest, password_hash: str) -> User:
+        """Register a new user that passed :meth:`validate_registration`,
+        with the password hashed beforehand, off the request thread."""
         # Create new user
         user = User(
             email=user_data.email,
-            password_hash=hash_password(user_data.password),
+            password_hash=password_hash,
             name=user_data.name,
             username=user_data.user_name,
             is_verified=True  # Bỏ qua xác thực email, set True ngay khi đăng ký
@@ -74,15 +87,25 @@ class AuthService:
         return user
 
     @staticmethod
-    def authenticate_user(db: Session, login_data: LoginRequest) -> User | None:
-        """Authenticate user with email and password."""
-        user = db.query(User).filter(User.email == login_data.email).first()
+    async def authenticate_user(db: AsyncSession, login_data: LoginRequest) -> User | None:
+        """Authenticate user with email and password.
+
+        A password hashed at an outdated bcrypt cost is rehashed at the
+        current one while the plaintext is at hand.
+        """
+        result = await db.execute(select(User).where(User.email == login_data.email))
+        user = result.scalars().first()
         if not user or not user.is_active:
             return None
 
-        if not verify_password(login_data.password, user.password_hash):
+        if not await verify_password_async(login_data.password, user.password_hash):
             return None
 
+        if password_needs_rehash(user.password_hash):
+            user.password_hash = await hash_password_async(login_data.password)
+            await db.commit()
+            await db.refresh(user)
+
         return user
 
     @staticmethod
@@ -102,16 +125,13 @@ class AuthService:
         """Create the OTP code and then send to user's email"""
         otp_code = generate_otp_code()
 
-        redis_client.setex(
-            f"otp:{user.id}",
-            timedelta(minutes=15),
-            otp_code
-        )
+        otp.issue_otp("verify_email", user.id, otp_code)
 
         # add a task to the celery redis queue
         celery_app.send_task(
                 'tasks.send_verification_email',
-                args=[user.email, otp_code]
+                args=[user.email, otp_code],
+                kwargs={"language": user.language}
         )
 
         return otp_code
@@ -0,0 +1,224 @@
+"""Spending forecasts computed with NumPy over the daily rollups.
+
+All groups of a batch are laid out as rows of one ``groups x days`` matrix
+(and one ``(group, category) x weeks`` matrix), so every statistic is a
+single vectorised reduction whatever the batch size. The nightly worker
+stores the results in ``spending_forecasts``; the API serves them from
+there.
+"""
+import calendar
+from datetime import date, timedelta
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..models import Category, DailyCategorySpending, DailySpending, SpendingForecast
+from .analytics import dialect_insert
+
+# Days of history per group; enough to always cover the two previous
+# calendar months in full
+HISTORY_DAYS = 100
+# Weekly buckets per category; the last one is tested against the others
+ANOMALY_WEEKS = 12
+ANOMALY_Z_SCORE = 2.0
+# Weeks with spend a category needs before it can be flagged
+ANOMALY_MIN_ACTIVE_WEEKS = 3
+
+
+def _history_start(today: date) -> date:
+    return today - timedelta(days=HISTORY_DAYS - 1)
+
+
+def _weeks_start(today: date) -> date:
+    return today - timedelta(days=ANOMALY_WEEKS * 7 - 1)
+
+
+def daily_statement(group_ids: Sequence[int], today: date):
+    """``(group_id, day, spend, budget)`` rows a forecast is built from."""
+    return select(
+        DailySpending.group_id,
+        DailySpending.day,
+        DailySpending.spend,
+        DailySpending.budget,
+    ).where(
+        DailySpending.group_id.in_(list(group_ids)),
+        DailySpending.day >= _history_start(today),
+        DailySpending.day <= today,
+    )
+
+
+def category_statement(group_ids: Sequence[int], today: date):
+    """``(group_id, category_id, name, day, spend)`` rows for anomaly flags."""
+    return (
+        select(
+            DailyCategorySpending.group_id,
+            DailyCategorySpending.category_id,
+            Category.name,
+            DailyCategorySpending.day,
+            DailyCategorySpending.spend,
+        )
+        .join(Category, Category.id == DailyCategorySpending.category_id)
+        .where(
+            DailyCategorySpending.group_id.in_(list(group_ids)),
+            DailyCategorySpending.day >= _weeks_start(today),
+            DailyCategorySpending.day <= today,
+        )
+    )
+
+
+def _month_index(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def _optional(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 2)
+
+
+def build_forecasts(
+    group_ids: Sequence[int],
+    daily_rows: Iterable[tuple],
+    category_rows: Iterable[tuple],
+    today: date,
+) -> dict[int, dict[str, Any]]:
+    """Forecast payload of every group, from the rows of the two statements."""
+    group_ids = list(group_ids)
+    row_of = {group_id: index for index, group_id in enumerate(group_ids)}
+    start = _history_start(today)
+
+    spend = np.zeros((len(group_ids), HISTORY_DAYS))
+    budget = np.zeros_like(spend)
+    daily_rows = list(daily_rows)
+    if daily_rows:
+        rows = np.fromiter((row_of[row[0]] for row in daily_rows), int, len(daily_rows))
+        days = np.fromiter(((row[1] - start).days for row in daily_rows), int, len(daily_rows))
+        np.add.at(spend, (rows, days), [float(row[2]) for row in daily_rows])
+        np.add.at(budget, (rows, days), [float(row[3]) for row in daily_rows])
+
+    months = np.array(
+        [_month_index(start + timedelta(days=offset)) for offset in range(HISTORY_DAYS)]
+    )
+    current = _month_index(today)
+    month_to_date = spend[:, months == current].sum(axis=1)
+    last_month = spend[:, months == current - 1].sum(axis=1)
+    previous_month = spend[:, months == current - 2].sum(axis=1)
+    month_budget = budget[:, months == current].sum(axis=1)
+
+    moving_average_7 = spend[:, -7:].mean(axis=1)
+    moving_average_30 = spend[:, -30:].mean(axis=1)
+    remaining_days = calendar.monthrange(today.year, today.month)[1] - today.day
+    projected = month_to_date + moving_average_30 * remaining_days
+    with np.errstate(divide="ignore", invalid="ignore"):
+        month_over_month = np.where(
+            previous_month > 0,
+            (last_month - previous_month) / previous_month * 100,
+            np.nan,
+        )
+
+    categories = _category_flags(row_of, category_rows, today)
+
+    return {
+        group_id: {
+            "as_of": today.isoformat(),
+            "moving_average_7d": round(float(moving_average_7[index]), 2),
+            "moving_average_30d": round(float(moving_average_30[index]), 2),
+            "last_month_spend": round(float(last_month[index]), 2),
+            "previous_month_spend": round(float(previous_month[index]), 2),
+            "month_over_month_change": _optional(month_over_month[index]),
+            "month_to_date_spend": round(float(month_to_date[index]), 2),
+            "projected_month_spend": round(float(projected[index]), 2),
+            "month_budget": round(float(month_budget[index]), 2),
+            "projected_over_budget": bool(
+                month_budget[index] > 0 and projected[index] > month_budget[index]
+            ),
+            "categories": categories.get(group_id, []),
+        }
+        for group_id, index in row_of.items()
+    }
+
+
+def _category_flags(
+    row_of: dict[int, int], category_rows: Iterable[tuple], today: date
+) -> dict[int, list[dict[str, Any]]]:
+    """Per group, last week's spend of each category and whether it is an
+    outlier against the weeks before it."""
+    pair_of: dict[tuple[int, int], int] = {}
+    names: list[str] = []
+    pairs, weeks, amounts = [], [], []
+    for group_id, category_id, name, day, amount in category_rows:
+        if group_id not in row_of:
+            continue
+        key = (group_id, category_id)
+        if key not in pair_of:
+            pair_of[key] = len(names)
+            names.append(name)
+        pairs.append(pair_of[key])
+        weeks.append(ANOMALY_WEEKS - 1 - (today - day).days // 7)
+        amounts.append(float(amount))
+    if not pair_of:
+        return {}
+
+    weekly = np.zeros((len(pair_of), ANOMALY_WEEKS))
+    np.add.at(weekly, (np.array(pairs), np.array(weeks)), amounts)
+    last_week = weekly[:, -1]
+    history = weekly[:, :-1]
+    mean = history.mean(axis=1)
+    # A floor on the deviation keeps perfectly regular spend from flagging
+    # every small increase
+    deviation = np.maximum(history.std(axis=1), 0.1 * mean)
+    anomalous = ((history > 0).sum(axis=1) >= ANOMALY_MIN_ACTIVE_WEEKS) & (
+        last_week > mean + ANOMALY_Z_SCORE * deviation
+    )
+
+    flags: dict[int, list[dict[str, Any]]] = {}
+    for (group_id, _category_id), index in sorted(
+        pair_of.items(), key=lambda item: (item[0][0], names[item[1]])
+    ):
+        flags.setdefault(group_id, []).append(
+            {
+                "name": names[index],
+                "last_week_spend": round(float(last_week[index]), 2),
+                "weekly_average": round(float(mean[index]), 2),
+                "is_anomaly": bool(anomalous[index]),
+            }
+        )
+    return flags
+
+
+def refresh_forecasts(db: Session, group_ids: Sequence[int], today: date) -> None:
+    """Recompute and store the forecasts of a batch of groups. The caller
+    commits."""
+    group_ids = list(group_ids)
+    if not group_ids:
+        return
+    forecasts = build_forecasts(
+        group_ids,
+        db.execute(daily_statement(group_ids, today)).all(),
+        db.execute(category_statement(group_ids, today)).all(),
+        today,
+    )
+    statement = dialect_insert(db, SpendingForecast).values(
+        [
+            {"group_id": group_id, "as_of": today, "data": data}
+            for group_id, data in forecasts.items()
+        ]
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[SpendingForecast.group_id],
+            set_={
+                "as_of": statement.excluded.as_of,
+                "data": statement.excluded.data,
+                "computed_at": func.now(),
+            },
+        )
+    )
+
+
+__all__ = [
+    "build_forecasts",
+    "category_statement",
+    "daily_statement",
+    "refresh_forecasts",
+]
@@ -0,0 +1,239 @@
+"""Scheduled scanning of fridge items for expiry."""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Sequence
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.email import render_email
+from ..models import Food, FridgeExpirySummary, FridgeItem, Group, GroupMember, User
+from .analytics import dialect_insert
+
+# Items listed per group in fridge_expiry_summaries.items
+EXPIRY_SUMMARY_MAX_ITEMS = 20
+
+
+def _expiry_horizon(today: date) -> date:
+    return today + timedelta(days=settings.fridge_expiring_window_days)
+
+
+def expiry_summaries(
+    db: Session, group_ids: Sequence[int], today: date
+) -> dict[int, dict[str, Any]]:
+    """Expired and expiring items of a batch of groups, in two queries.
+
+    Both only read ``use_within_date <= horizon``, a range of the
+    ``(group_id, use_within_date, id)`` index for each group, so the cost
+    follows the number of expiring items rather than the size of the fridge.
+    """
+    group_ids = list(group_ids)
+    in_window = (
+        FridgeItem.group_id.in_(group_ids),
+        FridgeItem.use_within_date <= _expiry_horizon(today),
+    )
+    expired = FridgeItem.use_within_date < today
+    expiring = FridgeItem.use_within_date >= today
+
+    summaries = {
+        group_id: {
+            "expired_count": 0,
+            "expiring_count": 0,
+            "expired_value": Decimal("0"),
+            "expiring_value": Decimal("0"),
+            "items": [],
+        }
+        for group_id in group_ids
+    }
+
+    totals = db.execute(
+        select(
+            FridgeItem.group_id,
+            func.count().filter(expired),
+            func.count().filter(expiring),
+            func.coalesce(func.sum(FridgeItem.cost).filter(expired), 0),
+            func.coalesce(func.sum(FridgeItem.cost).filter(expiring), 0),
+        )
+        .where(*in_window)
+        .group_by(FridgeItem.group_id)
+    )
+    for group_id, expired_count, expiring_count, expired_value, expiring_value in totals:
+        summaries[group_id].update(
+            expired_count=expired_count,
+            expiring_count=expiring_count,
+            expired_value=expired_value,
+            expiring_value=expiring_value,
+        )
+
+    ranked = (
+        select(
+            FridgeItem.id,
+            FridgeItem.group_id,
+            FridgeItem.food_id,
+            FridgeItem.use_within_date,
+            func.row_number()
+            .over(
+                partition_by=FridgeItem.group_id,
+                order_by=(FridgeItem.use_within_date, FridgeItem.id),
+            )
+            .label("position"),
+        )
+        .where(*in_window)
+        .subquery()
+    )
+    items = db.execute(
+        select(
+            ranked.c.group_id,
+            ranked.c.id,
+            ranked.c.food_id,
+            Food.name,
+            ranked.c.use_within_date,
+        )
+        .join(Food, Food.id == ranked.c.food_id)
+        .where(ranked.c.position <= EXPIRY_SUMMARY_MAX_ITEMS)
+        .order_by(ranked.c.group_id, ranked.c.position)
+    )
+    for group_id, item_id, food_id, food_name, use_within_date in items:
+        summaries[group_id]["items"].append(
+            {
+                "id": item_id,
+                "foodId": food_id,
+                "foodName": food_name,
+                "useWithinDate": use_within_date.isoformat(),
+            }
+        )
+    return summaries
+
+
+def refresh_expiry_summaries(db: Session, group_ids: Sequence[int], today: date) -> int:
+    """Rewrite the expiry summaries of a batch of groups with one upsert.
+
+    Groups with nothing expiring get an empty summary, which clears the one
+    of a previous day. Returns how many groups have expired or expiring
+    items. The caller commits.
+    """
+    group_ids = list(group_ids)
+    if not group_ids:
+        return 0
+    summaries = expiry_summaries(db, group_ids, today)
+    statement = dialect_insert(db, FridgeExpirySummary).values(
+        [
+            {"group_id": group_id, "as_of": today, **summary}
+            for group_id, summary in summaries.items()
+        ]
+    )
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[FridgeExpirySummary.group_id],
+            set_={
+                "as_of": statement.excluded.as_of,
+                "expired_count": statement.excluded.expired_count,
+                "expiring_count": statement.excluded.expiring_count,
+                "expired_value": statement.excluded.expired_value,
+                "expiring_value": statement.excluded.expiring_value,
+                "items": statement.excluded["items"],
+                "computed_at": func.now(),
+            },
+        )
+    )
+    return sum(1 for summary in summaries.values() if summary["items"])
+
+
+def digest_utc_offsets(utc_hour: int, local_hour: int) -> list[int]:
+    """``User.timezone`` offsets (hours) for which it is ``local_hour`` now."""
+    return [offset for offset in range(-12, 15) if (utc_hour + offset) % 24 == local_hour]
+
+
+def _has_items_to_use_up(as_of: date):
+    # A summary left by an earlier scan would show stale counts and dates
+    return and_(
+        FridgeExpirySummary.as_of == as_of,
+        or_(
+            FridgeExpirySummary.expired_count > 0,
+            FridgeExpirySummary.expiring_count > 0,
+        ),
+    )
+
+
+def expiry_digest_recipients(
+    offsets: Sequence[int], after_user_id: int, limit: int, as_of: date
+):
+    """Next keyset page of ids of active members, in the given timezones, of
+    groups whose ``as_of`` expiry scan found expired or expiring items."""
+    return (
+        select(GroupMember.user_id)
+        .join(User, User.id == GroupMember.user_id)
+        .join(FridgeExpirySummary, FridgeExpirySummary.group_id == GroupMember.group_id)
+        .where(
+            GroupMember.is_active.is_(True),
+            User.is_active.is_(True),
+            User.timezone.in_(list(offsets)),
+            GroupMember.user_id > after_user_id,
+            _has_items_to_use_up(as_of),
+        )
+        .group_by(GroupMember.user_id)
+        .order_by(GroupMember.user_id)
+        .limit(limit)
+    )
+
+
+def user_expiry_summaries(
+    db: Session, user_id: int, as_of: date
+) -> list[tuple[str, FridgeExpirySummary]]:
+    """``(group name, summary)`` of each of the user's groups whose ``as_of``
+    expiry scan found items to use up."""
+    return db.execute(
+        select(Group.name, FridgeExpirySummary)
+        .join(FridgeExpirySummary, FridgeExpirySummary.group_id == Group.id)
+        .join(GroupMember, GroupMember.group_id == Group.id)
+        .where(
+            GroupMember.user_id == user_id,
+            GroupMember.is_active.is_(True),
+            _has_items_to_use_up(as_of),
+        )
+        .order_by(Group.name)
+    ).all()
+
+
+def build_expiry_digest(
+    user: User,
+    summaries: Sequence[tuple[str, FridgeExpirySummary]],
+    local_date: date,
+) -> dict[str, str]:
+    """A user's expiry digest rendered from the ``expiry_digest`` template."""
+    vietnamese = user.language in ("vi", "vn")
+    lines = []
+    for group_name, summary in summaries:
+        lines.append(f"{group_name}:")
+        for item in summary.items:
+            use_within = date.fromisoformat(item["useWithinDate"])
+            if use_within < local_date:
+                state = "đã hết hạn" if vietnamese else "expired"
+            else:
+                state = "dùng trước" if vietnamese else "use by"
+            lines.append(f"  - {item['foodName']} ({state} {use_within.isoformat()})")
+        more = summary.expired_count + summary.expiring_count - len(summary.items)
+        if more > 0:
+            lines.append(f"  ... +{more}")
+        lines.append("")
+    return render_email(
+        "expiry_digest",
+        user.email,
+        user.language,
+        name=user.name,
+        expired=sum(summary.expired_count for _, summary in summaries),
+        expiring=sum(summary.expiring_count for _, summary in summaries),
+        groups="\n".join(lines),
+    )
+
+
+__all__ = [
+    "EXPIRY_SUMMARY_MAX_ITEMS",
+    "build_expiry_digest",
+    "digest_utc_offsets",
+    "expiry_digest_recipients",
+    "expiry_summaries",
+    "refresh_expiry_summaries",
+    "user_expiry_summaries",
+]
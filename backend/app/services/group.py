@@ -1,3 +1,4 @@
+from ..core import cache
 from ..models import User, Group, GroupMember
 from sqlalchemy.orm import Session
 from sqlalchemy import func
@@ -37,6 +38,7 @@ class GroupService:
         )
         db.add(group_member)
         db.commit()
+        cache.invalidate_group_context(user.id)
 
         return CreateGroupResponse(
             resultMessage=ResultMessage(
@@ -102,6 +104,8 @@ class GroupService:
             user.belongs_to_group_admin_id = group_id
 
         db.commit()
+        cache.invalidate_user(user_id)
+        cache.invalidate_group_context(user_id)
 
     @staticmethod
     def remove_group_member(user_id: str, db: Session, group_id: str):
@@ -118,4 +122,6 @@ class GroupService:
                 # Fallback: set to NULL if no owned group found
                 user.belongs_to_group_admin_id = None
 
-        db.commit()
\ No newline at end of file
+        db.commit()
+        cache.invalidate_user(user_id)
+        cache.invalidate_group_context(user_id)
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""Batched resolution of display names referenced by ORM rows."""
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models import Food, Unit, User
+
+
+class ReferenceResolver:
+    """Resolve food names, unit names and usernames for a batch of rows.
+
+    Every referenced id is collected up front and each table is queried once
+    with ``IN (...)``, so serializing a list costs at most three queries no
+    matter how many rows it contains.
+    """
+
+    food_fields = ("food_id",)
+    unit_fields = ("unit_id",)
+    user_fields = ("created_by", "assign_to_user_id", "done_by")
+
+    def __init__(
+        self,
+        food_names: dict[int, str] | None = None,
+        unit_names: dict[int, str] | None = None,
+        usernames: dict[int, str | None] | None = None,
+    ):
+        self.food_names = food_names or {}
+        self.unit_names = unit_names or {}
+        self.usernames = usernames or {}
+
+    @classmethod
+    def load(
+        cls, db: Session, rows: Iterable[object], resolve_users: bool = True
+    ) -> "ReferenceResolver":
+        """Fetch every Food, Unit and User referenced by ``rows``."""
+        names = {}
+        for key, statement in cls._name_statements(rows, resolve_users):
+            names[key] = {row_id: name for row_id, name in db.execute(statement)}
+        return cls(**names)
+
+    @classmethod
+    async def load_async(
+        cls, db: AsyncSession, rows: Iterable[object], resolve_users: bool = True
+    ) -> "ReferenceResolver":
+        """Async counterpart of :meth:`load`."""
+        names = {}
+        for key, statement in cls._name_statements(rows, resolve_users):
+            result = await db.execute(statement)
+            names[key] = {row_id: name for row_id, name in result}
+        return cls(**names)
+
+    @classmethod
+    def _name_statements(cls, rows: Iterable[object], resolve_users: bool):
+        food_ids, unit_ids, user_ids = cls._collect_ids(rows)
+        if not resolve_users:
+            user_ids = set()
+        for key, id_column, name_column, ids in (
+            ("food_names", Food.id, Food.name, food_ids),
+            ("unit_names", Unit.id, Unit.name, unit_ids),
+            ("usernames", User.id, User.username, user_ids),
+        ):
+            if ids:
+                yield key, select(id_column, name_column).where(id_column.in_(ids))
+
+    @classmethod
+    def _collect_ids(
+        cls, rows: Iterable[object]
+    ) -> tuple[set[int], set[int], set[int]]:
+        food_ids: set[int] = set()
+        unit_ids: set[int] = set()
+        user_ids: set[int] = set()
+        for row in rows:
+            for fields, ids in (
+                (cls.food_fields, food_ids),
+                (cls.unit_fields, unit_ids),
+                (cls.user_fields, user_ids),
+            ):
+                for field in fields:
+                    value = getattr(row, field, None)
+                    if value:
+                        ids.add(value)
+        return food_ids, unit_ids, user_ids
+
+    def food_name(self, food_id: int | None) -> str | None:
+        return self.food_names.get(food_id) if food_id else None
+
+    def unit_name(self, unit_id: int | None) -> str | None:
+        return self.unit_names.get(unit_id) if unit_id else None
+
+    def username(self, user_id: int | None) -> str | None:
+        return self.usernames.get(user_id) if user_id else None
+
+
+__all__ = ["ReferenceResolver"]
@@ -0,0 +1,263 @@
+"""Shopping list bookkeeping shared by the API and background jobs."""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Sequence
+
+from sqlalchemy import (
+    Boolean,
+    Date,
+    Integer,
+    String,
+    and_,
+    case,
+    cast,
+    column,
+    false,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import Food, FridgeItem, ShoppingList, ShoppingTask
+from .analytics import rollup_day, shift_daily_spending
+
+
+def effective_cost(
+    actual_cost: Decimal | None, estimated_cost: Decimal | None
+) -> Decimal:
+    """Cost a task contributes to its list total: actual, else estimated."""
+    if actual_cost is not None:
+        return actual_cost
+    if estimated_cost is not None:
+        return estimated_cost
+    return Decimal("0")
+
+
+def task_cost_expression():
+    """SQL counterpart of :func:`effective_cost`."""
+    return func.coalesce(ShoppingTask.actual_cost, ShoppingTask.estimated_cost, 0)
+
+
+def apply_total_cost_delta(db: Session, list_id: int, delta: Decimal) -> None:
+    """Shift a list's ``total_cost`` by ``delta`` in the current transaction.
+
+    The addition happens in SQL, so concurrent writers to the same list
+    cannot lose each other's updates. Spending rollups of a completed list
+    move with it. The caller commits.
+    """
+    if not delta:
+        return
+    row = db.execute(
+        update(ShoppingList)
+        .where(ShoppingList.id == list_id)
+        .values(total_cost=ShoppingList.total_cost + delta)
+        .returning(ShoppingList.group_id, ShoppingList.created_at, ShoppingList.status)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is not None and row.status == "completed":
+        shift_daily_spending(db, row.group_id, rollup_day(row.created_at), spend=delta)
+
+
+def repair_total_costs(db: Session, list_ids: Iterable[int] | None = None) -> int:
+    """Recompute ``total_cost`` from the tasks with one grouped aggregate.
+
+    Only lists whose stored total drifted are written. Returns the number of
+    lists that were corrected. The caller commits.
+    """
+    totals = (
+        select(
+            ShoppingList.id.label("list_id"),
+            func.coalesce(func.sum(task_cost_expression()), 0).label("total"),
+        )
+        .outerjoin(ShoppingTask, ShoppingTask.list_id == ShoppingList.id)
+        .group_by(ShoppingList.id)
+    )
+    if list_ids is not None:
+        totals = totals.where(ShoppingList.id.in_(list(list_ids)))
+    totals = totals.subquery()
+
+    result = db.execute(
+        update(ShoppingList)
+        .where(
+            ShoppingList.id == totals.c.list_id,
+            ShoppingList.total_cost.is_distinct_from(totals.c.total),
+        )
+        .values(total_cost=totals.c.total)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def lock_task_costs(
+    db: Session, list_id: int, task_ids: Iterable[int]
+) -> dict[int, tuple[Decimal, Decimal | None]]:
+    """Lock the given tasks of a list and return their current costs.
+
+    Maps each task id to its ``(effective cost, actual cost)``. Tasks that do
+    not exist or belong to another list are left out.
+    """
+    rows = db.execute(
+        select(ShoppingTask.id, task_cost_expression(), ShoppingTask.actual_cost)
+        .where(ShoppingTask.id.in_(list(task_ids)), ShoppingTask.list_id == list_id)
+        .with_for_update()
+    )
+    return {
+        task_id: (Decimal(cost), actual_cost) for task_id, cost, actual_cost in rows
+    }
+
+
+def _task_changes(db: Session, rows: Sequence[tuple]):
+    """``(task_id, is_done, actual_cost)`` rows as a derived table to join on."""
+    columns = (
+        column("task_id", Integer),
+        column("is_done", Boolean),
+        column("actual_cost", ShoppingTask.actual_cost.type),
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        return values(*columns, name="changes").data(list(rows))
+    # SQLite cannot name the columns of a VALUES alias, so the same rows are
+    # spelled as a UNION ALL of one-row SELECTs
+    return union_all(
+        *(
+            select(
+                *(
+                    literal(value, col.type).label(col.name)
+                    for value, col in zip(row, columns)
+                )
+            )
+            for row in rows
+        )
+    ).subquery("changes")
+
+
+def bulk_update_tasks(
+    db: Session,
+    list_id: int,
+    rows: Sequence[tuple],
+    user_id: int,
+    now: datetime,
+) -> list[ShoppingTask]:
+    """Apply many ``(task_id, is_done, actual_cost)`` updates in one UPDATE.
+
+    ``None`` leaves a field as it is. Only tasks whose values actually change
+    are written, and those are returned. The list total is not touched and
+    the caller commits.
+    """
+    if not rows:
+        return []
+
+    changes = _task_changes(db, rows)
+    new_is_done = cast(changes.c.is_done, Boolean)
+    new_actual_cost = cast(changes.c.actual_cost, ShoppingTask.actual_cost.type)
+    checked = and_(new_is_done.is_(True), ShoppingTask.is_done.is_(False))
+    unchecked = new_is_done.is_(False)
+
+    result = db.scalars(
+        update(ShoppingTask)
+        .where(
+            ShoppingTask.id == changes.c.task_id,
+            ShoppingTask.list_id == list_id,
+            or_(
+                and_(new_is_done.is_not(None), new_is_done != ShoppingTask.is_done),
+                and_(
+                    new_actual_cost.is_not(None),
+                    ShoppingTask.actual_cost.is_distinct_from(new_actual_cost),
+                ),
+            ),
+        )
+        .values(
+            is_done=func.coalesce(new_is_done, ShoppingTask.is_done),
+            actual_cost=func.coalesce(new_actual_cost, ShoppingTask.actual_cost),
+            done_at=case(
+                (checked, now), (unchecked, None), else_=ShoppingTask.done_at
+            ),
+            done_by=case(
+                (checked, user_id), (unchecked, None), else_=ShoppingTask.done_by
+            ),
+        )
+        .returning(ShoppingTask)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    return sorted(result, key=lambda task: task.id)
+
+
+def _days_after(db: Session, start: date, days):
+    """``start`` plus an integer SQL expression of days, as a date."""
+    if db.get_bind().dialect.name == "postgresql":
+        return literal(start, Date) + days
+    return func.date(literal(start.isoformat()), "+" + cast(days, String) + " days")
+
+
+def stock_fridge_from_list(
+    db: Session,
+    shopping_list: ShoppingList,
+    user_id: int,
+    purchase_date: date,
+    location: str | None = None,
+) -> int:
+    """Copy the done tasks of a list into the group's fridge.
+
+    One ``INSERT ... SELECT`` creates a fridge item per done task. Expiry is
+    ``purchase_date`` plus the food's default shelf life and the item cost is
+    the task's actual cost. Returns the number of items created. The caller
+    commits.
+    """
+    shelf_life_days = func.coalesce(
+        Food.default_shelf_life_days, settings.fridge_default_shelf_life_days
+    )
+    done_tasks = (
+        select(
+            ShoppingTask.food_id,
+            literal(shopping_list.group_id),
+            ShoppingTask.quantity,
+            ShoppingTask.unit_id,
+            literal(purchase_date, Date),
+            _days_after(db, purchase_date, shelf_life_days),
+            literal(location, String),
+            false(),
+            ShoppingTask.actual_cost,
+            literal(user_id),
+        )
+        .join(Food, Food.id == ShoppingTask.food_id)
+        .where(
+            ShoppingTask.list_id == shopping_list.id,
+            ShoppingTask.is_done.is_(True),
+        )
+        .order_by(ShoppingTask.id)
+    )
+    result = db.execute(
+        insert(FridgeItem).from_select(
+            [
+                FridgeItem.food_id,
+                FridgeItem.group_id,
+                FridgeItem.quantity,
+                FridgeItem.unit_id,
+                FridgeItem.purchase_date,
+                FridgeItem.use_within_date,
+                FridgeItem.location,
+                FridgeItem.is_opened,
+                FridgeItem.cost,
+                FridgeItem.created_by,
+            ],
+            done_tasks,
+        )
+    )
+    return result.rowcount
+
+
+__all__ = [
+    "apply_total_cost_delta",
+    "bulk_update_tasks",
+    "effective_cost",
+    "lock_task_costs",
+    "stock_fridge_from_list",
+    "repair_total_costs",
+    "task_cost_expression",
+]
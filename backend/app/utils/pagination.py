@@ -0,0 +1,105 @@
+"""Keyset (cursor) pagination for list endpoints."""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+from ..core.config import settings
+
+
+class KeysetPage:
+    """Keyset pagination over a fixed, unique sort key.
+
+    ``columns`` must end with a unique column (normally the primary key) so
+    that the order is total. The cursor is an opaque base64 encoding of the
+    sort key of the last row on the previous page; the next page is the rows
+    strictly after it, which stays stable while rows are inserted or deleted.
+    """
+
+    def __init__(
+        self,
+        columns: Sequence[Any],
+        cursor: str | None = None,
+        limit: int | None = None,
+        descending: bool = False,
+    ):
+        self.columns = list(columns)
+        self.descending = descending
+        self.limit = min(
+            limit or settings.pagination_default_limit,
+            settings.pagination_max_limit,
+        )
+        self.after = self._decode(cursor) if cursor else None
+
+    def apply(self, statement):
+        """Add the keyset predicate, ordering and limit to a select/query."""
+        if self.after is not None:
+            key = tuple_(*self.columns)
+            statement = statement.where(
+                key < tuple_(*self.after) if self.descending else key > tuple_(*self.after)
+            )
+        order_by = [
+            column.desc() if self.descending else column.asc()
+            for column in self.columns
+        ]
+        # One extra row tells whether another page exists
+        return statement.order_by(*order_by).limit(self.limit + 1)
+
+    def page(self, rows: Sequence[Any]) -> tuple[list[Any], str | None]:
+        """Trim the look-ahead row and build the cursor for the next page."""
+        rows = list(rows)
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[: self.limit]
+        last = rows[-1]
+        return rows, self._encode([getattr(last, column.key) for column in self.columns])
+
+    @staticmethod
+    def _encode(values: list[Any]) -> str:
+        payload = [
+            value.isoformat()
+            if isinstance(value, (date, datetime))
+            else str(value)
+            if isinstance(value, Decimal)
+            else value
+            for value in values
+        ]
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _decode(self, cursor: str) -> list[Any]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            if not isinstance(payload, list) or len(payload) != len(self.columns):
+                raise ValueError("cursor does not match the sort key")
+            return [
+                self._parse(column, value)
+                for column, value in zip(self.columns, payload)
+            ]
+        except (ValueError, TypeError, binascii.Error):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            )
+
+    @staticmethod
+    def _parse(column, value):
+        python_type = column.type.python_type
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type is Decimal:
+            return Decimal(value)
+        if not isinstance(value, python_type):
+            raise TypeError(f"expected {python_type.__name__} in cursor")
+        return value
+
+
+__all__ = ["KeysetPage"]
@@ -1,5 +1,6 @@
 """Celery application instance used for background tasks."""
 from celery import Celery
+from celery.schedules import crontab
 
 from app.core.config import settings
 
@@ -9,5 +10,33 @@ celery_app = Celery(
     backend=settings.redis_url,
 )
 
-celery_app.conf.beat_schedule = {}
+celery_app.conf.beat_schedule = {
+    # Picks up mail left queued by a flush that gave up or died
+    "flush-email-outbox": {
+        "task": "tasks.flush_email_outbox",
+        "schedule": 60.0,
+        "kwargs": {"claim": True},
+    },
+    "scan-fridge-expiry": {
+        "task": "tasks.scan_fridge_expiry",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    # Every hour; each run covers the timezones where it is the digest hour
+    "dispatch-expiry-digests": {
+        "task": "tasks.dispatch_expiry_digests",
+        "schedule": crontab(minute=30),
+    },
+    "repair-shopping-list-totals": {
+        "task": "tasks.repair_shopping_list_totals",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "reconcile-spending-rollups": {
+        "task": "tasks.reconcile_spending_rollups",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "refresh-spending-forecasts": {
+        "task": "tasks.refresh_spending_forecasts",
+        "schedule": crontab(hour=4, minute=0),
+    },
+}
 celery_app.conf.timezone = "UTC"
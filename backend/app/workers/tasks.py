@@ -1,26 +1,307 @@
 """Celery background tasks."""
 import logging
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.core import cache
+from app.core.config import settings
+from app.core.email import (
+    claim_outbox_flush,
+    hold_outbox_flush,
+    peek_outbox,
+    queue_email,
+    release_outbox_flush,
+    render_email,
+    smtp_connection,
+    trim_outbox,
+)
+from app.core.database import SessionLocal
+from app.models import Group, User
+from app.services.analytics import rebuild_spending_rollups
+from app.services.forecast import refresh_forecasts
+from app.services.fridge import (
+    build_expiry_digest,
+    digest_utc_offsets,
+    expiry_digest_recipients,
+    refresh_expiry_summaries,
+    user_expiry_summaries,
+)
+from app.services.shopping import repair_total_costs
+
 from .celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
 
 @celery_app.task(name="tasks.send_verification_email")
-def send_verification_email(email: str, otp_code: str):
-    """Send verification email with OTP code to user.
+def send_verification_email(email: str, otp_code: str, language: str = "en"):
+    """Queue the verification email with the OTP code for delivery.
 
     Args:
         email: User's email address
         otp_code: 6-digit OTP code for verification
+        language: User's language, picks the template
+    """
+    _send_email(
+        render_email(
+            "verification",
+            email,
+            language,
+            code=otp_code,
+            minutes=settings.otp_ttl_seconds // 60,
+        )
+    )
+    return {"status": "queued", "email": email}
+
+
+def _send_email(message: dict[str, str]) -> None:
+    if queue_email(message):
+        flush_email_outbox.delay()
+
+
+@celery_app.task(name="tasks.flush_email_outbox", bind=True, ignore_result=True)
+def flush_email_outbox(self, claim: bool = False):
+    """Deliver the queued emails in batches over this worker's SMTP
+    connection.
+
+    Producers schedule one flush when they find none running; ``claim`` is
+    for the periodic run, which only starts if no flush holds the outbox.
+    On a transient SMTP failure the unsent messages stay queued and the
+    flush retries with exponential backoff, keeping its claim meanwhile.
+    """
+    if claim and not claim_outbox_flush():
+        return {"sent": 0}
+    sent = 0
+    while True:
+        batch = peek_outbox(settings.email_batch_size)
+        if not batch:
+            if release_outbox_flush():
+                break
+            continue
+        unsent = smtp_connection.send(batch)
+        trim_outbox(len(batch) - len(unsent))
+        sent += len(batch) - len(unsent)
+        if unsent:
+            countdown = min(
+                settings.email_retry_backoff_seconds * 2**self.request.retries,
+                settings.email_retry_backoff_max_seconds,
+            )
+            hold_outbox_flush(countdown + settings.email_flush_lock_seconds)
+            logger.warning(
+                "Email delivery deferred, %d sent, retrying in %ss", sent, countdown
+            )
+            raise self.retry(
+                kwargs={"claim": False},
+                countdown=countdown,
+                max_retries=settings.email_max_retries,
+            )
+    if sent:
+        logger.info("Sent %d emails", sent)
+    return {"sent": sent}
+
+
+@celery_app.task(name="tasks.repair_shopping_list_totals")
+def repair_shopping_list_totals():
+    """Recompute every shopping list's total_cost from its tasks.
+
+    total_cost is maintained incrementally by the API; this nightly pass
+    corrects any drift (manual SQL edits, failed deploys) in one statement.
+    """
+    db = SessionLocal()
+    try:
+        repaired = repair_total_costs(db)
+        db.commit()
+    finally:
+        db.close()
+    if repaired:
+        logger.warning("Repaired total_cost of %d shopping lists", repaired)
+    return {"repaired": repaired}
+
+
+# Groups rebuilt per transaction by reconcile_spending_rollups
+ROLLUP_REBUILD_BATCH_SIZE = 100
+
+
+@celery_app.task(name="tasks.reconcile_spending_rollups")
+def reconcile_spending_rollups():
+    """Rebuild the analytics spending rollups from the shopping tables.
+
+    The rollups are shifted incrementally by every shopping write; this
+    nightly pass rebuilds them group batch by group batch, committing after
+    each batch so no transaction holds locks for long.
     """
-    # TODO: Implement actual email sending logic
-    # For now, just log the email details
-    logger.info(f"Sending verification email to {email} with code: {otp_code}")
+    groups = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            group_ids = db.scalars(
+                select(Group.id)
+                .where(Group.id > last_id)
+                .order_by(Group.id)
+                .limit(ROLLUP_REBUILD_BATCH_SIZE)
+            ).all()
+            if not group_ids:
+                break
+            rebuild_spending_rollups(db, group_ids)
+            db.commit()
+            cache.bump_group_data_version(*group_ids)
+            groups += len(group_ids)
+            last_id = group_ids[-1]
+    finally:
+        db.close()
+    logger.info("Rebuilt spending rollups of %d groups", groups)
+    return {"groups": groups}
+
+
+# Groups forecast per NumPy batch by refresh_spending_forecasts
+FORECAST_BATCH_SIZE = 1000
+
+
+@celery_app.task(name="tasks.refresh_spending_forecasts")
+def refresh_spending_forecasts():
+    """Precompute the spending forecast of every group for today.
+
+    Runs after the rollups are reconciled. Each batch loads its groups'
+    history in two queries, computes all forecasts as one set of array
+    operations and stores them with a single upsert.
+    """
+    today = date.today()
+    groups = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            group_ids = db.scalars(
+                select(Group.id)
+                .where(Group.id > last_id)
+                .order_by(Group.id)
+                .limit(FORECAST_BATCH_SIZE)
+            ).all()
+            if not group_ids:
+                break
+            refresh_forecasts(db, group_ids, today)
+            db.commit()
+            cache.bump_group_data_version(*group_ids)
+            groups += len(group_ids)
+            last_id = group_ids[-1]
+    finally:
+        db.close()
+    logger.info("Refreshed spending forecasts of %d groups", groups)
+    return {"groups": groups}
+
+
+# Groups summarised per transaction by scan_fridge_expiry
+EXPIRY_SCAN_BATCH_SIZE = 500
+
+
+@celery_app.task(name="tasks.scan_fridge_expiry")
+def scan_fridge_expiry():
+    """Summarise every group's expired and soon-expiring fridge items.
+
+    Walks the groups in keyset batches and reads only the expiring range of
+    each group's fridge through the (group_id, use_within_date) index. Every
+    batch is its own short transaction; digests and other readers use the
+    stored summaries instead of scanning fridge_items again.
+    """
+    today = date.today()
+    groups = 0
+    with_items = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            group_ids = db.scalars(
+                select(Group.id)
+                .where(Group.id > last_id)
+                .order_by(Group.id)
+                .limit(EXPIRY_SCAN_BATCH_SIZE)
+            ).all()
+            if not group_ids:
+                break
+            with_items += refresh_expiry_summaries(db, group_ids, today)
+            db.commit()
+            groups += len(group_ids)
+            last_id = group_ids[-1]
+    finally:
+        db.close()
+    logger.info(
+        "Scanned fridge expiry of %d groups, %d with items to use up",
+        groups,
+        with_items,
+    )
+    return {"groups": groups, "groups_with_items": with_items}
+
+
+# Recipients read per keyset page by dispatch_expiry_digests, and digests
+# sent per Celery task of the fan-out
+DIGEST_RECIPIENT_BATCH_SIZE = 1000
+DIGEST_CHUNK_SIZE = 50
+
+
+@celery_app.task(name="tasks.dispatch_expiry_digests")
+def dispatch_expiry_digests():
+    """Enqueue today's expiry digest of every user for whom it is now the
+    delivery hour.
+
+    Runs hourly. Recipients are the members of groups whose expiry summary
+    from today's scan lists items, in the timezones where it is
+    ``expiry_digest_hour``; each page of them is fanned out as a group of
+    chunk tasks, so the queue sees one task per DIGEST_CHUNK_SIZE users
+    rather than one per item or user. Nothing is sent from the summaries of
+    a scan that failed or has not run yet.
+    """
+    offsets = digest_utc_offsets(
+        datetime.now(timezone.utc).hour, settings.expiry_digest_hour
+    )
+    # The day scan_fridge_expiry summarises as of
+    as_of = date.today()
+    recipients = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while offsets:
+            user_ids = db.scalars(
+                expiry_digest_recipients(
+                    offsets, last_id, DIGEST_RECIPIENT_BATCH_SIZE, as_of
+                )
+            ).all()
+            if not user_ids:
+                break
+            send_expiry_digest.chunks(
+                [(user_id, as_of.isoformat()) for user_id in user_ids],
+                DIGEST_CHUNK_SIZE,
+            ).group().apply_async()
+            recipients += len(user_ids)
+            last_id = user_ids[-1]
+    finally:
+        db.close()
+    logger.info("Enqueued expiry digests of %d users", recipients)
+    return {"recipients": recipients}
+
 
-    # Example of what this should do:
-    # 1. Create email template with OTP code
-    # 2. Send via SMTP/email service (SendGrid, AWS SES, etc.)
-    # 3. Log success/failure
+@celery_app.task(name="tasks.send_expiry_digest", ignore_result=True)
+def send_expiry_digest(user_id: int, as_of: str | None = None):
+    """Send one user a single digest covering all of their groups, from
+    the summaries of the expiry scan of ``as_of`` (default today)."""
+    as_of_date = date.fromisoformat(as_of) if as_of else date.today()
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        if user is None or not user.is_active:
+            return {"status": "skipped", "user_id": user_id}
+        summaries = user_expiry_summaries(db, user_id, as_of_date)
+        if not summaries:
+            return {"status": "skipped", "user_id": user_id}
+        local_date = (
+            datetime.now(timezone.utc) + timedelta(hours=user.timezone or 0)
+        ).date()
+        if not cache.claim_expiry_digest(user_id, local_date):
+            return {"status": "duplicate", "user_id": user_id}
+        message = build_expiry_digest(user, summaries, local_date)
+    finally:
+        db.close()
 
-    print(f"📧 Verification email sent to {email} with code: {otp_code}")
-    return {"status": "sent", "email": email}
+    _send_email(message)
+    return {"status": "queued", "email": user.email}
@@ -0,0 +1,117 @@
+"""Compare sync (threadpool) and async database throughput under concurrency.
+
+Simulates ``--clients`` concurrent API clients, each repeatedly running the
+fridge listing query for one group:
+
+* ``sync``  - a sync ``Session`` per request, dispatched to a thread pool the
+  size of Starlette's default (40 tokens), like a sync ``def`` route.
+* ``async`` - an ``AsyncSession`` per request awaited directly on the event
+  loop, like an ``async def`` route using ``get_async_db``.
+
+Usage (from backend/, against a database that has the schema applied)::
+
+    python -m benchmarks.async_db_throughput --clients 200 --requests 20
+
+``--io-latency-ms`` runs a ``pg_sleep`` before every query to emulate a
+database that is further away than localhost.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models import FridgeItem
+
+STARLETTE_THREAD_TOKENS = 40
+
+
+def _statements(group_id: int, io_latency_ms: int) -> list:
+    statements = [select(FridgeItem).where(FridgeItem.group_id == group_id)]
+    if io_latency_ms:
+        statements.insert(0, select(func.pg_sleep(io_latency_ms / 1000)))
+    return statements
+
+
+async def run_sync(args) -> float:
+    engine = create_engine(
+        settings.database_url,
+        pool_size=args.pool_size,
+        max_overflow=0,
+    )
+    session_factory = sessionmaker(bind=engine)
+    statements = _statements(args.group_id, args.io_latency_ms)
+
+    def handle_request():
+        with session_factory() as db:
+            for statement in statements:
+                db.execute(statement).scalars().all()
+
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=STARLETTE_THREAD_TOKENS)
+
+    async def client():
+        for _ in range(args.requests):
+            await loop.run_in_executor(executor, handle_request)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    executor.shutdown()
+    engine.dispose()
+    return elapsed
+
+
+async def run_async(args) -> float:
+    engine = create_async_engine(
+        settings.async_database_url,
+        pool_size=args.pool_size,
+        max_overflow=0,
+    )
+    session_factory = async_sessionmaker(bind=engine)
+    statements = _statements(args.group_id, args.io_latency_ms)
+
+    async def client():
+        for _ in range(args.requests):
+            async with session_factory() as db:
+                for statement in statements:
+                    (await db.execute(statement)).scalars().all()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20, help="per client")
+    parser.add_argument("--pool-size", type=int, default=40)
+    parser.add_argument("--group-id", type=int, default=1)
+    parser.add_argument("--io-latency-ms", type=int, default=0)
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    args = parser.parse_args()
+
+    total = args.clients * args.requests
+    modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+    runners = {"sync": run_sync, "async": run_async}
+
+    print(
+        f"{args.clients} clients x {args.requests} requests, "
+        f"pool_size={args.pool_size}, io_latency_ms={args.io_latency_ms}"
+    )
+    for mode in modes:
+        elapsed = asyncio.run(runners[mode](args))
+        print(f"{mode:>5}: {total / elapsed:8.1f} req/s ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
+import uuid
+
 import pytest
 import pytest_asyncio
 from datetime import datetime
 from httpx import AsyncClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db, get_async_read_db, get_db, get_read_db
 from app.core.security import create_access_token
 from app.models import Base, User, Group, GroupMember, Food, Category, Unit
 
@@ -17,6 +21,17 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch):
+    """Give every test its own cache namespace so cached entries never leak."""
+    monkeypatch.setattr(settings, "cache_namespace", f"test-{uuid.uuid4().hex}")
+
 
 @pytest.fixture(scope="function")
 def db_session():
@@ -36,7 +51,15 @@ def override_get_db(db_session):
             yield db_session
         finally:
             pass
+
+    async def _override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = _override_get_db
+    app.dependency_overrides[get_read_db] = _override_get_db
+    app.dependency_overrides[get_async_db] = _override_get_async_db
+    app.dependency_overrides[get_async_read_db] = _override_get_async_db
     yield
     app.dependency_overrides.clear()
 
@@ -133,3 +156,18 @@ def test_food(db_session, test_group, test_category, test_unit, test_user):
 def auth_headers(test_user):
     token = create_access_token({"sub": str(test_user.id)})
     return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def query_counter():
+    """Collect every SQL statement executed against the test engines."""
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    yield statements
+    for target in (engine, async_engine.sync_engine):
+        event.remove(target, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,509 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from httpx import AsyncClient
+
+from app.models import DailyCategorySpending, DailySpending, FridgeExpirySummary
+from app.services.analytics import bucket_daily_spending, rebuild_spending_rollups
+
+
+@pytest.fixture
+def analytics_user(db_session, test_user, test_group):
+    test_user.belongs_to_group_admin_id = test_group.id
+    db_session.commit()
+    return test_user
+
+
+def rollups(db_session, group_id):
+    db_session.expire_all()
+    daily = db_session.query(
+        DailySpending.day,
+        DailySpending.spend,
+        DailySpending.budget,
+        DailySpending.list_count,
+    ).filter(DailySpending.group_id == group_id, DailySpending.list_count != 0)
+    categories = db_session.query(
+        DailyCategorySpending.day,
+        DailyCategorySpending.category_id,
+        DailyCategorySpending.spend,
+        DailyCategorySpending.item_count,
+    ).filter(
+        DailyCategorySpending.group_id == group_id,
+        DailyCategorySpending.item_count != 0,
+    )
+    return sorted(daily.all()), sorted(categories.all())
+
+
+async def shop(client: AsyncClient, auth_headers, food_id, name, costs, budget=None):
+    """Create a list, add one task per cost and check them all off."""
+    create_list_response = await client.post(
+        "/api/v1/shopping/list/",
+        json={"name": name, "priority": "medium", "budget": budget},
+        headers=auth_headers,
+    )
+    list_id = create_list_response.json()["shoppingList"]["id"]
+    create_task_response = await client.post(
+        "/api/v1/shopping/task/",
+        json={
+            "listId": list_id,
+            "tasks": [{"foodId": food_id, "quantity": 1} for _ in costs],
+        },
+        headers=auth_headers,
+    )
+    task_ids = [task["id"] for task in create_task_response.json()["tasks"]]
+    await client.put(
+        "/api/v1/shopping/task/bulk/",
+        json={
+            "listId": list_id,
+            "tasks": [
+                {"taskId": task_id, "isDone": True, "actualCost": cost}
+                for task_id, cost in zip(task_ids, costs)
+            ],
+        },
+        headers=auth_headers,
+    )
+    return list_id, task_ids
+
+
+@pytest.mark.asyncio
+async def test_rollups_follow_shopping_writes(
+    client: AsyncClient, auth_headers, db_session, analytics_user, test_group, test_food
+):
+    first_list, first_tasks = await shop(
+        client, auth_headers, test_food.id, "First", [4.00, 6.00], budget=20
+    )
+    second_list, _ = await shop(
+        client, auth_headers, test_food.id, "Second", [5.00]
+    )
+    await client.put(
+        "/api/v1/shopping/list/",
+        json={"id": first_list, "newStatus": "completed"},
+        headers=auth_headers,
+    )
+    await client.post(
+        "/api/v1/shopping/list/complete/",
+        json={"id": second_list},
+        headers=auth_headers,
+    )
+    # Changes to a completed list move its day's totals
+    await client.put(
+        "/api/v1/shopping/task/",
+        json={"taskId": first_tasks[0], "actualCost": 7.00},
+        headers=auth_headers,
+    )
+    await client.request(
+        "DELETE",
+        "/api/v1/shopping/task/",
+        json={"taskId": first_tasks[1]},
+        headers=auth_headers,
+    )
+    await client.put(
+        "/api/v1/shopping/list/",
+        json={"id": first_list, "newBudget": 25},
+        headers=auth_headers,
+    )
+
+    daily, categories = rollups(db_session, test_group.id)
+    assert [row[1:] for row in daily] == [(Decimal("12"), Decimal("25"), 2)]
+    assert [row[1:] for row in categories] == [
+        (test_food.category_id, Decimal("12"), 2)
+    ]
+
+    # Incremental maintenance agrees with a rebuild from the raw tables
+    rebuild_spending_rollups(db_session, [test_group.id])
+    db_session.commit()
+    assert rollups(db_session, test_group.id) == (daily, categories)
+
+    await client.request(
+        "DELETE",
+        "/api/v1/shopping/list/",
+        json={"id": second_list},
+        headers=auth_headers,
+    )
+    await client.put(
+        "/api/v1/shopping/list/",
+        json={"id": first_list, "newStatus": "active"},
+        headers=auth_headers,
+    )
+    daily, categories = rollups(db_session, test_group.id)
+    assert daily == []
+    assert [row[1:] for row in categories] == [
+        (test_food.category_id, Decimal("7"), 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_spending_endpoints_read_rollups(
+    client: AsyncClient, auth_headers, db_session, analytics_user, test_group, test_category
+):
+    def add_day(day, spend, budget, lists=1):
+        db_session.add(
+            DailySpending(
+                group_id=test_group.id,
+                day=day,
+                spend=spend,
+                budget=budget,
+                list_count=lists,
+            )
+        )
+
+    today = date.today()
+    add_day(today.replace(day=1), 10, 12)
+    add_day(today.replace(day=2), 0, 0, lists=0)
+    db_session.add(
+        DailyCategorySpending(
+            group_id=test_group.id,
+            day=today.replace(day=1),
+            category_id=test_category.id,
+            spend=10,
+            item_count=3,
+        )
+    )
+    db_session.commit()
+
+    response = await client.get(
+        "/api/v1/analytics/spending/monthly", headers=auth_headers
+    )
+    data = response.json()
+    assert data["months"] == [today.strftime("%Y-%m")]
+    assert data["amounts"] == [10.0]
+    assert data["budgets"] == [12.0]
+
+    response = await client.get(
+        "/api/v1/analytics/spending",
+        params={"granularity": "year"},
+        headers=auth_headers,
+    )
+    data = response.json()
+    assert data["granularity"] == "year"
+    assert data["periods"] == [today.strftime("%Y")]
+
+    response = await client.get(
+        "/api/v1/analytics/categories/breakdown",
+        params={"month": today.strftime("%Y-%m")},
+        headers=auth_headers,
+    )
+    data = response.json()
+    assert data["total"] == 10.0
+    assert data["categories"] == [
+        {
+            "name": "Vegetables",
+            "amount": 10.0,
+            "percentage": 100.0,
+            "itemCount": 3,
+        }
+    ]
+
+
+def test_rebuild_spending_rollups_corrects_drift(
+    db_session, test_user, test_group, test_food
+):
+    from app.models import ShoppingList, ShoppingTask
+
+    shopping_list = ShoppingList(
+        name="Done",
+        group_id=test_group.id,
+        status="completed",
+        total_cost=Decimal("9"),
+        budget=Decimal("10"),
+        created_by=test_user.id,
+    )
+    db_session.add(shopping_list)
+    db_session.flush()
+    db_session.add(
+        ShoppingTask(
+            list_id=shopping_list.id,
+            food_id=test_food.id,
+            quantity=1,
+            actual_cost=Decimal("9"),
+        )
+    )
+    db_session.add(
+        DailySpending(
+            group_id=test_group.id,
+            day=date(2020, 1, 1),
+            spend=99,
+            budget=0,
+            list_count=1,
+        )
+    )
+    db_session.commit()
+
+    rebuild_spending_rollups(db_session, [test_group.id])
+    db_session.commit()
+
+    daily, categories = rollups(db_session, test_group.id)
+    assert [row[1:] for row in daily] == [(Decimal("9"), Decimal("10"), 1)]
+    assert [row[1:] for row in categories] == [
+        (test_food.category_id, Decimal("9"), 1)
+    ]
+
+
+def test_bucket_daily_spending_granularities():
+    rows = [
+        (date(2024, 12, 30), Decimal("1"), Decimal("2")),
+        (date(2025, 1, 1), Decimal("3"), Decimal("0")),
+        (date(2025, 1, 6), Decimal("5"), Decimal("1")),
+    ]
+
+    assert bucket_daily_spending(rows, "week") == [
+        ("2024-12-30", Decimal("4"), Decimal("2")),
+        ("2025-01-06", Decimal("5"), Decimal("1")),
+    ]
+    assert bucket_daily_spending(rows, "month") == [
+        ("2024-12", Decimal("1"), Decimal("2")),
+        ("2025-01", Decimal("8"), Decimal("1")),
+    ]
+    assert [label for label, _, _ in bucket_daily_spending(rows, "year")] == [
+        "2024",
+        "2025",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_summary_is_one_query_with_date_window(
+    client: AsyncClient,
+    auth_headers,
+    db_session,
+    analytics_user,
+    test_group,
+    test_food,
+    query_counter,
+):
+    from datetime import datetime, timedelta
+
+    from app.models import FridgeItem, ShoppingList
+
+    def add_list(created_at, total_cost, budget, status="completed"):
+        db_session.add(
+            ShoppingList(
+                name="List",
+                group_id=test_group.id,
+                status=status,
+                total_cost=total_cost,
+                budget=budget,
+                created_by=analytics_user.id,
+                created_at=created_at,
+            )
+        )
+
+    add_list(datetime(2025, 1, 10, 12), 10, 15)
+    add_list(datetime(2025, 2, 10, 12), 30, 20)
+    add_list(datetime(2025, 2, 11, 12), 5, 5, status="active")
+    for days, cost in ((1, 2), (10, 3)):
+        db_session.add(
+            FridgeItem(
+                food_id=test_food.id,
+                group_id=test_group.id,
+                quantity=1,
+                use_within_date=date.today() + timedelta(days=days),
+                cost=cost,
+                created_by=analytics_user.id,
+            )
+        )
+    db_session.commit()
+
+    from app.core import cache
+
+    await client.get("/api/v1/analytics/summary", headers=auth_headers)
+    cache.bump_group_data_version(test_group.id)
+    query_counter.clear()
+    response = await client.get("/api/v1/analytics/summary", headers=auth_headers)
+    assert len(query_counter) == 1
+    data = response.json()
+    assert data["totalSpent"] == 40.0
+    assert data["totalBudget"] == 40.0
+    assert data["averageShoppingTrip"] == 20.0
+    assert data["fridgeValue"] == 5.0
+    assert data["expiringSoonCount"] == 1
+
+    response = await client.get(
+        "/api/v1/analytics/summary",
+        params={"start": "2025-02-01", "end": "2025-02-10"},
+        headers=auth_headers,
+    )
+    data = response.json()
+    assert data["totalSpent"] == 30.0
+    assert data["totalBudget"] == 20.0
+    assert data["averageShoppingTrip"] == 30.0
+    assert data["fridgeValue"] == 5.0
+
+    # The expiry scan's stored count goes stale as the fridge changes, so
+    # the summary keeps counting live even once the scan has run today
+    db_session.add(
+        FridgeExpirySummary(
+            group_id=test_group.id, as_of=date.today(), expiring_count=4
+        )
+    )
+    db_session.commit()
+    cache.bump_group_data_version(test_group.id)
+    response = await client.get("/api/v1/analytics/summary", headers=auth_headers)
+    assert response.json()["expiringSoonCount"] == 1
+
+
+@pytest.mark.asyncio
+async def test_analytics_served_from_cache_until_group_writes(
+    client: AsyncClient,
+    auth_headers,
+    analytics_user,
+    test_group,
+    test_food,
+    query_counter,
+):
+    from datetime import timedelta
+
+    # Warms the user and group context caches as well
+    response = await client.get("/api/v1/analytics/summary", headers=auth_headers)
+    assert response.json()["fridgeValue"] == 0.0
+
+    query_counter.clear()
+    for path in ("/summary", "/spending/monthly", "/categories/breakdown"):
+        await client.get(f"/api/v1/analytics{path}", headers=auth_headers)
+    computed = len(query_counter)
+
+    query_counter.clear()
+    for path in ("/summary", "/spending/monthly", "/categories/breakdown"):
+        response = await client.get(f"/api/v1/analytics{path}", headers=auth_headers)
+        assert response.status_code == 200
+    assert query_counter == []
+    assert computed == 2
+
+    await client.post(
+        "/api/v1/fridge/",
+        json={
+            "foodId": test_food.id,
+            "quantity": 1,
+            "useWithinDate": str(date.today() + timedelta(days=7)),
+            "cost": 4.5,
+        },
+        headers=auth_headers,
+    )
+    response = await client.get("/api/v1/analytics/summary", headers=auth_headers)
+    assert response.json()["fridgeValue"] == 4.5
+
+
+@pytest.mark.asyncio
+async def test_analytics_cache_miss_waits_for_concurrent_computation(
+    client: AsyncClient, auth_headers, analytics_user, test_group, query_counter
+):
+    import asyncio
+
+    from app.core import cache
+
+    await client.get("/api/v1/analytics/summary", headers=auth_headers)
+    cache.bump_group_data_version(test_group.id)
+
+    # Another worker holds the lock and publishes its result shortly
+    key = await cache.analytics_cache_key_async(
+        test_group.id, "summary", {"start": None, "end": None, "today": date.today()}
+    )
+    lock = await cache.acquire_analytics_lock_async(key)
+    assert lock is not None
+    body = {
+        "resultCode": "00203",
+        "resultMessage": {"en": "cached", "vn": "cached"},
+        "totalSpent": 1.0,
+        "totalBudget": 2.0,
+        "averageShoppingTrip": 1.0,
+        "fridgeValue": 3.0,
+        "expiringSoonCount": 0,
+    }
+
+    async def publish():
+        await asyncio.sleep(0.2)
+        await cache.cache_analytics_async(key, body)
+        await cache.release_analytics_lock_async(lock)
+
+    query_counter.clear()
+    _, response = await asyncio.gather(
+        publish(), client.get("/api/v1/analytics/summary", headers=auth_headers)
+    )
+    assert query_counter == []
+    assert response.json()["fridgeValue"] == 3.0
+
+
+def test_build_forecasts_vectorised_over_groups():
+    from datetime import timedelta
+
+    from app.services.forecast import build_forecasts
+
+    today = date(2025, 3, 15)
+    daily_rows = [
+        (1, date(2025, 1, 10), Decimal("100"), Decimal("0")),
+        (1, date(2025, 2, 5), Decimal("150"), Decimal("0")),
+        (1, date(2025, 3, 1), Decimal("60"), Decimal("300")),
+        (1, date(2025, 3, 14), Decimal("30"), Decimal("0")),
+    ]
+    category_rows = [
+        (1, 5, "Dairy", today - timedelta(days=7 * weeks_ago), Decimal("10"))
+        for weeks_ago in range(1, 12)
+    ]
+    category_rows += [
+        (1, 5, "Dairy", today, Decimal("50")),
+        (1, 6, "Bakery", today, Decimal("80")),
+    ]
+
+    forecasts = build_forecasts([1, 2], daily_rows, category_rows, today)
+
+    forecast = forecasts[1]
+    assert forecast["month_to_date_spend"] == 90.0
+    assert forecast["last_month_spend"] == 150.0
+    assert forecast["previous_month_spend"] == 100.0
+    assert forecast["month_over_month_change"] == 50.0
+    assert forecast["moving_average_7d"] == 4.29
+    assert forecast["moving_average_30d"] == 3.0
+    # 90 so far plus 16 remaining days at the 30-day average
+    assert forecast["projected_month_spend"] == 138.0
+    assert forecast["month_budget"] == 300.0
+    assert forecast["projected_over_budget"] is False
+    assert forecast["categories"] == [
+        {"name": "Bakery", "last_week_spend": 80.0, "weekly_average": 0.0, "is_anomaly": False},
+        {"name": "Dairy", "last_week_spend": 50.0, "weekly_average": 10.0, "is_anomaly": True},
+    ]
+
+    empty = forecasts[2]
+    assert empty["month_over_month_change"] is None
+    assert empty["projected_month_spend"] == 0.0
+    assert empty["categories"] == []
+
+
+@pytest.mark.asyncio
+async def test_spending_forecast_served_from_nightly_results(
+    client: AsyncClient, auth_headers, db_session, analytics_user, test_group
+):
+    from app.core import cache
+    from app.models import SpendingForecast
+    from app.services.forecast import refresh_forecasts
+
+    today = date.today()
+    db_session.add(
+        DailySpending(
+            group_id=test_group.id, day=today, spend=70, budget=0, list_count=1
+        )
+    )
+    db_session.commit()
+
+    # Computed on the spot before the nightly job has run
+    response = await client.get(
+        "/api/v1/analytics/spending/forecast", headers=auth_headers
+    )
+    data = response.json()
+    assert data["asOf"] == today.isoformat()
+    assert data["movingAverage7d"] == 10.0
+    assert data["monthToDateSpend"] == 70.0
+
+    refresh_forecasts(db_session, [test_group.id], today)
+    db_session.commit()
+    db_session.expire_all()
+    forecast = db_session.get(SpendingForecast, test_group.id)
+    assert forecast.as_of == today
+    assert forecast.data["moving_average_7d"] == 10.0
+
+    # The endpoint reads the stored forecast rather than the rollups
+    forecast.data = {**forecast.data, "moving_average_7d": 1.5}
+    db_session.commit()
+    cache.bump_group_data_version(test_group.id)
+    response = await client.get(
+        "/api/v1/analytics/spending/forecast", headers=auth_headers
+    )
+    assert response.json()["movingAverage7d"] == 1.5
@@ -0,0 +1,324 @@
+import asyncio
+import socket
+import time
+
+import pytest
+import redis
+from httpx import AsyncClient
+
+from fastapi import HTTPException
+
+from app.core import otp, revocation, security
+from app.core.config import settings
+from app.core.security import create_access_token, create_refresh_token, verify_token
+from app.models import User
+
+
+def test_otp_is_consumed_once_and_burnt_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(settings, "otp_max_attempts", 3)
+
+    otp.issue_otp("verify_email", 1, "123456")
+    assert otp.verify_otp("verify_email", 1, "000000") == otp.OTPResult.INCORRECT
+    assert otp.verify_otp("verify_email", 1, "123456") == otp.OTPResult.VERIFIED
+    assert otp.verify_otp("verify_email", 1, "123456") == otp.OTPResult.MISSING
+
+    # Re-issuing resets the attempt count
+    otp.issue_otp("verify_email", 1, "654321")
+    otp.verify_otp("verify_email", 1, "000000")
+    otp.issue_otp("verify_email", 1, "654321")
+    assert otp.verify_otp("verify_email", 1, "000000") == otp.OTPResult.INCORRECT
+    assert otp.verify_otp("verify_email", 1, "000001") == otp.OTPResult.INCORRECT
+    assert otp.verify_otp("verify_email", 1, "000002") == otp.OTPResult.EXHAUSTED
+    assert otp.verify_otp("verify_email", 1, "654321") == otp.OTPResult.MISSING
+
+
+def test_rate_limits_slide_and_apply_all_or_nothing():
+    limits = [("a", 2, 60), ("b", 3, 60)]
+    assert otp.hit_rate_limits(limits) == 0
+    assert otp.hit_rate_limits(limits) == 0
+    retry_after = otp.hit_rate_limits(limits)
+    assert 0 < retry_after <= 60
+
+    # The rejected hit was not counted against "b"
+    assert otp.hit_rate_limits([("b", 3, 60)]) == 0
+    assert otp.hit_rate_limits([("b", 3, 60)]) > 0
+
+
+@pytest.mark.asyncio
+async def test_send_verification_code_is_rate_limited_before_the_database(
+    client: AsyncClient, test_user, monkeypatch, query_counter
+):
+    from app.workers.celery_app import celery_app
+
+    sent = []
+    monkeypatch.setattr(celery_app, "send_task", lambda *args, **kwargs: sent.append(args))
+    monkeypatch.setattr(settings, "otp_send_limit_per_email", 2)
+
+    for _ in range(2):
+        response = await client.post(
+            "/api/v1/auth/send-verification-code", json={"email": test_user.email}
+        )
+        assert response.status_code == 200
+    assert len(sent) == 2
+
+    query_counter.clear()
+    response = await client.post(
+        "/api/v1/auth/send-verification-code", json={"email": test_user.email.upper()}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert query_counter == []
+    assert len(sent) == 2
+
+
+@pytest.mark.asyncio
+async def test_verify_email_checks_code_before_loading_user(
+    client: AsyncClient, db_session, test_user, query_counter
+):
+    confirm_token = create_access_token(
+        {"sub": str(test_user.id), "email": test_user.email, "type": "confirm"}
+    )
+    otp.issue_otp("verify_email", test_user.id, "246810")
+
+    query_counter.clear()
+    response = await client.post(
+        "/api/v1/auth/verify-email",
+        json={"code": "111111", "confirm_token": confirm_token},
+    )
+    assert response.status_code == 401
+    assert query_counter == []
+
+    response = await client.post(
+        "/api/v1/auth/verify-email",
+        json={"code": "246810", "confirm_token": confirm_token},
+    )
+    assert response.status_code == 200
+    assert response.json()["accessToken"]
+    db_session.refresh(test_user)
+    assert test_user.is_verified is True
+
+    response = await client.post(
+        "/api/v1/auth/verify-email",
+        json={"code": "246810", "confirm_token": confirm_token},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_login_upgrades_the_bcrypt_cost_of_the_stored_hash(
+    client: AsyncClient, db_session, monkeypatch
+):
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+    response = await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": "cost@example.com",
+            "password": "s3cret-pass",
+            "name": "Cost",
+            "language": "en",
+            "timezone": 7,
+            "deviceId": "device-1",
+            "user_name": "cost_user",
+        },
+    )
+    assert response.status_code == 200
+    user = db_session.query(User).filter(User.email == "cost@example.com").one()
+    assert user.password_hash.startswith("$2b$05$")
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    response = await client.post(
+        "/api/v1/auth/login", json={"email": "cost@example.com", "password": "wrong-pass"}
+    )
+    assert response.status_code == 401
+    response = await client.post(
+        "/api/v1/auth/login", json={"email": "cost@example.com", "password": "s3cret-pass"}
+    )
+    assert response.status_code == 200
+
+    db_session.refresh(user)
+    assert user.password_hash.startswith("$2b$04$")
+    assert security.verify_password("s3cret-pass", user.password_hash)
+    # Malformed hashes fail verification instead of raising
+    assert not security.verify_password("s3cret-pass", "hashed_password")
+
+    metrics = (await client.get("/metrics/password-hashing")).json()
+    assert metrics["checkouts"] >= 5
+    assert metrics["pending"] == 0
+
+
+def test_password_hashing_refuses_work_beyond_the_pending_limit(monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_max_pending", 0)
+    with pytest.raises(HTTPException) as excinfo:
+        security.hash_password("password")
+    assert excinfo.value.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_the_access_and_refresh_tokens(client: AsyncClient, test_user):
+    claims = {"sub": str(test_user.id), "email": test_user.email}
+    access, refresh = create_access_token(claims), create_refresh_token(claims)
+    other = create_access_token(claims)
+    headers = {"Authorization": f"Bearer {access}"}
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 200
+    response = await client.post("/api/v1/auth/refresh", json={"refreshToken": refresh})
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/api/v1/auth/logout", headers=headers, json={"refreshToken": refresh}
+    )
+    assert response.status_code == 200
+
+    assert (await client.get("/api/v1/users/me", headers=headers)).status_code == 401
+    response = await client.post("/api/v1/auth/refresh", json={"refreshToken": refresh})
+    assert response.status_code == 401
+    # Other sessions are unaffected
+    response = await client.get(
+        "/api/v1/users/me", headers={"Authorization": f"Bearer {other}"}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_logout_all_revokes_tokens_issued_before_it(client: AsyncClient, test_user):
+    claims = {"sub": str(test_user.id), "email": test_user.email}
+    tokens = [create_access_token(claims) for _ in range(2)]
+    response = await client.post(
+        "/api/v1/auth/logout-all", headers={"Authorization": f"Bearer {tokens[0]}"}
+    )
+    assert response.status_code == 200
+
+    for token in tokens:
+        response = await client.get(
+            "/api/v1/users/me", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 401
+        # Async routes check through the async Redis client
+        response = await client.get(
+            "/api/v1/analytics/spending/monthly", headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 401
+    fresh = create_access_token(claims)
+    for path in ("/api/v1/users/me", "/api/v1/analytics/spending/monthly"):
+        response = await client.get(path, headers={"Authorization": f"Bearer {fresh}"})
+        assert response.status_code == 200
+
+
+def test_revocations_from_other_processes_arrive_with_the_next_sync():
+    remote = revocation.RevocationFilter(
+        capacity=1000, error_rate=0.01, sync_interval_seconds=60
+    )
+    remote.sync()
+    payload = verify_token(create_access_token({"sub": "42"}))
+    revocation.revoke_token(payload)
+    member = f"jti:{payload['jti']}"
+    assert not remote.might_contain(member)
+
+    remote.sync()
+    assert remote.might_contain(member)
+    assert revocation.is_revoked(payload)
+    assert not revocation.is_revoked(verify_token(create_access_token({"sub": "42"})))
+
+
+@pytest.mark.asyncio
+async def test_unloaded_filter_confirms_in_redis_and_loads_in_the_background(monkeypatch):
+    fresh = revocation.RevocationFilter(
+        capacity=1000, error_rate=1e-6, sync_interval_seconds=60
+    )
+    monkeypatch.setattr(revocation, "revocations", fresh)
+    payload = verify_token(create_access_token({"sub": "42"}))
+    revocation.revoke_token(payload)
+
+    # Nothing can be ruled out before the first sync, so Redis decides
+    assert await revocation.is_revoked_async(payload)
+    assert not await revocation.is_revoked_async(
+        verify_token(create_access_token({"sub": "42"}))
+    )
+
+    deadline = time.monotonic() + 2
+    while not fresh.loaded and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    assert fresh.loaded
+    assert not fresh.might_contain("jti:unknown")
+
+
+def unreachable_redis() -> redis.Redis:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        closed_port = probe.getsockname()[1]
+    return redis.Redis(port=closed_port, socket_connect_timeout=0.2)
+
+
+def test_filter_denies_while_never_loaded_and_retries_in_the_background(monkeypatch):
+    now = [0.0]
+    fresh = revocation.RevocationFilter(
+        capacity=1000,
+        error_rate=1e-6,
+        sync_interval_seconds=5,
+        unloaded_fail_closed_seconds=30,
+        clock=lambda: now[0],
+    )
+    monkeypatch.setattr(revocation, "revocations", fresh)
+    payload = verify_token(create_access_token({"sub": "42"}))
+
+    with monkeypatch.context() as outage:
+        outage.setattr(revocation, "redis_client", unreachable_redis())
+        fresh.sync()
+        assert not fresh.loaded
+        assert revocation.is_revoked(payload)
+
+        # The fail-closed window of an unloaded filter is bounded
+        now[0] += 30
+        assert not revocation.is_revoked(payload)
+
+    now[0] += 5
+    fresh.maybe_sync()
+    deadline = time.monotonic() + 2
+    while not fresh.loaded and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fresh.loaded
+    assert not revocation.is_revoked(payload)
+
+
+@pytest.mark.asyncio
+async def test_logout_without_redis_is_refused_with_503(
+    client: AsyncClient, test_user, monkeypatch
+):
+    token = create_access_token({"sub": str(test_user.id), "email": test_user.email})
+    monkeypatch.setattr(revocation, "redis_client", unreachable_redis())
+
+    response = await client.post(
+        "/api/v1/auth/logout", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 503
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = revocation.BloomFilter(capacity=1000, error_rate=0.01)
+    items = [f"jti:{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other:{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.asyncio
+async def test_duplicate_registration_is_rejected_before_hashing(
+    client: AsyncClient, test_user, monkeypatch
+):
+    # Any hash attempt would now be refused with 503
+    monkeypatch.setattr(settings, "password_hash_max_pending", 0)
+    response = await client.post(
+        "/api/v1/auth/register",
+        json={
+            "email": test_user.email,
+            "password": "s3cret-pass",
+            "name": "Again",
+            "language": "en",
+            "timezone": 7,
+            "deviceId": "device-2",
+            "user_name": "another_user",
+        },
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
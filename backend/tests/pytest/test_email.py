@@ -0,0 +1,109 @@
+import socket
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.core import email
+from app.core.config import settings
+from app.workers import tasks
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("bounce@"):
+            return "550 No such user"
+        if address.startswith("greylist@"):
+            return "451 Greylisted, try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((id(session), envelope.rcpt_tos[0], envelope.content))
+        return "250 Message accepted"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(monkeypatch):
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_port", controller.port)
+    monkeypatch.setattr(settings, "smtp_use_tls", False)
+    monkeypatch.setattr(settings, "smtp_username", None)
+    connection = email.SMTPConnection()
+    monkeypatch.setattr(tasks, "smtp_connection", connection)
+    yield controller, handler, connection
+    connection.close()
+    controller.stop()
+
+
+def message(to):
+    return email.render_email("verification", to, code="123456", minutes=15)
+
+
+def test_render_email_templates():
+    rendered = email.render_email("verification", "a@example.com", "vi", code="654321", minutes=15)
+    assert rendered["subject"] == "Mã xác thực của bạn"
+    assert "654321" in rendered["body"]
+    assert "15 phút" in rendered["body"]
+    # Languages without a template use English
+    assert email.render_email("verification", "a@example.com", "fr", code="1", minutes=15)[
+        "subject"
+    ] == "Your verification code"
+
+
+def test_outbox_flushes_in_batches_over_one_connection(smtp_server, monkeypatch):
+    _, handler, _ = smtp_server
+    monkeypatch.setattr(settings, "email_batch_size", 2)
+
+    # Only the first producer has to schedule a flush
+    claims = [email.queue_email(message(f"user{n}@example.com")) for n in range(5)]
+    assert claims == [True, False, False, False, False]
+
+    tasks.flush_email_outbox.apply()
+    assert [to for _, to, _ in handler.messages] == [
+        f"user{n}@example.com" for n in range(5)
+    ]
+    assert len({session for session, _, _ in handler.messages}) == 1
+    assert b"Subject: Your verification code" in handler.messages[0][2]
+    assert email.peek_outbox(10) == []
+
+    # The flush released its claim, and the connection is reused next time
+    assert email.queue_email(message("later@example.com")) is True
+    tasks.flush_email_outbox.apply()
+    assert len({session for session, _, _ in handler.messages}) == 1
+
+
+def test_smtp_connection_defers_transient_and_drops_permanent_failures(smtp_server):
+    _, handler, connection = smtp_server
+    batch = [message("a@example.com"), message("bounce@example.com"), message("b@example.com")]
+
+    assert connection.send(batch) == []
+    assert [to for _, to, _ in handler.messages] == ["a@example.com", "b@example.com"]
+
+    # The server becomes unreachable: everything is handed back for a
+    # retry, and the next send reconnects
+    connection.close()
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(settings, "smtp_port", free_port())
+        assert connection.send(batch[:1]) == batch[:1]
+    assert connection.send(batch[:1]) == []
+    assert len(handler.messages) == 3
+
+
+def test_smtp_connection_keeps_greylisted_messages_for_a_retry(smtp_server):
+    _, handler, connection = smtp_server
+    batch = [message("a@example.com"), message("greylist@example.com"), message("b@example.com")]
+
+    assert connection.send(batch) == batch[1:]
+    assert [to for _, to, _ in handler.messages] == ["a@example.com"]
@@ -307,3 +307,221 @@ async def test_fridge_item_with_note(client: AsyncClient, auth_headers, test_foo
     assert response.status_code == 201
     data = response.json()
     assert data["fridgeItem"]["note"] == "Bought from farmers market"
+
+
+@pytest.mark.asyncio
+async def test_get_fridge_items_query_count_is_constant(
+    client: AsyncClient,
+    auth_headers,
+    db_session,
+    test_user,
+    test_food,
+    test_unit,
+    query_counter,
+):
+    from app.models import FridgeItem
+
+    def add_items(count):
+        for i in range(count):
+            db_session.add(
+                FridgeItem(
+                    food_id=test_food.id,
+                    group_id=test_food.group_id,
+                    quantity=i + 1,
+                    unit_id=test_unit.id,
+                    use_within_date=date.today() + timedelta(days=i),
+                    created_by=test_user.id,
+                )
+            )
+        db_session.commit()
+
+    add_items(2)
+    await client.get("/api/v1/fridge/", headers=auth_headers)
+
+    query_counter.clear()
+    response = await client.get("/api/v1/fridge/", headers=auth_headers)
+    assert len(response.json()["fridgeItems"]) == 2
+    small_listing = len(query_counter)
+
+    add_items(30)
+    query_counter.clear()
+    response = await client.get("/api/v1/fridge/", headers=auth_headers)
+    items = response.json()["fridgeItems"]
+    assert len(items) == 32
+    assert len(query_counter) == small_listing
+    assert {item["foodName"] for item in items} == {"Tomato"}
+    assert {item["unitName"] for item in items} == {"kg"}
+    assert {item["createdByUsername"] for item in items} == {"testuser"}
+
+
+@pytest.mark.asyncio
+async def test_get_fridge_items_keyset_pagination(
+    client: AsyncClient, auth_headers, db_session, test_user, test_food
+):
+    from app.models import FridgeItem
+
+    # Two items per date so the id tie-breaker is exercised
+    for i in range(7):
+        db_session.add(
+            FridgeItem(
+                food_id=test_food.id,
+                group_id=test_food.group_id,
+                quantity=1,
+                use_within_date=date.today() + timedelta(days=i // 2),
+                created_by=test_user.id,
+            )
+        )
+    db_session.commit()
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(
+            "/api/v1/fridge/", params=params, headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["fridgeItems"]) <= 3
+        seen.extend(
+            (item["useWithinDate"], item["id"]) for item in data["fridgeItems"]
+        )
+        pages += 1
+        cursor = data["nextCursor"]
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len(seen) == 7
+    assert seen == sorted(seen)
+
+
+@pytest.mark.asyncio
+async def test_get_fridge_items_rejects_invalid_cursor(
+    client: AsyncClient, auth_headers, test_group
+):
+    response = await client.get(
+        "/api/v1/fridge/", params={"cursor": "not-a-cursor"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_refresh_expiry_summaries(db_session, test_user, test_group, test_food):
+    from decimal import Decimal
+
+    from app.models import FridgeExpirySummary, FridgeItem
+    from app.services.fridge import refresh_expiry_summaries
+
+    today = date(2025, 6, 10)
+    for days, cost in ((-2, 4), (0, 1), (3, 2), (4, 8), (30, 16)):
+        db_session.add(
+            FridgeItem(
+                food_id=test_food.id,
+                group_id=test_group.id,
+                quantity=1,
+                use_within_date=today + timedelta(days=days),
+                cost=cost,
+                created_by=test_user.id,
+            )
+        )
+    db_session.commit()
+
+    assert refresh_expiry_summaries(db_session, [test_group.id], today) == 1
+    db_session.commit()
+    summary = db_session.get(FridgeExpirySummary, test_group.id)
+    assert summary.as_of == today
+    assert summary.expired_count == 1
+    assert summary.expiring_count == 2
+    assert summary.expired_value == Decimal("4")
+    assert summary.expiring_value == Decimal("3")
+    assert [item["useWithinDate"] for item in summary.items] == [
+        "2025-06-08",
+        "2025-06-10",
+        "2025-06-13",
+    ]
+    assert summary.items[0]["foodName"] == test_food.name
+
+    # A later scan with nothing left to use up clears the summary
+    assert refresh_expiry_summaries(db_session, [test_group.id], date(2025, 1, 1)) == 0
+    db_session.commit()
+    db_session.expire_all()
+    summary = db_session.get(FridgeExpirySummary, test_group.id)
+    assert (summary.expired_count, summary.expiring_count, summary.items) == (0, 0, [])
+
+
+def test_expiry_digest_per_member_in_delivery_timezone(
+    db_session, test_user, test_group, test_food
+):
+    from app.core import cache
+    from app.models import FridgeItem, GroupMember, User
+    from app.services.fridge import (
+        build_expiry_digest,
+        digest_utc_offsets,
+        expiry_digest_recipients,
+        refresh_expiry_summaries,
+        user_expiry_summaries,
+    )
+
+    hanoi = User(
+        email="hanoi@example.com",
+        password_hash="x",
+        name="Lan",
+        username="hanoi",
+        language="vn",
+        timezone=7,
+        is_active=True,
+    )
+    db_session.add(hanoi)
+    db_session.flush()
+    db_session.add(GroupMember(user_id=hanoi.id, group_id=test_group.id, is_active=True))
+    today = date.today()
+    for days in (-1, 2):
+        db_session.add(
+            FridgeItem(
+                food_id=test_food.id,
+                group_id=test_group.id,
+                quantity=1,
+                use_within_date=today + timedelta(days=days),
+                created_by=test_user.id,
+            )
+        )
+    db_session.commit()
+    refresh_expiry_summaries(db_session, [test_group.id], today)
+    db_session.commit()
+
+    # 01:00 UTC is 08:00 in UTC+7; UTC+0 members wait for 08:00 UTC
+    assert digest_utc_offsets(1, 8) == [7]
+    assert digest_utc_offsets(20, 8) == [-12, 12]
+    assert db_session.scalars(expiry_digest_recipients([7], 0, 10, today)).all() == [
+        hanoi.id
+    ]
+    assert db_session.scalars(
+        expiry_digest_recipients([0, 7], hanoi.id, 10, today)
+    ).all() == []
+    assert db_session.scalars(expiry_digest_recipients([0], 0, 10, today)).all() == [
+        test_user.id
+    ]
+    # Until the next scan has run, yesterday's summary sends nothing
+    tomorrow = today + timedelta(days=1)
+    assert db_session.scalars(expiry_digest_recipients([7], 0, 10, tomorrow)).all() == []
+    assert user_expiry_summaries(db_session, hanoi.id, tomorrow) == []
+
+    summaries = user_expiry_summaries(db_session, hanoi.id, today)
+    digest = build_expiry_digest(hanoi, summaries, today)
+    assert digest["to"] == "hanoi@example.com"
+    assert digest["subject"] == "1 món đã hết hạn, 1 món sắp hết hạn"
+    assert digest["body"].splitlines()[:4] == [
+        "Xin chào Lan,",
+        "",
+        "Test Group:",
+        f"  - {test_food.name} (đã hết hạn {(today - timedelta(days=1)).isoformat()})",
+    ]
+    digest = build_expiry_digest(test_user, summaries, today)
+    assert f"(use by {(today + timedelta(days=2)).isoformat()})" in digest["body"]
+
+    assert cache.claim_expiry_digest(hanoi.id, today) is True
+    assert cache.claim_expiry_digest(hanoi.id, today) is False
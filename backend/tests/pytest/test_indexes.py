@@ -0,0 +1,222 @@
+import importlib.util
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select, text
+
+from app.core.deps import _group_context_statement
+from app.models import (
+    Base,
+    Food,
+    FridgeItem,
+    Group,
+    GroupMember,
+    MealPlan,
+    ShoppingList,
+    ShoppingTask,
+    User,
+)
+from app.utils.pagination import KeysetPage
+
+GROUPS = 20
+ROWS_PER_GROUP = 25
+
+
+@pytest.fixture
+def seeded(db_session):
+    """A few groups' worth of rows so the planner has statistics to weigh."""
+    users = [
+        User(
+            email=f"user{i}@example.com",
+            password_hash="x",
+            name=f"User {i}",
+            username=f"user{i}",
+            is_active=True,
+        )
+        for i in range(GROUPS)
+    ]
+    db_session.add_all(users)
+    db_session.flush()
+    groups = [Group(name=f"Group {i}", owner_id=users[i].id) for i in range(GROUPS)]
+    db_session.add_all(groups)
+    db_session.flush()
+
+    today = date.today()
+    for user, group in zip(users, groups):
+        db_session.add(
+            GroupMember(user_id=user.id, group_id=group.id, role="owner", is_active=True)
+        )
+        foods = [
+            Food(
+                name=f"Food {j}",
+                group_id=group.id,
+                is_active=j % 5 != 0,
+                created_by=user.id,
+            )
+            for j in range(ROWS_PER_GROUP)
+        ]
+        db_session.add_all(foods)
+        db_session.flush()
+        lists = [
+            ShoppingList(
+                name=f"List {j}",
+                group_id=group.id,
+                status="completed" if j % 3 == 0 else "active",
+                total_cost=j,
+                created_by=user.id,
+                created_at=datetime(2025, 1, 1) + timedelta(days=j),
+            )
+            for j in range(ROWS_PER_GROUP)
+        ]
+        db_session.add_all(lists)
+        db_session.flush()
+        for j, food in enumerate(foods):
+            db_session.add_all(
+                [
+                    FridgeItem(
+                        food_id=food.id,
+                        group_id=group.id,
+                        quantity=1,
+                        use_within_date=today + timedelta(days=j),
+                        created_by=user.id,
+                    ),
+                    MealPlan(
+                        food_id=food.id,
+                        group_id=group.id,
+                        meal_date=today + timedelta(days=j),
+                        meal_type="dinner",
+                        created_by=user.id,
+                    ),
+                    ShoppingTask(
+                        list_id=lists[j].id,
+                        food_id=food.id,
+                        quantity=1,
+                        priority="medium",
+                    ),
+                ]
+            )
+    db_session.commit()
+    db_session.execute(text("ANALYZE"))
+    return groups[GROUPS // 2].id, users[GROUPS // 2].id
+
+
+def explain(db_session, statement) -> str:
+    compiled = statement.compile(dialect=db_session.bind.dialect)
+    params = compiled.construct_params()
+    args = tuple(params[name] for name in compiled.positiontup)
+    rows = (
+        db_session.connection()
+        .exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, args)
+        .all()
+    )
+    return "\n".join(row[-1] for row in rows)
+
+
+def test_fridge_listing_uses_group_expiry_index(db_session, seeded):
+    group_id, _ = seeded
+    page = KeysetPage((FridgeItem.use_within_date, FridgeItem.id), limit=20)
+    page.after = [date.today(), 1]
+    statement = page.apply(select(FridgeItem).where(FridgeItem.group_id == group_id))
+
+    plan = explain(db_session, statement)
+    assert "ix_fridge_items_group_id_use_within_date" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_shopping_list_listing_uses_group_created_at_index(db_session, seeded):
+    group_id, _ = seeded
+    page = KeysetPage(
+        (ShoppingList.created_at, ShoppingList.id), limit=20, descending=True
+    )
+    statement = page.apply(
+        select(ShoppingList).where(ShoppingList.group_id == group_id)
+    )
+
+    plan = explain(db_session, statement)
+    assert "ix_shopping_lists_group_id_created_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_meal_plan_range_uses_group_date_index(db_session, seeded):
+    group_id, _ = seeded
+    page = KeysetPage((MealPlan.meal_date, MealPlan.id), limit=20)
+    statement = page.apply(
+        select(MealPlan).where(
+            MealPlan.group_id == group_id,
+            MealPlan.meal_date >= date.today(),
+            MealPlan.meal_date <= date.today() + timedelta(days=7),
+        )
+    )
+
+    assert "ix_meal_plans_group_id_meal_date" in explain(db_session, statement)
+
+
+def test_active_food_listing_uses_partial_index(db_session, seeded):
+    group_id, _ = seeded
+    page = KeysetPage((Food.name, Food.id), limit=20)
+    statement = page.apply(
+        select(Food).where(Food.group_id == group_id, Food.is_active == True)
+    )
+
+    plan = explain(db_session, statement)
+    assert "ix_foods_group_id_name_active" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_shopping_tasks_by_list_use_list_index(db_session, seeded):
+    statement = select(ShoppingTask).where(ShoppingTask.list_id == 42)
+
+    assert "ix_shopping_tasks_list_id" in explain(db_session, statement)
+
+
+def test_group_context_lookup_uses_active_membership_index(db_session, seeded):
+    _, user_id = seeded
+
+    plan = explain(db_session, _group_context_statement(user_id))
+    assert "ix_group_members_user_id_active" in plan
+
+
+class RecordingOp:
+    """Stands in for ``alembic.op`` and records the indexes it is asked for."""
+
+    def __init__(self):
+        self.indexes = {}
+
+    def get_context(self):
+        return self
+
+    def autocommit_block(self):
+        return nullcontext()
+
+    def create_index(self, name, table, columns, postgresql_where=None, **kwargs):
+        where = str(postgresql_where) if postgresql_where is not None else None
+        self.indexes[name] = (table, list(columns), where)
+
+
+def test_hot_path_index_migration_matches_models():
+    path = next(
+        Path(__file__).parents[2].glob("alembic/versions/5d72f9230ea3_*.py")
+    )
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    migration.op = RecordingOp()
+    migration.upgrade()
+    assert migration.op.indexes
+
+    models = {
+        index.name: index
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+    }
+    for name, (table, columns, where) in migration.op.indexes.items():
+        assert name in models, name
+        index = models[name]
+        model_where = index.dialect_options["postgresql"]["where"]
+        assert (index.table.name, [column.name for column in index.columns]) == (
+            table,
+            columns,
+        ), name
+        assert (str(model_where) if model_where is not None else None) == where, name
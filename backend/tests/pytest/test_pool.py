@@ -0,0 +1,93 @@
+import pytest
+import redis
+from httpx import AsyncClient
+from sqlalchemy import create_engine, exc
+
+from app.core.config import Settings, settings
+from app.core.database import _async_connect_args, _connect_args
+from app.core.pool import InstrumentedQueuePool, pool_snapshot
+from app.core.redis import InstrumentedBlockingConnectionPool, get_async_redis
+
+
+def test_instrumented_pool_records_checkouts_and_timeouts(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    held = engine.connect()
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    snapshot = pool_snapshot(engine.pool)
+    assert snapshot["checked_out"] == 1
+    assert snapshot["overflow"] == 0
+    assert snapshot["checkouts"] == 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["wait_seconds_max"] >= 0.05
+
+    held.close()
+    engine.dispose()
+
+
+def test_async_database_url_swaps_in_an_async_driver():
+    def async_url(database_url):
+        return Settings(database_url=database_url).async_database_url
+
+    assert async_url("postgresql+psycopg2://u:p@db/di_cho") == (
+        "postgresql+asyncpg://u:p@db/di_cho"
+    )
+    assert async_url("sqlite:///./dev.db") == "sqlite+aiosqlite:///./dev.db"
+    with pytest.raises(ValueError, match="ASYNC_DATABASE_URL"):
+        async_url("mysql://u:p@db/di_cho")
+
+
+def test_postgresql_connect_args_are_not_passed_to_sqlite(monkeypatch):
+    monkeypatch.setattr(settings, "db_pgbouncer", True)
+
+    assert _connect_args("postgresql://db/di_cho")["client_encoding"] == "utf-8"
+    assert _connect_args("sqlite:///./dev.db", connect_timeout=3) == {}
+    assert "statement_cache_size" in _async_connect_args("postgresql+asyncpg://db/x")
+    assert _async_connect_args("sqlite+aiosqlite:///./dev.db") == {}
+
+
+@pytest.mark.asyncio
+async def test_db_pool_metrics_endpoint(client: AsyncClient):
+    response = await client.get("/metrics/db-pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"sync", "async"}
+    assert "checked_out" in data["sync"]
+    assert "wait_seconds_avg" in data["async"]
+
+
+def test_instrumented_redis_pool_records_checkouts_and_timeouts():
+    pool = InstrumentedBlockingConnectionPool.from_url(
+        settings.redis_url, max_connections=1, timeout=0.05
+    )
+    held = pool.get_connection()
+    with pytest.raises(redis.ConnectionError):
+        pool.get_connection()
+    pool.release(held)
+
+    snapshot = pool.stats.snapshot()
+    assert snapshot["checkouts"] == 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["wait_seconds_max"] >= 0.05
+    pool.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_redis_pool_metrics_endpoint(client: AsyncClient):
+    assert await get_async_redis().ping()
+    assert get_async_redis() is get_async_redis()
+
+    response = await client.get("/metrics/redis-pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"sync", "async"}
+    assert data["async"]["checkouts"] >= 1
+    assert data["async"]["created"] >= 1
+    assert data["sync"]["max_connections"] == settings.redis_max_connections
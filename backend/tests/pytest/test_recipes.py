@@ -268,3 +268,116 @@ async def test_update_recipe_not_found(client: AsyncClient, auth_headers, test_g
         headers=auth_headers,
     )
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_recipe_with_oversized_image_saves_nothing(
+    client: AsyncClient, auth_headers, test_group, db_session, monkeypatch
+):
+    from app.core.config import settings
+    from app.models import Recipe
+
+    monkeypatch.setattr(settings, "upload_max_bytes", 16)
+    response = await client.post(
+        "/api/v1/recipes/",
+        data={
+            "name": "Big Picture",
+            "description": "Recipe with a too large image",
+            "htmlContent": "<p>Too big</p>",
+        },
+        files={"file": ("photo.jpg", b"x" * 64, "image/jpeg")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 413
+    assert db_session.query(Recipe).count() == 0
+
+
+class FakeMinio:
+    """Stands in for minio.Minio; notes whether a transaction was open."""
+
+    def __init__(self, db_session):
+        self.db_session = db_session
+        self.calls = []
+
+    def put_object(self, bucket_name, object_name, data, **kwargs):
+        data.read()
+        self.calls.append(("put_object", object_name))
+        self.in_transaction = self.db_session.in_transaction()
+
+    def remove_object(self, bucket_name, object_name):
+        self.calls.append(("remove_object", object_name))
+
+
+@pytest.fixture
+def fake_minio(db_session, monkeypatch):
+    from app.core import storage
+
+    client = FakeMinio(db_session)
+    monkeypatch.setattr(storage, "_bucket_ready", True)
+    monkeypatch.setattr(storage, "get_minio_client", lambda: client)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_recipe_image_is_uploaded_outside_a_transaction(
+    client: AsyncClient, auth_headers, test_group, db_session, fake_minio
+):
+    response = await client.post(
+        "/api/v1/recipes/",
+        data={
+            "name": "Pictured",
+            "description": "Recipe with an image",
+            "htmlContent": "<p>Look</p>",
+        },
+        files={"file": ("photo.jpg", b"first", "image/jpeg")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    recipe = response.json()["recipe"]
+    [(_, first_object)] = fake_minio.calls
+    assert fake_minio.in_transaction is False
+    assert recipe["imageUrl"].endswith(first_object)
+
+    response = await client.put(
+        "/api/v1/recipes/",
+        data={"id": recipe["id"], "newName": "Repictured"},
+        files={"file": ("photo.jpg", b"second", "image/jpeg")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    (_, second_object) = fake_minio.calls[1]
+    assert fake_minio.in_transaction is False
+    assert response.json()["recipe"]["imageUrl"].endswith(second_object)
+    # The old image is removed only after the update was committed
+    assert fake_minio.calls[2:] == [("remove_object", first_object)]
+
+
+@pytest.mark.asyncio
+async def test_failed_recipe_insert_removes_the_uploaded_image(
+    client: AsyncClient, auth_headers, test_group, db_session, fake_minio, monkeypatch
+):
+    from sqlalchemy.exc import OperationalError
+
+    from app.models import Recipe
+
+    def fail_commit():
+        raise OperationalError("INSERT INTO recipes", {}, Exception("server closed"))
+
+    monkeypatch.setattr(db_session, "commit", fail_commit)
+    with pytest.raises(OperationalError):
+        await client.post(
+            "/api/v1/recipes/",
+            data={
+                "name": "Unsaved",
+                "description": "Recipe that cannot be saved",
+                "htmlContent": "<p>Nope</p>",
+            },
+            files={"file": ("photo.jpg", b"orphan", "image/jpeg")},
+            headers=auth_headers,
+        )
+
+    [(_, uploaded), removed] = fake_minio.calls
+    assert removed == ("remove_object", uploaded)
+    monkeypatch.undo()
+    db_session.rollback()
+    assert db_session.query(Recipe).count() == 0
@@ -0,0 +1,58 @@
+import pytest
+
+from app.core.replica import ReplicaMonitor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_replica_used_while_lag_within_bound():
+    monitor = ReplicaMonitor(max_lag_seconds=5, check_interval_seconds=10)
+    assert monitor.available(lambda: 1.5) is True
+    assert monitor.last_lag_seconds == 1.5
+
+
+def test_falls_back_to_primary_when_lagging_or_down():
+    clock = FakeClock()
+    monitor = ReplicaMonitor(max_lag_seconds=5, check_interval_seconds=10, clock=clock)
+    assert monitor.available(lambda: 30.0) is False
+
+    def unreachable():
+        raise ConnectionError("replica down")
+
+    clock.now = 11
+    assert monitor.available(unreachable) is False
+
+    clock.now = 22
+    assert monitor.available(lambda: 0.0) is True
+
+
+def test_probe_runs_once_per_interval():
+    clock = FakeClock()
+    monitor = ReplicaMonitor(max_lag_seconds=5, check_interval_seconds=10, clock=clock)
+    calls = []
+
+    def probe():
+        calls.append(clock.now)
+        return 0.0
+
+    for clock.now in (0, 3, 9.9):
+        assert monitor.available(probe) is True
+    clock.now = 10
+    monitor.available(probe)
+    assert calls == [0, 10]
+
+
+@pytest.mark.asyncio
+async def test_async_probe_failure_falls_back():
+    monitor = ReplicaMonitor(max_lag_seconds=5, check_interval_seconds=10)
+
+    async def unreachable():
+        raise OSError("connection refused")
+
+    assert await monitor.available_async(unreachable) is False
@@ -368,3 +368,460 @@ async def test_total_cost_calculation(client: AsyncClient, auth_headers, test_fo
     )
     list_data = get_list_response.json()["shoppingList"]
     assert float(list_data["totalCost"]) == 9.00
+
+
+@pytest.mark.asyncio
+async def test_joining_group_switches_cached_group_context(
+    client: AsyncClient, auth_headers, db_session, test_group
+):
+    from app.models import Group, ShoppingList, User
+
+    owner = User(
+        email="owner@example.com",
+        password_hash="hashed_password",
+        name="Other Owner",
+        username="otherowner",
+        is_active=True,
+    )
+    db_session.add(owner)
+    db_session.commit()
+    other_group = Group(
+        name="Other Group", owner_id=owner.id, invite_code="JOINME", is_active=True
+    )
+    db_session.add(other_group)
+    db_session.commit()
+    db_session.add(
+        ShoppingList(
+            name="Other Groceries",
+            group_id=other_group.id,
+            priority="medium",
+            status="active",
+            total_cost=0,
+            created_by=owner.id,
+        )
+    )
+    db_session.commit()
+
+    response = await client.get("/api/v1/shopping/list/", headers=auth_headers)
+    assert response.json()["shoppingLists"] == []
+
+    response = await client.post(
+        "/api/v1/user/group/add",
+        json={"inviteCode": "JOINME"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/shopping/list/", headers=auth_headers)
+    names = [lst["name"] for lst in response.json()["shoppingLists"]]
+    assert names == ["Other Groceries"]
+
+
+@pytest.mark.asyncio
+async def test_get_shopping_lists_paginates_newest_first(
+    client: AsyncClient, auth_headers, db_session, test_user, test_group
+):
+    from datetime import datetime
+
+    from app.models import ShoppingList
+
+    created_at = datetime(2025, 1, 1, 12, 0, 0)
+    # Lists 1 and 2 share a timestamp; the id breaks the tie
+    for i, hours in enumerate([0, 1, 1, 2, 3]):
+        db_session.add(
+            ShoppingList(
+                name=f"List {i}",
+                group_id=test_group.id,
+                priority="medium",
+                status="active",
+                total_cost=0,
+                created_by=test_user.id,
+                created_at=created_at + timedelta(hours=hours),
+            )
+        )
+    db_session.commit()
+
+    response = await client.get(
+        "/api/v1/shopping/list/", params={"limit": 2}, headers=auth_headers
+    )
+    first = response.json()
+    assert [lst["name"] for lst in first["shoppingLists"]] == ["List 4", "List 3"]
+
+    response = await client.get(
+        "/api/v1/shopping/list/",
+        params={"limit": 10, "cursor": first["nextCursor"]},
+        headers=auth_headers,
+    )
+    rest = response.json()
+    assert [lst["name"] for lst in rest["shoppingLists"]] == ["List 2", "List 1", "List 0"]
+    assert rest["nextCursor"] is None
+
+
+async def _list_total(client: AsyncClient, auth_headers, list_id) -> float:
+    response = await client.post(
+        "/api/v1/shopping/list/id/", json={"id": list_id}, headers=auth_headers
+    )
+    return float(response.json()["shoppingList"]["totalCost"])
+
+
+@pytest.mark.asyncio
+async def test_total_cost_tracks_task_changes_incrementally(
+    client: AsyncClient, auth_headers, test_food, test_group
+):
+    create_list_response = await client.post(
+        "/api/v1/shopping/list/",
+        json={"name": "Test List", "priority": "medium"},
+        headers=auth_headers,
+    )
+    list_id = create_list_response.json()["shoppingList"]["id"]
+
+    create_task_response = await client.post(
+        "/api/v1/shopping/task/",
+        json={
+            "listId": list_id,
+            "tasks": [
+                {"foodId": test_food.id, "quantity": 2, "estimatedCost": 5.00},
+                {"foodId": test_food.id, "quantity": 1, "estimatedCost": 3.00},
+                {"foodId": test_food.id, "quantity": 1},
+            ],
+        },
+        headers=auth_headers,
+    )
+    task_ids = [task["id"] for task in create_task_response.json()["tasks"]]
+    assert await _list_total(client, auth_headers, list_id) == 8.00
+
+    await client.put(
+        "/api/v1/shopping/task/",
+        json={"taskId": task_ids[0], "isDone": True, "actualCost": 6.50},
+        headers=auth_headers,
+    )
+    await client.put(
+        "/api/v1/shopping/task/",
+        json={"taskId": task_ids[2], "newEstimatedCost": 2.00},
+        headers=auth_headers,
+    )
+    assert await _list_total(client, auth_headers, list_id) == 11.50
+
+    await client.request(
+        "DELETE",
+        "/api/v1/shopping/task/",
+        json={"taskId": task_ids[1]},
+        headers=auth_headers,
+    )
+    assert await _list_total(client, auth_headers, list_id) == 8.50
+
+
+def test_repair_total_costs_fixes_drifted_lists(
+    db_session, test_user, test_group, test_food
+):
+    from decimal import Decimal
+
+    from app.models import ShoppingList, ShoppingTask
+    from app.services.shopping import repair_total_costs
+
+    def make_list(name, total_cost):
+        shopping_list = ShoppingList(
+            name=name,
+            group_id=test_group.id,
+            total_cost=total_cost,
+            created_by=test_user.id,
+        )
+        db_session.add(shopping_list)
+        db_session.flush()
+        return shopping_list
+
+    drifted = make_list("Drifted", Decimal("99"))
+    correct = make_list("Correct", Decimal("7"))
+    empty = make_list("Empty", Decimal("4"))
+    db_session.add_all(
+        [
+            ShoppingTask(
+                list_id=drifted.id, food_id=test_food.id, quantity=1,
+                estimated_cost=Decimal("2"), actual_cost=Decimal("2.5"),
+            ),
+            ShoppingTask(
+                list_id=drifted.id, food_id=test_food.id, quantity=1,
+                estimated_cost=Decimal("1"),
+            ),
+            ShoppingTask(
+                list_id=correct.id, food_id=test_food.id, quantity=1,
+                estimated_cost=Decimal("7"),
+            ),
+        ]
+    )
+    db_session.commit()
+
+    assert repair_total_costs(db_session) == 2
+    db_session.commit()
+
+    db_session.expire_all()
+    assert drifted.total_cost == Decimal("3.5")
+    assert correct.total_cost == Decimal("7")
+    assert empty.total_cost == Decimal("0")
+
+
+@pytest.mark.asyncio
+async def test_add_tasks_query_count_is_constant(
+    client: AsyncClient, auth_headers, test_food, test_unit, test_group, query_counter
+):
+    create_list_response = await client.post(
+        "/api/v1/shopping/list/",
+        json={"name": "Bulk List", "priority": "medium"},
+        headers=auth_headers,
+    )
+    list_id = create_list_response.json()["shoppingList"]["id"]
+
+    def tasks(count):
+        return [
+            {
+                "foodId": test_food.id,
+                "quantity": i + 1,
+                "unitId": test_unit.id,
+                "estimatedCost": 1.00,
+            }
+            for i in range(count)
+        ]
+
+    query_counter.clear()
+    response = await client.post(
+        "/api/v1/shopping/task/",
+        json={"listId": list_id, "tasks": tasks(2)},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    small_batch = len(query_counter)
+
+    query_counter.clear()
+    response = await client.post(
+        "/api/v1/shopping/task/",
+        json={"listId": list_id, "tasks": tasks(60)},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    assert len(query_counter) == small_batch
+    created = response.json()["tasks"]
+    assert [float(task["quantity"]) for task in created] == list(range(1, 61))
+    assert {task["foodName"] for task in created} == {"Tomato"}
+    assert {task["unitName"] for task in created} == {"kg"}
+    assert await _list_total(client, auth_headers, list_id) == 62.00
+
+
+@pytest.mark.asyncio
+async def test_add_tasks_rejects_batch_with_foreign_food(
+    client: AsyncClient, auth_headers, test_food, test_group
+):
+    create_list_response = await client.post(
+        "/api/v1/shopping/list/",
+        json={"name": "Bulk List", "priority": "medium"},
+        headers=auth_headers,
+    )
+    list_id = create_list_response.json()["shoppingList"]["id"]
+
+    response = await client.post(
+        "/api/v1/shopping/task/",
+        json={
+            "listId": list_id,
+            "tasks": [
+                {"foodId": test_food.id, "quantity": 1},
+                {"foodId": 99999, "quantity": 1},
+            ],
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    assert "Food not found" in response.json()["detail"]
+
+    response = await client.post(
+        "/api/v1/shopping/list/id/", json={"id": list_id}, headers=auth_headers
+    )
+    assert response.json()["tasks"] == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_tasks_returns_only_changed(
+    client: AsyncClient, auth_headers, test_food, test_group, query_counter
+):
+    create_list_response = await client.post(
+        "/api/v1/shopping/list/",
+        json={"name": "Store Run", "priority": "medium"},
+        headers=auth_headers,
+    )
+    list_id = create_list_response.json()["shoppingList"]["id"]
+    create_task_response = await client.post(
+        "/api/v1/shopping/task/",
+        json={
+            "listId": list_id,
+            "tasks": [
+                {"foodId": test_food.id, "quantity": 1, "estimatedCost": 4.00}
+                for _ in range(4)
+            ],
+        },
+        headers=auth_headers,
+    )
+    task_ids = [task["id"] for task in create_task_response.json()["tasks"]]
+    assert await _list_total(client, auth_headers, list_id) == 16.00
+
+    await client.put(
+        "/api/v1/shopping/task/",
+        json={"taskId": task_ids[3], "isDone": True},
+        headers=auth_headers,
+    )
+
+    query_counter.clear()
+    response = await client.put(
+        "/api/v1/shopping/task/bulk/",
+        json={
+            "listId": list_id,
+            "tasks": [
+                {"taskId": task_ids[0], "isDone": True, "actualCost": 5.50},
+                {"taskId": task_ids[1], "isDone": True},
+                {"taskId": task_ids[2], "actualCost": 3.00},
+                {"taskId": task_ids[3], "isDone": True},
+            ],
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    updates = [q for q in query_counter if q.lstrip().upper().startswith("UPDATE")]
+    assert len(updates) == 2
+
+    tasks = {task["id"]: task for task in response.json()["tasks"]}
+    assert sorted(tasks) == task_ids[:3]
+    assert tasks[task_ids[0]]["isDone"] is True
+    assert float(tasks[task_ids[0]]["actualCost"]) == 5.50
+    assert tasks[task_ids[0]]["doneByUsername"] == "testuser"
+    assert tasks[task_ids[1]]["doneAt"] is not None
+    assert tasks[task_ids[2]]["isDone"] is False
+    assert tasks[task_ids[2]]["doneAt"] is None
+    assert await _list_total(client, auth_headers, list_id) == 16.50
+
+    response = await client.put(
+        "/api/v1/shopping/task/bulk/",
+        json={
+            "listId": list_id,
+            "tasks": [
+                {"taskId": task_ids[0], "isDone": False},
+                {"taskId": task_ids[2], "actualCost": 3.00},
+            ],
+        },
+        headers=auth_headers,
+    )
+    tasks = response.json()["tasks"]
+    assert [task["id"] for task in tasks] == [task_ids[0]]
+    assert tasks[0]["doneAt"] is None
+    assert tasks[0]["doneBy"] is None
+    assert await _list_total(client, auth_headers, list_id) == 16.50
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_tasks_rejects_task_from_other_list(
+    client: AsyncClient, auth_headers, test_food, test_group
+):
+    list_ids = []
+    task_ids = []
+    for name in ("First", "Second"):
+        create_list_response = await client.post(
+            "/api/v1/shopping/list/",
+            json={"name": name, "priority": "medium"},
+            headers=auth_headers,
+        )
+        list_id = create_list_response.json()["shoppingList"]["id"]
+        create_task_response = await client.post(
+            "/api/v1/shopping/task/",
+            json={"listId": list_id, "tasks": [{"foodId": test_food.id, "quantity": 1}]},
+            headers=auth_headers,
+        )
+        list_ids.append(list_id)
+        task_ids.append(create_task_response.json()["tasks"][0]["id"])
+
+    response = await client.put(
+        "/api/v1/shopping/task/bulk/",
+        json={
+            "listId": list_ids[0],
+            "tasks": [
+                {"taskId": task_ids[0], "isDone": True},
+                {"taskId": task_ids[1], "isDone": True},
+            ],
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+
+    response = await client.post(
+        "/api/v1/shopping/list/id/", json={"id": list_ids[0]}, headers=auth_headers
+    )
+    assert response.json()["tasks"][0]["isDone"] is False
+
+
+@pytest.mark.asyncio
+async def test_complete_shopping_list_stocks_fridge(
+    client: AsyncClient, auth_headers, db_session, test_food, test_group
+):
+    test_food.default_shelf_life_days = 5
+    db_session.commit()
+
+    create_list_response = await client.post(
+        "/api/v1/shopping/list/",
+        json={"name": "Weekly Shop", "priority": "medium"},
+        headers=auth_headers,
+    )
+    list_id = create_list_response.json()["shoppingList"]["id"]
+    create_task_response = await client.post(
+        "/api/v1/shopping/task/",
+        json={
+            "listId": list_id,
+            "tasks": [
+                {"foodId": test_food.id, "quantity": 2, "estimatedCost": 4.00},
+                {"foodId": test_food.id, "quantity": 3},
+                {"foodId": test_food.id, "quantity": 9},
+            ],
+        },
+        headers=auth_headers,
+    )
+    task_ids = [task["id"] for task in create_task_response.json()["tasks"]]
+    await client.put(
+        "/api/v1/shopping/task/bulk/",
+        json={
+            "listId": list_id,
+            "tasks": [
+                {"taskId": task_ids[0], "isDone": True, "actualCost": 4.50},
+                {"taskId": task_ids[1], "isDone": True},
+            ],
+        },
+        headers=auth_headers,
+    )
+
+    purchase_date = date(2026, 3, 1)
+    response = await client.post(
+        "/api/v1/shopping/list/complete/",
+        json={
+            "id": list_id,
+            "location": "fridge",
+            "purchaseDate": str(purchase_date),
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["fridgeItemsAdded"] == 2
+    assert data["shoppingList"]["status"] == "completed"
+
+    items = sorted(
+        (await client.get("/api/v1/fridge/", headers=auth_headers)).json()[
+            "fridgeItems"
+        ],
+        key=lambda item: float(item["quantity"]),
+    )
+    assert [float(item["quantity"]) for item in items] == [2, 3]
+    assert {item["useWithinDate"] for item in items} == {
+        str(purchase_date + timedelta(days=5))
+    }
+    assert {item["purchaseDate"] for item in items} == {str(purchase_date)}
+    assert {item["location"] for item in items} == {"fridge"}
+    assert [item["cost"] for item in items][1] is None
+    assert float(items[0]["cost"]) == 4.50
+
+    response = await client.post(
+        "/api/v1/shopping/list/complete/", json={"id": list_id}, headers=auth_headers
+    )
+    assert response.status_code == 400
@@ -0,0 +1,83 @@
+import io
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.core import storage
+from app.core.config import settings
+
+
+class RecordingClient:
+    """Stands in for minio.Minio, recording the requests it would send."""
+
+    def __init__(self, bucket_exists: bool):
+        self.exists = bucket_exists
+        self.calls = []
+
+    def bucket_exists(self, bucket_name):
+        self.calls.append("bucket_exists")
+        return self.exists
+
+    def make_bucket(self, bucket_name):
+        self.calls.append("make_bucket")
+
+    def set_bucket_policy(self, bucket_name, policy):
+        self.calls.append("set_bucket_policy")
+
+    def put_object(self, bucket_name, object_name, data, length, part_size, **kwargs):
+        # Reads part by part like an unknown-length multipart upload
+        assert length == -1
+        self.reads = []
+        while chunk := data.read(part_size):
+            self.reads.append(len(chunk))
+        self.calls.append("put_object")
+
+    def remove_object(self, bucket_name, object_name):
+        self.calls.append(f"remove_object {object_name}")
+
+
+def test_minio_client_is_shared_and_uses_the_tuned_pool():
+    client = storage.get_minio_client()
+    assert storage.get_minio_client() is client
+    assert client._http.connection_pool_kw["maxsize"] == settings.minio_pool_maxsize
+    assert client._http.connection_pool_kw["retries"].total == settings.minio_max_retries
+
+
+def test_bucket_is_set_up_once_per_process(monkeypatch):
+    monkeypatch.setattr(storage, "_bucket_ready", False)
+    client = RecordingClient(bucket_exists=False)
+
+    for _ in range(3):
+        storage._ensure_bucket(client, settings.minio_bucket)
+
+    assert client.calls == ["bucket_exists", "make_bucket", "set_bucket_policy"]
+
+
+def test_uploads_stream_in_parts_and_replace_the_old_object_afterwards(monkeypatch):
+    monkeypatch.setattr(storage, "_bucket_ready", True)
+    monkeypatch.setattr(settings, "minio_part_size_bytes", 4)
+    client = RecordingClient(bucket_exists=True)
+    upload = UploadFile(file=io.BytesIO(b"0123456789"), filename="photo.jpg")
+
+    old_url = f"{settings.minio_public_url}/{settings.minio_bucket}/food/old.jpg"
+    response = storage.upload_file(client, upload, "food", old_url)
+
+    assert response["public_url"].endswith(".jpg")
+    assert client.reads == [4, 4, 2]
+    assert client.calls == ["put_object", "remove_object food/old.jpg"]
+
+
+def test_uploads_over_the_limit_are_rejected_while_streaming(monkeypatch):
+    monkeypatch.setattr(storage, "_bucket_ready", True)
+    monkeypatch.setattr(settings, "minio_part_size_bytes", 4)
+    monkeypatch.setattr(settings, "upload_max_bytes", 6)
+    client = RecordingClient(bucket_exists=True)
+    upload = UploadFile(file=io.BytesIO(b"0123456789"), filename="photo.jpg")
+
+    with pytest.raises(HTTPException) as excinfo:
+        storage.upload_file(client, upload, "food", "old.jpg")
+
+    assert excinfo.value.status_code == 413
+    # Stopped after the part that crossed the limit; the old image is kept
+    assert client.reads == [4]
+    assert client.calls == []
@@ -0,0 +1,31 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.mark.asyncio
+async def test_get_me_is_served_from_user_cache(
+    client: AsyncClient, auth_headers, test_user, query_counter
+):
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+
+    query_counter.clear()
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["user"]["username"] == "testuser"
+    assert query_counter == []
+
+
+@pytest.mark.asyncio
+async def test_edit_profile_invalidates_user_cache(
+    client: AsyncClient, auth_headers, test_user
+):
+    await client.get("/api/v1/users/me", headers=auth_headers)
+
+    response = await client.put(
+        "/api/v1/users/me", data={"name": "Renamed User"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/users/me", headers=auth_headers)
+    assert response.json()["user"]["name"] == "Renamed User"